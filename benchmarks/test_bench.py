@@ -0,0 +1,82 @@
+"""pytest-benchmark suite mirroring `stt bench`.
+
+    uv run --group bench pytest benchmarks/ --benchmark-json=bench.json
+
+Set STT_BENCH_MODEL (and optionally STT_BENCH_DEVICE) to include inference.
+"""
+
+import os
+
+import pytest
+import soundfile as sf
+import soxr
+
+from stt.bench import RESAMPLE_RATES, WAV_SUBTYPES, fake_daemon, write_wav
+from stt.config import WHISPER_RATE
+from stt.fake import synthetic_speech
+
+pytest.importorskip("pytest_benchmark")
+
+
+@pytest.fixture(scope="module")
+def daemon_sock():
+    with fake_daemon() as sock:
+        yield sock
+
+
+def test_roundtrip_ping(benchmark, daemon_sock):
+    from stt.client import daemon_send
+
+    assert benchmark(daemon_send, "ping", socket_path=daemon_sock) == "pong"
+
+
+def test_roundtrip_transcribe(benchmark, daemon_sock, tmp_path):
+    from stt.client import daemon_send
+
+    wav = write_wav(str(tmp_path / "1s.wav"), 1.0)
+    assert benchmark(daemon_send, f"transcribe {wav}", socket_path=daemon_sock)
+
+
+@pytest.mark.parametrize("subtype", WAV_SUBTYPES)
+def test_wav_write(benchmark, tmp_path, subtype):
+    audio = synthetic_speech(5.0, 48000)
+    benchmark(sf.write, str(tmp_path / "a.wav"), audio, 48000, subtype=subtype)
+
+
+@pytest.mark.parametrize("subtype", WAV_SUBTYPES)
+def test_wav_read(benchmark, tmp_path, subtype):
+    path = write_wav(str(tmp_path / "a.wav"), 5.0, 48000, subtype)
+    benchmark(sf.read, path, dtype="float32")
+
+
+@pytest.mark.parametrize("rate", RESAMPLE_RATES)
+def test_resample(benchmark, rate):
+    audio = synthetic_speech(5.0, rate)
+    benchmark(soxr.resample, audio, rate, WHISPER_RATE)
+
+
+def test_segment_throughput(benchmark):
+    from stt.vad import Segmenter
+
+    rate, size = 48000, 4800
+    audio = synthetic_speech(60.0, rate)
+    chunks = [audio[i:i + size].reshape(-1, 1) for i in range(0, len(audio) - size + 1, size)]
+
+    def run():
+        seg = Segmenter(rate)
+        for chunk in chunks:
+            seg.feed(chunk)
+        seg.flush()
+
+    benchmark(run)
+
+
+@pytest.mark.skipif(not os.environ.get("STT_BENCH_MODEL"), reason="STT_BENCH_MODEL not set")
+def test_inference(benchmark, tmp_path):
+    from stt.core import load_model, transcribe_file
+
+    device = os.environ.get("STT_BENCH_DEVICE", "cpu")
+    model = load_model(os.environ["STT_BENCH_MODEL"], device=device)
+    wav = write_wav(str(tmp_path / "speech.wav"), 10.0)
+    benchmark.extra_info["audio_seconds"] = 10.0
+    benchmark.pedantic(transcribe_file, args=(model, wav), rounds=3, warmup_rounds=1)
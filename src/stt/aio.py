@@ -0,0 +1,144 @@
+"""Asyncio client for stt-daemon.
+
+    client = await connect()
+    text = await client.transcribe("/tmp/a.wav")
+    text = await client.transcribe_bytes(wav_bytes)
+    async for segment in client.stream("/tmp/long.wav"):
+        ...
+"""
+
+import asyncio
+import os
+
+from stt.config import SOCKET_PATH
+from stt.protocol import EMPTY_TRANSCRIPT, encode_request, transcript_text
+
+
+class DaemonError(Exception):
+    """The daemon answered a request with an error."""
+
+
+def _check(text: str) -> str:
+    if text.startswith("ERROR:"):
+        raise DaemonError(text[len("ERROR:"):].strip())
+    return text
+
+
+def _options(priority=None, request_id=None, deadline=None, decode=None):
+    options = {"priority": priority, "id": request_id, "deadline": deadline,
+               "decode": decode}
+    return {k: v for k, v in options.items() if v is not None}
+
+
+async def open_connection(address):
+    """Connect to a unix socket path or a (host, port) pair."""
+    if isinstance(address, tuple):
+        return await asyncio.open_connection(*address)
+    return await asyncio.open_unix_connection(address)
+
+
+class Client:
+    """Async handle on stt-daemon. Each request uses its own connection.
+
+    path is the daemon's unix socket, or a (host, port) pair for a daemon
+    started with --listen.
+    """
+
+    def __init__(self, path=None, timeout=30):
+        self.path = path or SOCKET_PATH
+        self.timeout = timeout
+
+    async def _open(self, message: bytes):
+        reader, writer = await asyncio.wait_for(
+            open_connection(self.path), self.timeout
+        )
+        writer.write(message)
+        await writer.drain()
+        return reader, writer
+
+    async def _close(self, writer):
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+
+    async def request(self, message: bytes, timeout=...) -> str:
+        """Send one raw request and return the whole reply.
+
+        timeout overrides the client's reply timeout (None waits forever).
+        """
+        reader, writer = await self._open(message)
+        try:
+            data = await asyncio.wait_for(
+                reader.read(), self.timeout if timeout is ... else timeout
+            )
+        finally:
+            await self._close(writer)
+        return data.decode("utf-8")
+
+    async def ping(self) -> bool:
+        try:
+            return await self.request(b"ping") == "pong"
+        except (OSError, asyncio.TimeoutError):
+            return False
+
+    async def wait_ready(self, timeout: float | None = None) -> bool:
+        """Wait until the daemon's model is loaded. False if timeout passed first."""
+        if timeout is None:
+            reply = await self.request(b"wait-ready", timeout=None)
+        else:
+            reply = await self.request(
+                f"wait-ready {timeout}".encode(), timeout=timeout + self.timeout
+            )
+        if reply.startswith("ERROR: not ready"):
+            return False
+        return _check(reply) == "ready"
+
+    async def shutdown(self):
+        await self.request(b"shutdown")
+
+    async def cancel(self, request_id: str) -> bool:
+        """Cancel the request sent with this request_id. False if none is running."""
+        return await self.request(f"cancel {request_id}".encode("utf-8")) == "ok"
+
+    async def transcribe(self, path: str, priority: str | None = None, **options) -> str:
+        """Transcribe an audio file the daemon can read.
+
+        priority is "interactive" (the daemon's default) or "bulk". Options
+        request_id (for cancel()), deadline (seconds the daemon may take) and
+        decode (a dict of decoding options such as {"beam_size": 1}; see
+        stt.core.decode_options) apply to every transcription method.
+        """
+        msg = encode_request(
+            "transcribe", path=os.path.abspath(path), **_options(priority, **options)
+        )
+        return transcript_text(_check(await self.request(msg)))
+
+    async def transcribe_bytes(self, data: bytes, priority: str | None = None,
+                               **options) -> str:
+        """Transcribe audio file data (WAV, FLAC, ...) sent inline."""
+        msg = encode_request("transcribe", data=data, **_options(priority, **options))
+        return transcript_text(_check(await self.request(msg)))
+
+    async def stream(self, path: str | None = None, data: bytes | None = None,
+                     priority: str | None = None, **options):
+        """Yield segment texts as the daemon decodes them."""
+        if path is not None:
+            path = os.path.abspath(path)
+        msg = encode_request("stream", path=path, data=data, **_options(priority, **options))
+        reader, writer = await self._open(msg)
+        try:
+            while line := await asyncio.wait_for(reader.readline(), self.timeout):
+                if line != EMPTY_TRANSCRIPT:
+                    yield _check(line.decode("utf-8").rstrip("\n"))
+        finally:
+            await self._close(writer)
+
+
+async def connect(path=None, timeout=30) -> Client:
+    """Return a Client for a running daemon, or raise ConnectionError."""
+    client = Client(path, timeout)
+    if not await client.ping():
+        raise ConnectionError(f"stt-daemon not reachable at {client.path}")
+    return client
@@ -1,23 +1,19 @@
-"""Audio device discovery, recording, and VAD."""
+"""Audio device discovery, recording, and VAD.
+
+stt-record runs on every hotkey press, so numpy and soundfile are imported
+only once the input stream is running, keeping them off the mic-open path.
+"""
 
 import queue
 import signal
 import sys
 import threading
 
-import numpy as np
 import sounddevice as sd
-import soundfile as sf
-
-from stt.client import save_and_transcribe
-from stt.config import (
-    CHANNELS,
-    DEFAULT_DEVICE,
-    MIN_AUDIO_DURATION,
-    SILENCE_DURATION,
-    SILENCE_THRESHOLD,
-)
+
+from stt.config import CHANNELS, CONTINUOUS_DECODE, DEFAULT_DEVICE
 from stt.log import setup_logging
+from stt.trace import set_current, span
 
 log = setup_logging("stt.audio")
 
@@ -83,6 +79,8 @@ def record_until_stop(device_id):
     t = threading.Thread(target=wait_enter, daemon=True)
     t.start()
 
+    import numpy as np
+
     try:
         stop.wait()
     except KeyboardInterrupt:
@@ -99,8 +97,9 @@ def record_until_stop(device_id):
 
 def record_to_file(outpath, device_id=DEFAULT_DEVICE, stop_event=None):
     """Record to WAV file. Stops on SIGTERM/SIGINT (Linux) or stop_event.set() (Windows)."""
-    dev_idx = resolve_device(device_id)
-    native_rate = get_device_rate(device_id)
+    with span("record.open_device"):
+        dev_idx = resolve_device(device_id)
+        native_rate = get_device_rate(device_id)
     audio_chunks = []
     stop = False
 
@@ -116,20 +115,25 @@ def record_to_file(outpath, device_id=DEFAULT_DEVICE, stop_event=None):
         audio_chunks.append(indata.copy())
 
     log.debug("recording to %s from device %d at %d Hz", outpath, dev_idx, native_rate)
-    stream = sd.InputStream(
-        samplerate=native_rate,
-        channels=CHANNELS,
-        dtype="float32",
-        callback=callback,
-        device=dev_idx,
-    )
-    stream.start()
+    with span("record.open_stream"):
+        stream = sd.InputStream(
+            samplerate=native_rate,
+            channels=CHANNELS,
+            dtype="float32",
+            callback=callback,
+            device=dev_idx,
+        )
+        stream.start()
+
+    import numpy as np
+    import soundfile as sf
 
     try:
-        while not stop:
-            if stop_event and stop_event.is_set():
-                break
-            sd.sleep(100)
+        with span("record.capture"):
+            while not stop:
+                if stop_event and stop_event.is_set():
+                    break
+                sd.sleep(100)
     except KeyboardInterrupt:
         pass
     finally:
@@ -138,30 +142,38 @@ def record_to_file(outpath, device_id=DEFAULT_DEVICE, stop_event=None):
 
     if audio_chunks:
         audio = np.concatenate(audio_chunks, axis=0)
-        sf.write(outpath, audio, native_rate, subtype="FLOAT")
+        with span("record.write_wav"):
+            sf.write(outpath, audio, native_rate, subtype="FLOAT")
         log.info("saved %s (%d samples)", outpath, len(audio))
 
 
 def record_to_file_cli():
     """Entry point for stt-record."""
-    if len(sys.argv) < 2:
-        print("Usage: stt-record <output.wav>", file=sys.stderr)
+    if len(sys.argv) not in (2, 4) or (len(sys.argv) == 4 and sys.argv[2] != "--trace"):
+        print("Usage: stt-record <output.wav> [--trace ID]", file=sys.stderr)
         sys.exit(1)
+    if len(sys.argv) == 4:
+        set_current(sys.argv[3])
     record_to_file(sys.argv[1])
 
 
-def continuous_mode(device_id, on_segment=None):
-    """Listen and transcribe segments via VAD. Calls on_segment(text) for each."""
+def continuous_mode(device_id, on_segment=None, on_partial=None, partial_interval=1.0):
+    """Listen and transcribe segments via VAD. Calls on_segment(text) for each.
+
+    With on_partial, the utterance in progress is also re-transcribed after
+    every partial_interval seconds of new audio and on_partial(text) called
+    with each hypothesis; on_segment then also gets utterances that ended up
+    empty, so the caller can settle what it already showed.
+    """
+    from stt.client import save_and_transcribe
+    from stt.vad import Segmenter
+
     dev_idx = resolve_device(device_id)
     native_rate = get_device_rate(device_id)
     chunk_duration = 0.1
     frames_per_chunk = int(native_rate * chunk_duration)
-    silence_limit = int(SILENCE_DURATION / chunk_duration)
-    min_frames = int(MIN_AUDIO_DURATION * native_rate)
-
-    audio_buffer = []
-    silence_frames = 0
-    has_speech = False
+    partial_chunks = max(1, round(partial_interval / chunk_duration))
+    segmenter = Segmenter(native_rate, chunk_duration=chunk_duration)
     audio_q = queue.Queue()
 
     def callback(indata, frames, time_info, status):
@@ -181,33 +193,42 @@ def continuous_mode(device_id, on_segment=None):
     )
     stream.start()
 
-    def flush_buffer():
-        if not audio_buffer:
+    partials = 0
+    since_partial = 0
+
+    def emit(raw):
+        nonlocal partials, since_partial
+        had_partials, partials, since_partial = partials, 0, 0
+        if raw is None and not had_partials:
+            return
+        text = save_and_transcribe(raw, native_rate, CONTINUOUS_DECODE) if raw is not None else ""
+        if on_segment and (text or had_partials):
+            on_segment(text)
+
+    def partial():
+        nonlocal partials, since_partial
+        since_partial += 1
+        # Skip while behind: the final decode matters more than a fresh partial
+        if since_partial < partial_chunks or not audio_q.empty():
+            return
+        raw = segmenter.pending()
+        if raw is None:
             return
-        raw = np.concatenate(audio_buffer, axis=0).flatten()
-        if len(raw) >= min_frames:
-            text = save_and_transcribe(raw, native_rate)
-            if text and on_segment:
-                on_segment(text)
-        audio_buffer.clear()
+        since_partial = 0
+        text = save_and_transcribe(raw, native_rate, CONTINUOUS_DECODE)
+        if text:
+            partials += 1
+            on_partial(text)
 
     try:
         while True:
-            chunk = audio_q.get()
-            rms = np.sqrt(np.mean(chunk**2))
-            if rms > SILENCE_THRESHOLD:
-                has_speech = True
-                silence_frames = 0
-                audio_buffer.append(chunk)
-            elif has_speech:
-                silence_frames += 1
-                audio_buffer.append(chunk)
-                if silence_frames >= silence_limit:
-                    flush_buffer()
-                    silence_frames = 0
-                    has_speech = False
+            raw = segmenter.feed(audio_q.get())
+            if raw is not None or not segmenter.has_speech:
+                emit(raw)
+            elif on_partial:
+                partial()
     except KeyboardInterrupt:
-        flush_buffer()
+        emit(segmenter.flush())
     finally:
         stream.stop()
         stream.close()
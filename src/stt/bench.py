@@ -0,0 +1,256 @@
+"""`stt bench` — benchmarks for the protocol, preprocessing and inference.
+
+Results are written as JSON (stdout or -o FILE) so runs can be compared across
+commits and hosts. The same cases back the pytest-benchmark suite in
+benchmarks/.
+
+Cases:
+  roundtrip  socket round trip to an in-process daemon with a fake model
+  wav        WAV write and read for each subtype
+  resample   soxr resample to 16 kHz from common device rates
+  segment    continuous-mode segmentation throughput
+  inference  transcribe_file real-time factor (needs --model)
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import soundfile as sf
+import soxr
+
+from stt.config import WHISPER_RATE
+from stt.fake import FakeModel, synthetic_speech
+
+CASES = ("roundtrip", "wav", "resample", "segment", "inference")
+WAV_SUBTYPES = ("PCM_16", "PCM_24", "PCM_32", "FLOAT", "DOUBLE")
+RESAMPLE_RATES = (8000, 22050, 44100, 48000)
+
+
+def measure(fn, repeat=20, warmup=2) -> dict:
+    """Call fn repeatedly; return timing stats in seconds."""
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return {
+        "n": len(times),
+        "mean": statistics.fmean(times),
+        "median": statistics.median(times),
+        "min": min(times),
+        "max": max(times),
+        "stdev": statistics.stdev(times) if len(times) > 1 else 0.0,
+    }
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=False,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip() or None
+    except FileNotFoundError:
+        commit = None
+    return {
+        "host": platform.node(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def write_wav(path, seconds, rate=WHISPER_RATE, subtype="FLOAT"):
+    sf.write(path, synthetic_speech(seconds, rate), rate, subtype=subtype)
+    return path
+
+
+@contextmanager
+def fake_daemon(model=None):
+    """Run a Daemon with a fake model on a temp socket in a background thread."""
+    from stt.daemon import Daemon
+
+    tmp = tempfile.mkdtemp(prefix="stt-bench-")
+    sock = os.path.join(tmp, "stt.sock")
+    loop = asyncio.new_event_loop()
+    daemon = Daemon(model or FakeModel())
+    ready = threading.Event()
+
+    def run():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(daemon.start(sock))
+        ready.set()
+        loop.run_until_complete(daemon.serve_until_stopped())
+        pending = asyncio.all_tasks(loop)
+        for task in pending:
+            task.cancel()
+        loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+        daemon.executor.shutdown(wait=True)
+        daemon.prep.shutdown(wait=True)
+        loop.close()
+
+    t = threading.Thread(target=run, daemon=True)
+    t.start()
+    ready.wait()
+    try:
+        yield sock
+    finally:
+        loop.call_soon_threadsafe(daemon.stop)
+        t.join(timeout=5)
+        try:
+            os.unlink(sock)
+        except FileNotFoundError:
+            pass
+        os.rmdir(tmp)
+
+
+def bench_roundtrip(repeat=200):
+    from stt.client import daemon_send
+
+    results = {}
+    with fake_daemon() as sock, tempfile.TemporaryDirectory() as tmp:
+        wav = write_wav(os.path.join(tmp, "1s.wav"), 1.0)
+        results["roundtrip.ping"] = measure(
+            lambda: daemon_send("ping", socket_path=sock), repeat
+        )
+        results["roundtrip.transcribe_1s"] = measure(
+            lambda: daemon_send(f"transcribe {wav}", socket_path=sock), repeat
+        )
+    return results
+
+
+def bench_wav(repeat=20, seconds=5.0, rate=48000):
+    results = {}
+    audio = synthetic_speech(seconds, rate)
+    with tempfile.TemporaryDirectory() as tmp:
+        for subtype in WAV_SUBTYPES:
+            path = os.path.join(tmp, f"{subtype}.wav")
+            results[f"wav.write.{subtype}"] = measure(
+                lambda p=path, st=subtype: sf.write(p, audio, rate, subtype=st), repeat
+            )
+            results[f"wav.read.{subtype}"] = measure(
+                lambda p=path: sf.read(p, dtype="float32"), repeat
+            )
+            results[f"wav.read.{subtype}"]["bytes"] = os.path.getsize(path)
+    return results
+
+
+def bench_resample(repeat=20, seconds=5.0):
+    results = {}
+    for rate in RESAMPLE_RATES:
+        audio = synthetic_speech(seconds, rate)
+        stats = measure(lambda a=audio, r=rate: soxr.resample(a, r, WHISPER_RATE), repeat)
+        stats["audio_seconds"] = seconds
+        results[f"resample.{rate}"] = stats
+    return results
+
+
+def bench_segment(repeat=5, seconds=60.0, rate=48000, chunk_duration=0.1):
+    from stt.vad import Segmenter
+
+    audio = synthetic_speech(seconds, rate)
+    size = int(rate * chunk_duration)
+    chunks = [audio[i:i + size].reshape(-1, 1) for i in range(0, len(audio) - size + 1, size)]
+
+    def run():
+        seg = Segmenter(rate, chunk_duration=chunk_duration)
+        for chunk in chunks:
+            seg.feed(chunk)
+        seg.flush()
+
+    stats = measure(run, repeat, warmup=1)
+    stats["audio_seconds"] = seconds
+    stats["chunks"] = len(chunks)
+    stats["audio_seconds_per_second"] = seconds / stats["mean"]
+    return {"segment.continuous": stats}
+
+
+def bench_inference(model_name, device="cpu", repeat=3, seconds=10.0):
+    from stt.core import load_model, transcribe_file
+
+    t0 = time.perf_counter()
+    model = load_model(model_name, device=device)
+    load_seconds = time.perf_counter() - t0
+    with tempfile.TemporaryDirectory() as tmp:
+        wav = write_wav(os.path.join(tmp, "speech.wav"), seconds)
+        stats = measure(lambda: transcribe_file(model, wav), repeat, warmup=1)
+    stats.update({
+        "model": model_name,
+        "device": device,
+        "audio_seconds": seconds,
+        "load_seconds": load_seconds,
+        "rtf": stats["mean"] / seconds,
+    })
+    return {f"inference.{model_name}.{device}": stats}
+
+
+def run(cases, repeat=None, model=None, device="cpu") -> dict:
+    results = {}
+    kw = {"repeat": repeat} if repeat else {}
+    for case in cases:
+        if case == "roundtrip":
+            results.update(bench_roundtrip(**kw))
+        elif case == "wav":
+            results.update(bench_wav(**kw))
+        elif case == "resample":
+            results.update(bench_resample(**kw))
+        elif case == "segment":
+            results.update(bench_segment(**kw))
+        elif case == "inference":
+            results.update(bench_inference(model, device, **kw))
+    return {"environment": environment(), "results": results}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="stt bench", description="Benchmark the protocol, preprocessing and inference"
+    )
+    parser.add_argument(
+        "cases", nargs="*", metavar="CASE",
+        help=f"Cases to run: {', '.join(CASES)} (default: all; inference needs --model)",
+    )
+    parser.add_argument("-n", "--repeat", type=int, help="Iterations per measurement")
+    parser.add_argument("-m", "--model", help="Local Whisper model for the inference case")
+    parser.add_argument(
+        "--device", default="cpu", choices=["cpu", "cuda"], help="Inference device (default: cpu)"
+    )
+    parser.add_argument("-o", "--output", help="Write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    unknown = set(args.cases) - set(CASES)
+    if unknown:
+        parser.error(f"unknown case(s): {', '.join(sorted(unknown))}")
+    cases = args.cases or [c for c in CASES if c != "inference" or args.model]
+    if "inference" in cases and not args.model:
+        parser.error("the inference case needs --model")
+
+    report = run(cases, args.repeat, args.model, args.device)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+        for name, stats in report["results"].items():
+            print(f"{name:<36} {stats['mean'] * 1000:10.3f}ms", file=sys.stderr)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
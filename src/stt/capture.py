@@ -0,0 +1,95 @@
+"""Always-open microphone capture with pre-roll.
+
+Opening an input stream costs a noticeable fraction of a second (more through
+PulseAudio), and words spoken right after the hotkey are often clipped.
+Long-lived processes instead keep one InputStream running into a ring buffer
+holding the last few hundred milliseconds. Starting a take copies the last
+`preroll` seconds out of the ring, so a recording begins slightly before the
+hotkey press, with no device-open latency.
+
+The audio callback only copies blocks into the ring (and, while recording,
+into the take); everything else happens in the caller's thread.
+"""
+
+import threading
+
+import numpy as np
+
+from stt.config import CAPTURE_RING, CHANNELS
+
+
+class Capture:
+    """Keeps the input device open; start()/stop() cut takes from the stream."""
+
+    def __init__(self, device=None, ring_seconds=CAPTURE_RING):
+        import sounddevice as sd
+
+        self.rate = int(sd.query_devices(device, "input")["default_samplerate"])
+        self.ring = np.zeros(max(1, int(self.rate * ring_seconds)), dtype=np.float32)
+        self.written = 0
+        self.take = None
+        self.lock = threading.Lock()
+        self.stream = sd.InputStream(
+            samplerate=self.rate, channels=CHANNELS, dtype="float32", device=device,
+            callback=self._callback,
+        )
+        self.stream.start()
+
+    @property
+    def recording(self) -> bool:
+        return self.take is not None
+
+    def _callback(self, indata, frames, time_info, status):
+        block = indata[:, 0]
+        with self.lock:
+            self._write_ring(block)
+            if self.take is not None:
+                self.take.append(block.copy())
+
+    def _write_ring(self, block):
+        size = len(self.ring)
+        if len(block) > size:
+            self.written += len(block) - size
+            block = block[-size:]
+        at = self.written % size
+        first = min(len(block), size - at)
+        self.ring[at:at + first] = block[:first]
+        self.ring[:len(block) - first] = block[first:]
+        self.written += len(block)
+
+    def _last(self, frames) -> np.ndarray:
+        """Copy of the newest frames in the ring (fewer if not yet filled)."""
+        size = len(self.ring)
+        frames = min(frames, size, self.written)
+        end = self.written % size
+        if frames <= end:
+            return self.ring[end - frames:end].copy()
+        return np.concatenate((self.ring[size - (frames - end):], self.ring[:end]))
+
+    def start(self, preroll=0.0):
+        """Begin a take, seeded with the last preroll seconds of audio."""
+        with self.lock:
+            self.take = [self._last(int(self.rate * preroll))]
+
+    def stop(self):
+        """End the take; returns its mono float32 audio, or None if none."""
+        with self.lock:
+            take, self.take = self.take, None
+        if take is None:
+            return None
+        audio = np.concatenate(take)
+        return audio if len(audio) else None
+
+    def stop_to_file(self, path) -> bool:
+        """End the take and write it as a WAV file. False if there was no audio."""
+        import soundfile as sf
+
+        audio = self.stop()
+        if audio is None:
+            return False
+        sf.write(path, audio, self.rate, subtype="FLOAT")
+        return True
+
+    def close(self):
+        self.stream.stop()
+        self.stream.close()
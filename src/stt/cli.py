@@ -4,41 +4,64 @@ import argparse
 import subprocess
 import sys
 
-from stt.config import DEFAULT_DEVICE, PID_PATH
+from stt.config import DEFAULT_DEVICE, PID_PATH, READY_TIMEOUT
 from stt.log import setup_logging
 
 log = setup_logging("stt.cli")
 
+BIND_TIMEOUT = 10
 
-def cmd_start(args):
-    from stt.client import daemon_running
+# `stt <name> ...` hands the rest of argv to <module>.main(argv)
+SUBCOMMANDS = {
+    "bench": "stt.bench",
+    "model": "stt.models",
+    "tune": "stt.tune",
+}
+
+
+def cmd_start(args, wait=True) -> bool:
+    """Start the daemon if needed; with wait, block until its model is loaded."""
+    import time
+
+    from stt.client import daemon_running, daemon_send
 
     if daemon_running():
         print("Daemon already running.")
-        return
-    cmd = ["stt-daemon"]
-    if args.model:
-        cmd += ["-m", args.model]
-    if args.cpu:
-        cmd += ["--cpu"]
-    subprocess.Popen(
-        cmd,
-        stdout=subprocess.DEVNULL,
-        stderr=subprocess.DEVNULL,
-        start_new_session=True,
-    )
-    print("Daemon starting...")
-    import time
+    else:
+        cmd = ["stt-daemon"]
+        if args.model:
+            cmd += ["-m", args.model]
+        if args.cpu:
+            cmd += ["--cpu"]
+        if args.compute_type:
+            cmd += ["--compute-type", args.compute_type]
+        subprocess.Popen(
+            cmd,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        print("Daemon starting...")
+        # The socket is bound before the model loads, so this is quick
+        deadline = time.monotonic() + BIND_TIMEOUT
+        while not daemon_running():
+            if time.monotonic() > deadline:
+                print(
+                    "Daemon failed to start. Run 'stt-daemon' manually to see errors.",
+                    file=sys.stderr,
+                )
+                return False
+            time.sleep(0.05)
+    if not wait:
+        return True
 
-    for _ in range(20):
-        time.sleep(0.5)
-        if daemon_running():
-            print("Daemon ready.")
-            return
-    print(
-        "Daemon failed to start. Run 'stt-daemon' manually to see errors.",
-        file=sys.stderr,
-    )
+    timeout = READY_TIMEOUT
+    reply = daemon_send(f"wait-ready {timeout}", timeout=timeout + 5)
+    if reply == "ready":
+        print("Daemon ready.")
+        return True
+    print(reply or "Daemon exited while loading the model.", file=sys.stderr)
+    return False
 
 
 def cmd_stop():
@@ -51,6 +74,27 @@ def cmd_stop():
     print("Daemon stopped.")
 
 
+def cmd_reload(args) -> bool:
+    """Switch the running daemon to args.model without stopping it."""
+    from stt.client import daemon_running, daemon_send
+    from stt.protocol import encode_request
+
+    if not daemon_running():
+        print("Daemon not running. Start with: stt start", file=sys.stderr)
+        return False
+    options = {"model": args.model}
+    if args.compute_type:
+        options["compute_type"] = args.compute_type
+    print(f"Loading {args.model}...")
+    request = encode_request("reload", **options).decode("utf-8")
+    reply = daemon_send(request, timeout=READY_TIMEOUT)
+    if reply != "ok":
+        print(reply or "Daemon exited during the reload.", file=sys.stderr)
+        return False
+    print(f"Daemon now serving {args.model}.")
+    return True
+
+
 def cmd_status():
     from stt.client import daemon_running
 
@@ -66,22 +110,84 @@ def cmd_status():
         print("Daemon not running. Start with: stt start")
 
 
+def _ms(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.0f}ms"
+
+
+def cmd_stats():
+    import json
+
+    from stt.client import daemon_running, daemon_send
+
+    if not daemon_running():
+        print("Daemon not running.")
+        return
+    stats = json.loads(daemon_send("stats"))
+    load = stats["model_load_seconds"]
+    rtf = stats["real_time_factor"]
+    print(f"uptime:      {stats['uptime']:.0f}s")
+    if stats.get("model"):
+        print(f"model:       {stats['model']}")
+    print(f"model load:  {'-' if load is None else f'{load:.1f}s'}")
+    print(f"in flight:   {stats['in_flight']}")
+    for key in ("requests", "errors", "cancelled"):
+        counts = " ".join(f"{k}={v}" for k, v in sorted(stats.get(key, {}).items())) or "0"
+        print(f"{key + ':':<12} {counts}")
+    print(f"audio:       {stats['audio_seconds']:.1f}s"
+          f" (RTF {'-' if rtf is None else f'{rtf:.3f}'})")
+    if "gated" in stats:
+        print(f"trimmed:     {stats['trimmed_seconds']:.1f}s of silence,"
+              f" {stats['gated']} silent requests skipped")
+    for stage, h in stats["latency"].items():
+        print(f"{stage + ':':<12} n={h['count']} p50={_ms(h['p50'])}"
+              f" p95={_ms(h['p95'])} p99={_ms(h['p99'])}")
+    for priority, h in stats.get("queue_wait", {}).items():
+        print(f"{'wait ' + priority + ':':<12} n={h['count']} p50={_ms(h['p50'])}"
+              f" p95={_ms(h['p95'])} p99={_ms(h['p99'])}")
+    for b in stats.get("backends", ()):
+        state = "up" if b["healthy"] else "DOWN"
+        print(f"backend:     {b['address']} {state} outstanding={b['outstanding']}"
+              f" requests={b['requests']} failures={b['failures']}")
+
+
+def cmd_trace(args):
+    import json
+
+    from stt.trace import chrome_trace, load, waterfall
+
+    spans = load(args.trace_id)
+    if args.chrome:
+        with open(args.chrome, "w") as f:
+            json.dump(chrome_trace(spans), f)
+        print(f"Wrote {len(spans)} spans to {args.chrome}")
+    else:
+        print(waterfall(spans))
+
+
 def ensure_daemon(args):
     from stt.client import daemon_running
 
     if not daemon_running():
         print("Starting daemon...", file=sys.stderr)
-        cmd_start(args)
-        if not daemon_running():
+        if not cmd_start(args):
             sys.exit(1)
 
 
 def main():
-    parser = argparse.ArgumentParser(description="Speech-to-text using faster-whisper")
+    if len(sys.argv) > 1 and sys.argv[1] in SUBCOMMANDS:
+        import importlib
+
+        importlib.import_module(SUBCOMMANDS[sys.argv[1]]).main(sys.argv[2:])
+        return
+
+    parser = argparse.ArgumentParser(
+        description="Speech-to-text using faster-whisper",
+        epilog=f"More commands: {', '.join(SUBCOMMANDS)} (see stt <command> --help)",
+    )
     parser.add_argument(
         "command",
         nargs="?",
-        choices=["start", "stop", "status"],
+        choices=["start", "stop", "status", "stats", "trace", "reload"],
         help="Daemon control commands",
     )
     parser.add_argument(
@@ -90,6 +196,14 @@ def main():
     parser.add_argument(
         "-c", "--continuous", action="store_true", help="Continuous listening mode with VAD"
     )
+    parser.add_argument(
+        "--live", action="store_true",
+        help="With -c -t: type words while speaking, once successive partial decodes agree",
+    )
+    parser.add_argument(
+        "--corrections", action="store_true",
+        help="With --live: backspace and retype words the final decode changed",
+    )
     parser.add_argument(
         "-m", "--model", default="medium.en", help="Whisper model (default: medium.en)"
     )
@@ -103,6 +217,20 @@ def main():
         "-l", "--list-devices", action="store_true", help="List audio input devices"
     )
     parser.add_argument("--cpu", action="store_true", help="Force CPU inference")
+    parser.add_argument(
+        "--compute-type", metavar="TYPE",
+        help="start/reload: CTranslate2 compute type (default: from stt tune)",
+    )
+    parser.add_argument(
+        "--no-wait", action="store_true",
+        help="start: return once the daemon accepts requests, before the model loads",
+    )
+    parser.add_argument(
+        "--trace-id", default=None, help="Trace to show (default: most recent dictation)"
+    )
+    parser.add_argument(
+        "--chrome", metavar="FILE", help="Export the trace as Chrome trace JSON to FILE"
+    )
     args = parser.parse_args()
 
     if args.list_devices:
@@ -112,7 +240,8 @@ def main():
         return
 
     if args.command == "start":
-        cmd_start(args)
+        if not cmd_start(args, wait=not args.no_wait):
+            sys.exit(1)
         return
     if args.command == "stop":
         cmd_stop()
@@ -120,23 +249,52 @@ def main():
     if args.command == "status":
         cmd_status()
         return
+    if args.command == "stats":
+        cmd_stats()
+        return
+    if args.command == "trace":
+        cmd_trace(args)
+        return
+    if args.command == "reload":
+        if not cmd_reload(args):
+            sys.exit(1)
+        return
 
     # Recording modes — lazy import heavy deps
     from stt.audio import continuous_mode, record_until_stop
     from stt.client import save_and_transcribe
-    from stt.output import type_text
+    from stt.config import DICTATION_DECODE
+    from stt.output import type_text, use_x11
 
     ensure_daemon(args)
 
     if args.continuous:
+        on_partial = None
+        if args.type:
+            use_x11()
+        if args.type and args.live:
+            from stt.output import backspace
+            from stt.stabilize import Stabilizer
+
+            stabilizer = Stabilizer(corrections=args.corrections)
+
+            def apply(erase, text):
+                backspace(erase)
+                type_text(text)
+
+            def on_partial(text):
+                apply(*stabilizer.update(text))
 
         def on_segment(text):
-            print(text)
-            sys.stdout.flush()
-            if args.type:
+            if text:
+                print(text)
+                sys.stdout.flush()
+            if on_partial:
+                apply(*stabilizer.finish(text))
+            elif args.type:
                 type_text(text + " ")
 
-        continuous_mode(device_id=args.device, on_segment=on_segment)
+        continuous_mode(device_id=args.device, on_segment=on_segment, on_partial=on_partial)
     else:
         result = record_until_stop(device_id=args.device)
         if result is None:
@@ -144,7 +302,7 @@ def main():
             return
         audio, native_rate = result
         print("Transcribing...", file=sys.stderr)
-        text = save_and_transcribe(audio, native_rate)
+        text = save_and_transcribe(audio, native_rate, DICTATION_DECODE)
         if text:
             print(text)
             if args.type:
@@ -2,7 +2,6 @@
 
 import os
 import socket
-import tempfile
 
 from stt.config import SOCKET_PATH
 from stt.log import setup_logging
@@ -10,10 +9,10 @@ from stt.log import setup_logging
 log = setup_logging("stt.client")
 
 
-def daemon_running() -> bool:
+def daemon_running(socket_path=None) -> bool:
     try:
         s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-        s.connect(SOCKET_PATH)
+        s.connect(socket_path or SOCKET_PATH)
         s.sendall(b"ping")
         resp = s.recv(64)
         s.close()
@@ -22,10 +21,10 @@ def daemon_running() -> bool:
         return False
 
 
-def daemon_send(command: str, timeout: int = 30) -> str:
+def daemon_send(command: str, timeout: int = 30, socket_path=None) -> str:
     s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
     s.settimeout(timeout)
-    s.connect(SOCKET_PATH)
+    s.connect(socket_path or SOCKET_PATH)
     s.sendall(command.encode("utf-8"))
     chunks = []
     while True:
@@ -40,19 +39,27 @@ def daemon_send(command: str, timeout: int = 30) -> str:
     return b"".join(chunks).decode("utf-8")
 
 
-def save_and_transcribe(audio, native_rate: int) -> str:
-    """Save audio to temp WAV, send to daemon, return text."""
+def save_and_transcribe(audio, native_rate: int, options=None) -> str:
+    """Save audio to temp WAV, send to daemon, return text.
+
+    options are decoding options for the daemon (see core.decode_options).
+    """
+    import tempfile
+
     import soundfile as sf
 
+    from stt.protocol import encode_request, transcript_text
+
     with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
         tmp = f.name
     sf.write(tmp, audio, native_rate, subtype="FLOAT")
     try:
         log.debug("sending %s to daemon for transcription", tmp)
-        text = daemon_send(f"transcribe {tmp}")
+        extra = {"decode": options} if options else {}
+        text = daemon_send(encode_request("transcribe", path=tmp, **extra).decode("utf-8"))
         if text.startswith("ERROR:"):
             log.error("transcription error: %s", text)
             return ""
-        return text
+        return transcript_text(text)
     finally:
         os.unlink(tmp)
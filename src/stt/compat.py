@@ -2,7 +2,6 @@
 
 import os
 import sys
-import tempfile
 
 WINDOWS = sys.platform == "win32"
 LINUX = sys.platform == "linux"
@@ -16,4 +15,14 @@ def data_dir():
 
 
 def temp_dir():
-    return tempfile.gettempdir()
+    # Same lookup as tempfile.gettempdir(), without importing tempfile on the
+    # hotkey path (it pulls in shutil, random and friends).
+    for var in ("TMPDIR", "TEMP", "TMP"):
+        path = os.environ.get(var)
+        if path and os.path.isdir(path):
+            return path
+    if WINDOWS:
+        import tempfile
+
+        return tempfile.gettempdir()
+    return "/tmp"
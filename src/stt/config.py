@@ -4,38 +4,66 @@ import os
 
 from stt.compat import WINDOWS, data_dir, temp_dir
 
-# Paths
+# Paths (created on first write, not at import: this module is on the hotkey path)
 _data = data_dir()
-os.makedirs(_data, exist_ok=True)
 
 SOCKET_PATH = os.path.join(_data, "stt.sock")
 PID_PATH = os.path.join(_data, "stt-daemon.pid")
 LOG_DIR = _data
 LOG_PATH = os.path.join(_data, "stt.log")
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUPS = 3
+TRACE_PATH = os.path.join(_data, "trace.jsonl")
+TUNE_PATH = os.path.join(_data, "tune.json")  # written by `stt tune`
+MODELS_DIR = os.path.join(_data, "models")  # the `stt model` store
+
+# Daemon
+READY_TIMEOUT = 600  # seconds clients wait for a starting daemon's model to load
+HEALTH_INTERVAL = 2.0  # seconds between router pings of each backend daemon
+AGING_SECONDS = 30.0  # waiting this long lifts a bulk request to interactive rank
+BULK_CHUNK_SECONDS = 30.0  # bulk audio is decoded in pieces of at most this
+PREP_THREADS = 2  # daemon threads reading and resampling audio ahead of the model
 
 # Audio
 DEFAULT_DEVICE = None if WINDOWS else "pulse"
 CHANNELS = 1
 WHISPER_RATE = 16000
+CAPTURE_RING = 1.0  # seconds of audio an always-open capture stream keeps
+PREROLL = 0.3  # seconds from before the hotkey press included in a recording
 
 # VAD (continuous mode)
 SILENCE_THRESHOLD = 0.01
 SILENCE_DURATION = 1.5
 MIN_AUDIO_DURATION = 0.5
 
+# Conditioning before inference (stt.core.condition)
+SPEECH_THRESHOLD = 0.005  # 20 ms frames quieter than this RMS count as silence
+TRIM_PAD = 0.2  # seconds of silence kept around the speech when trimming
+NORMALIZE_PEAK = 0.9  # peak level of gain-normalized audio
+MAX_GAIN = 10.0  # normalization never amplifies more than this
+
+# Decoding options per caller (see stt.core.decode_options)
+DICTATION_DECODE = {"without_timestamps": True}  # only the text is used
+CONTINUOUS_DECODE = {  # utterances are already cut at silences
+    "vad_filter": False, "without_timestamps": True,
+}
+
 # Toggle paths
 _tmp = temp_dir()
 TOGGLE_LOCK = os.path.join(_tmp, "stt-recording.lock")
 TOGGLE_PIDFILE = os.path.join(_tmp, "stt-recording.pid")
 TOGGLE_WAVPATH = os.path.join(_tmp, "stt-recording-wavpath")
 TOGGLE_WINDOWID = os.path.join(_tmp, "stt-recording-windowid")
+TOGGLE_TRACEID = os.path.join(_tmp, "stt-recording-traceid")
 
 # Sounds
 SND_START = None if WINDOWS else "/usr/share/sounds/freedesktop/stereo/message-new-instant.oga"
 SND_STOP = None if WINDOWS else "/usr/share/sounds/freedesktop/stereo/audio-volume-change.oga"
+CUES = {"start": SND_START, "stop": SND_STOP}
 
 # Notification
 NOTIFY_ID = "9999"
+NOTIFY_MIN_INTERVAL = 0.1  # seconds; faster updates are coalesced
 
 # Windows tray config
 CONFIG_PATH = os.path.join(_data, "config.toml")
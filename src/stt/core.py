@@ -1,31 +1,274 @@
 """Core transcription functions shared by daemon and tray app."""
 
+import time
+
 import numpy as np
 import soundfile as sf
 import soxr
 from faster_whisper import WhisperModel
 
-from stt.config import WHISPER_RATE
+from stt import models
+from stt.config import (
+    MAX_GAIN,
+    NORMALIZE_PEAK,
+    SPEECH_THRESHOLD,
+    TRIM_PAD,
+    TUNE_PATH,
+    WHISPER_RATE,
+)
 from stt.log import setup_logging
 
 log = setup_logging("stt.core")
 
 
-def load_model(model_name, device="cuda"):
-    compute_type = "float16" if device == "cuda" else "int8"
-    log.info("loading model '%s' on %s (%s)", model_name, device, compute_type)
-    model = WhisperModel(model_name, device=device, compute_type=compute_type)
-    log.info("model ready")
+def tune_key(model_name, device) -> str:
+    return f"{model_name}@{device}"
+
+
+def tuned_settings(model_name, device, path=TUNE_PATH) -> dict:
+    """Settings `stt tune` saved for this model and device, or {}."""
+    import json
+
+    try:
+        with open(path) as f:
+            settings = json.load(f).get(tune_key(model_name, device), {})
+    except FileNotFoundError:
+        return {}
+    except (ValueError, AttributeError) as e:
+        log.warning("ignoring unreadable %s: %s", path, e)
+        return {}
+    return settings if isinstance(settings, dict) else {}
+
+
+def load_model(model_name, device="cuda", compute_type=None, cpu_threads=None):
+    """Load a WhisperModel, using `stt tune` results unless overridden.
+
+    Never contacts the Hugging Face hub: model_name is looked up in the
+    `stt model` store, then in the hub cache (see stt.models). A converted
+    checkpoint loads its variant pre-quantized as compute_type, if stored.
+    """
+    tuned = {} if compute_type else tuned_settings(model_name, device)
+    compute_type = (
+        compute_type or tuned.get("compute_type")
+        or ("float16" if device == "cuda" else "int8")
+    )
+    kwargs = {}
+    cpu_threads = cpu_threads or tuned.get("cpu_threads")
+    if cpu_threads:
+        kwargs["cpu_threads"] = int(cpu_threads)
+    log.info(
+        "loading model '%s' on %s (%s%s)", model_name, device, compute_type,
+        f", {cpu_threads} threads" if cpu_threads else "",
+    )
+    t0 = time.monotonic()
+    path = models.resolve(model_name, compute_type)
+    if path is None:
+        kwargs["local_files_only"] = True  # no hub lookup, even to check for updates
+    else:
+        log.info("from %s", path)
+    try:
+        model = WhisperModel(path or model_name, device=device, compute_type=compute_type,
+                             **kwargs)
+    except FileNotFoundError as e:
+        raise FileNotFoundError(
+            f"model '{model_name}' is not on this machine; run: stt model pull {model_name}"
+        ) from e
+    seconds = time.monotonic() - t0
+    models.record_load(model_name, f"{device}/{compute_type}", seconds)
+    log.info("model ready in %.1fs", seconds)
     return model
 
 
-def transcribe_file(model, path):
-    audio, sr = sf.read(path, dtype="float32")
-    if audio.ndim > 1:
-        audio = audio[:, 0]
-    if sr != WHISPER_RATE:
-        audio = soxr.resample(audio, sr, WHISPER_RATE).astype(np.float32)
+def load_audio(source):
+    """Read audio as 16 kHz mono float32. Returns None if too short to transcribe.
+
+    source is a path, a binary file-like object holding audio file data, or
+    an array that is already 16 kHz mono float32.
+    """
+    if isinstance(source, np.ndarray):
+        audio = source
+    else:
+        audio, sr = sf.read(source, dtype="float32")
+        if audio.ndim > 1:
+            audio = audio[:, 0]
+        if sr != WHISPER_RATE:
+            audio = soxr.resample(audio, sr, WHISPER_RATE).astype(np.float32)
     if len(audio) < WHISPER_RATE * 0.3:
-        return ""
-    segments, _ = model.transcribe(audio, beam_size=5, vad_filter=True)
-    return " ".join(seg.text.strip() for seg in segments)
+        return None
+    return audio
+
+
+FRAME = WHISPER_RATE // 50  # 20 ms
+SUSTAIN = (5, 3)  # speech: at least 3 loud frames in any 5 (100 ms)
+
+
+def condition(audio, threshold=SPEECH_THRESHOLD, pad=TRIM_PAD, normalize=False):
+    """Prepare 16 kHz audio for the model. Returns (audio, report).
+
+    Removes any DC offset, then trims leading and trailing silence down to
+    pad seconds. Speech is energy sustained over 100 ms; short transients
+    such as a keypress click are not, and are trimmed off with the silence
+    around them. If no speech is found audio is None, and the model need not
+    run at all. With normalize, the result is scaled to NORMALIZE_PEAK (by
+    at most MAX_GAIN).
+
+    report holds the input duration, the kept span (start, end, in seconds
+    of the input), whether the audio was gated, and the gain applied.
+    """
+    duration = len(audio) / WHISPER_RATE
+    report = {"duration": duration, "start": 0.0, "end": duration, "gated": False,
+              "gain": 1.0}
+    audio = audio - np.float32(audio.mean(dtype=np.float64))
+    frames = len(audio) // FRAME
+    rms = np.sqrt(np.square(audio[:frames * FRAME]).reshape(frames, FRAME).mean(axis=1))
+    loud = rms > threshold
+    window, needed = SUSTAIN
+    sustained = loud & (np.convolve(loud, np.ones(window), "same") >= needed)
+    speech = np.flatnonzero(sustained)
+    if not len(speech):
+        report.update(start=0.0, end=0.0, gated=True)
+        return None, report
+
+    first, last = speech[0], speech[-1] + 1
+    pad = int(pad * WHISPER_RATE)
+    # Keep the padding clear of clicks just before or after the speech
+    clicks = np.flatnonzero(loud[:first])
+    start = max(first * FRAME - pad, (clicks[-1] + 1) * FRAME if len(clicks) else 0)
+    clicks = np.flatnonzero(loud[last:])
+    end = min(last * FRAME + pad, (last + clicks[0]) * FRAME if len(clicks) else len(audio))
+    audio = audio[start:end]
+    report.update(start=start / WHISPER_RATE, end=end / WHISPER_RATE)
+
+    if normalize:
+        peak = float(np.abs(audio).max())
+        gain = min(MAX_GAIN, NORMALIZE_PEAK / peak) if peak else 1.0
+        audio = audio * np.float32(gain)
+        report["gain"] = gain
+    return audio, report
+
+
+def load_conditioned(source, normalize=False):
+    """load_audio, then condition. Returns (audio, report); audio may be None.
+
+    report is None if the audio was too short to condition at all.
+    """
+    audio = load_audio(source)
+    if audio is None:
+        return None, None
+    audio, report = condition(audio, normalize=normalize)
+    if audio is not None and len(audio) < WHISPER_RATE * 0.3:
+        audio = None
+        report["gated"] = True
+    return audio, report
+
+
+DEFAULT_OPTIONS = {"beam_size": 5, "vad_filter": True}
+OPTION_TYPES = {
+    "beam_size": int,
+    "vad_filter": bool,
+    "vad_parameters": dict,
+    "language": str,
+    "task": str,
+    "without_timestamps": bool,
+    "condition_on_previous_text": bool,
+    "initial_prompt": str,
+    "clip_timestamps": (str, list),
+}
+TASKS = ("transcribe", "translate")
+
+
+def decode_options(options=None) -> dict:
+    """Validate per-request decoding options; returns them over DEFAULT_OPTIONS.
+
+    Keys are WhisperModel.transcribe arguments from OPTION_TYPES. Raises
+    ValueError for unknown keys or values of the wrong type.
+    """
+    if options is not None and not isinstance(options, dict):
+        raise ValueError("decoding options must be an object")
+    merged = dict(DEFAULT_OPTIONS)
+    for key, value in (options or {}).items():
+        kind = OPTION_TYPES.get(key)
+        if kind is None:
+            raise ValueError(f"unknown decoding option {key!r}")
+        if not isinstance(value, kind) or (kind is int and isinstance(value, bool)):
+            raise ValueError(f"bad value for decoding option {key!r}: {value!r}")
+        merged[key] = value
+    if merged["beam_size"] < 1:
+        raise ValueError("beam_size must be at least 1")
+    if merged.get("task", "transcribe") not in TASKS:
+        raise ValueError(f"task must be {' or '.join(TASKS)}")
+    return merged
+
+
+def transcribe_audio(model, audio, options=None):
+    """Return (segments, info) for 16 kHz float32 audio; segments decode lazily.
+
+    options are per-request decoding options (see decode_options).
+    """
+    return model.transcribe(audio, **decode_options(options))
+
+
+def warm_up(model, seconds=1.0):
+    """Run one small decode so the first real request doesn't pay for lazy setup."""
+    audio = (np.random.default_rng(0).standard_normal(int(WHISPER_RATE * seconds)) * 0.01)
+    options = {"beam_size": 1, "vad_filter": False, "without_timestamps": True}
+    segments, _ = transcribe_audio(model, audio.astype(np.float32), options)
+    for _ in segments:
+        pass
+
+
+class Cancelled(Exception):
+    """A request was cancelled or passed its deadline before it finished."""
+
+
+def decode_timed(model, source, on_segment=None, cancel=None, options=None):
+    """Decode source completely, timing each stage (for the daemon).
+
+    Returns (segments, info, stamps). stamps holds time.monotonic() readings
+    (started, decoding, finished) and the audio duration in seconds, which is
+    0 if the audio was too short to transcribe. on_segment(text) is called as
+    each segment is decoded.
+
+    cancel is an object with is_set() (a threading or multiprocessing Event),
+    checked before decoding starts and after each segment. Once it is set the
+    segment generator is closed, which stops the model, and Cancelled is raised.
+    options are per-request decoding options (see decode_options).
+    """
+
+    def check():
+        if cancel is not None and cancel.is_set():
+            raise Cancelled(getattr(cancel, "reason", "cancelled"))
+
+    started = time.monotonic()
+    check()
+    audio = load_audio(source)
+    decoding = time.monotonic()
+    if audio is None:
+        return [], None, (started, decoding, decoding, 0.0)
+    check()
+    segments, info = transcribe_audio(model, audio, options)
+    done = []
+    try:
+        for seg in segments:
+            done.append(seg)
+            if on_segment:
+                on_segment(seg.text.strip())
+            check()
+    finally:
+        if hasattr(segments, "close"):
+            segments.close()
+    return done, info, (started, decoding, time.monotonic(), len(audio) / WHISPER_RATE)
+
+
+def iter_segments(model, source, options=None):
+    """Yield segment texts as the model decodes them; none for silent audio."""
+    audio, _ = load_conditioned(source)
+    if audio is None:
+        return
+    segments, _ = transcribe_audio(model, audio, options)
+    for seg in segments:
+        yield seg.text.strip()
+
+
+def transcribe_file(model, path, options=None):
+    return " ".join(iter_segments(model, path, options))
@@ -0,0 +1,69 @@
+"""Start/stop beeps played from memory through an output stream kept open.
+
+Long-lived processes decode the cue files once and keep a sounddevice output
+stream running, so a cue starts within one audio block instead of after a
+paplay fork, decode and stream setup.
+"""
+
+import threading
+
+import numpy as np
+import soundfile as sf
+import soxr
+
+
+def load_cue(path, rate) -> np.ndarray:
+    """Decode a sound file to mono float32 at rate."""
+    audio, native = sf.read(path, dtype="float32", always_2d=True)
+    audio = audio.mean(axis=1)
+    if native != rate:
+        audio = soxr.resample(audio, native, rate)
+    return np.ascontiguousarray(audio, dtype=np.float32)
+
+
+class CuePlayer:
+    """Plays named cues; a new play() cuts off the one in progress."""
+
+    def __init__(self, cues, device=None):
+        import sounddevice as sd
+
+        self.rate = int(sd.query_devices(device, "output")["default_samplerate"])
+        self.cues = {
+            name: load_cue(path, self.rate) for name, path in cues.items() if path
+        }
+        self.lock = threading.Lock()
+        self.playing = None
+        self.pos = 0
+        self.stream = sd.OutputStream(
+            samplerate=self.rate, channels=1, dtype="float32", device=device,
+            latency="low", callback=self._callback,
+        )
+        self.stream.start()
+
+    def play(self, name) -> bool:
+        """Start cue name; False if it is not loaded."""
+        audio = self.cues.get(name)
+        if audio is None:
+            return False
+        with self.lock:
+            self.playing = audio
+            self.pos = 0
+        return True
+
+    def _callback(self, outdata, frames, time_info, status):
+        with self.lock:
+            audio, pos = self.playing, self.pos
+            if audio is not None:
+                self.pos = pos + frames
+                if self.pos >= len(audio):
+                    self.playing = None
+        if audio is None:
+            outdata.fill(0)
+            return
+        chunk = audio[pos:pos + frames]
+        outdata[:len(chunk), 0] = chunk
+        outdata[len(chunk):] = 0
+
+    def close(self):
+        self.stream.stop()
+        self.stream.close()
@@ -2,63 +2,726 @@
 
 Listens on a unix socket. Commands:
   - "transcribe <path>"  → transcribe a WAV file, return text
+  - "stream <path>"      → transcribe, sending one line per segment as decoded
   - "ping"               → respond "pong"
+  - "stats"              → JSON counters, gauges and latency percentiles
+  - "cue <name>"         → play the start/stop beep from memory (for stt-toggle)
+  - "record-start [secs]" → start recording from the open microphone
+                            (--capture), including secs of earlier audio
+  - "record-stop <path>"  → stop recording, write it to path as WAV
+  - "wait-ready [secs]"  → reply "ready" once the model has loaded
+  - "cancel <id>"        → cancel the transcription sent with that "id"
+  - "reload <model>"     → load another model (or {"model": ..., "compute_type":
+                           ...}) while the current one serves, then switch
   - "shutdown"           → exit daemon
+
+The argument may also be a JSON object, which lets clients send audio inline
+instead of by path (see stt.protocol). With --listen HOST:PORT the same
+protocol is also served over TCP, and with --route the process is a router
+in front of other daemons instead (see stt.router). With --http PORT the daemon also serves
+an OpenAI-compatible /v1/audio/transcriptions endpoint and Prometheus
+metrics at /metrics (see stt.httpapi).
+
+The network layer runs on asyncio so idle connections cost almost nothing;
+inference runs on executor workers so the event loop never waits on the model,
+or with --procs N on worker processes holding one model replica each (see
+stt.workers). Audio is read, resampled to 16 kHz and conditioned (silence
+trimmed, silent audio gated; see core.condition) on a separate pool of
+PREP_THREADS threads as soon as a request arrives, so the next request's audio
+is ready by the time a model worker frees up. Segment timestamps still refer
+to the untrimmed audio.
+The socket is bound before the model loads; requests that arrive meanwhile
+wait for it instead of being refused. A request may carry "priority":
+"interactive" (the default) or "bulk"; interactive requests get the next free
+worker first (see stt.scheduler).
+
+A transcription may carry "decode", an object of per-request decoding options
+(beam_size, vad_filter, language, ...; see core.decode_options). It may also
+carry an "id", which the cancel command refers to,
+and a "deadline" in seconds from its arrival. A request that is cancelled,
+passes its deadline or whose client disconnects is dropped if still queued,
+and otherwise stops at the next segment boundary, freeing its worker.
 """
 
 import argparse
+import asyncio
+import copy
+import functools
+import io
+import json
 import os
 import signal
 import socket
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-from stt.config import PID_PATH, SOCKET_PATH
-from stt.core import load_model, transcribe_file
+from stt.config import (
+    BULK_CHUNK_SECONDS,
+    DEFAULT_DEVICE,
+    PID_PATH,
+    PREP_THREADS,
+    PREROLL,
+    SOCKET_PATH,
+    WHISPER_RATE,
+)
+from stt.core import (
+    Cancelled,
+    decode_options,
+    decode_timed,
+    load_audio,
+    load_conditioned,
+    load_model,
+    warm_up,
+)
 from stt.log import setup_logging
+from stt.metrics import Metrics
+from stt.protocol import EMPTY_TRANSCRIPT, MAX_HEADER, parse_address, parse_request
+from stt.scheduler import (
+    BULK,
+    CancelToken,
+    Scheduler,
+    check_priority,
+    chunk_bounds,
+    unless_cancelled,
+)
+from stt.trace import record
 
 log = setup_logging("stt.daemon")
 
 
-def handle_client(conn, model) -> bool:
-    """Handle one client connection. Returns False to shut down."""
-    try:
-        data = conn.recv(4096).decode("utf-8").strip()
-        if not data:
-            return True
-
-        if data == "ping":
-            conn.sendall(b"pong")
-        elif data == "shutdown":
-            conn.sendall(b"ok")
-            log.info("shutdown requested")
+class Daemon:
+    """Serves transcription requests for one loaded model."""
+
+    def __init__(self, model=None, workers=1, metrics=None):
+        self.model = model
+        self.model_name = None
+        self.loader = None
+        self.reloading = asyncio.Lock()
+        self.metrics = metrics or Metrics()
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="stt-infer"
+        )
+        self.prep = ThreadPoolExecutor(
+            max_workers=PREP_THREADS, thread_name_prefix="stt-prep"
+        )
+        self.scheduler = Scheduler(workers)
+        self.stopping = asyncio.Event()
+        self.ready = asyncio.Event()
+        self.load_error = None
+        if model is not None:
+            self.ready.set()
+        self.servers = []
+        self.clients = set()
+        self.requests = {}
+        self.pool = None
+        self.cues = None
+        self.capture = None
+        self.preroll = PREROLL
+        self.condition = True
+        self.normalize = False
+
+    async def start(self, address):
+        """Serve on a unix socket path, or TCP for a (host, port) pair."""
+        if isinstance(address, tuple):
+            server = await asyncio.start_server(self.handle_client, *address, backlog=128)
+        else:
+            server = await asyncio.start_unix_server(
+                self.handle_client, path=address, backlog=128
+            )
+        self.servers.append(server)
+
+    async def serve_until_stopped(self):
+        await self.stopping.wait()
+        for server in self.servers:
+            server.close()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.prep.shutdown(wait=False, cancel_futures=True)
+        if self.pool is not None:
+            self.pool.close()
+
+    def stop(self):
+        self.stopping.set()
+
+    def set_model(self, model):
+        """Install the loaded model and release requests waiting for it."""
+        self.model = model
+        self.ready.set()
+
+    def set_pool(self, pool):
+        """Serve from a WorkerPool of model replicas instead of self.model."""
+        self.pool = pool
+        self.scheduler = Scheduler(len(pool.workers))
+        self.ready.set()
+
+    def fail_load(self, error):
+        """Record that loading failed; waiting requests get the error."""
+        self.load_error = error
+        self.ready.set()
+
+    async def reload(self, model_name, compute_type=None):
+        """Load model_name beside the current model, then switch to it.
+
+        self.loader(model_name, compute_type) builds and warms up the new
+        (model, pool) on a background thread while the current one keeps
+        serving. Requests already decoding finish on the old model, which is
+        freed once they have. If loading fails nothing changes, and the
+        error is raised.
+        """
+        if self.loader is None:
+            raise RuntimeError("reload unavailable")
+        if not self.ready.is_set() or self.load_error is not None:
+            raise RuntimeError("the current model has not loaded")
+        if self.reloading.locked():
+            raise RuntimeError("a reload is already in progress")
+        async with self.reloading:
+            log.info("loading %s to replace %s", model_name, self.model_name)
+            t0 = time.monotonic()
+            model, pool = await _in_thread(self.loader, model_name, compute_type)
+            old_pool = self.pool
+            self.model, self.pool = model, pool
+            self.model_name = model_name
+            self.metrics.model_load_seconds = time.monotonic() - t0
+            if old_pool is not None:
+                old_pool.retire()
+        log.info("switched to %s after %.1fs", model_name, self.metrics.model_load_seconds)
+
+    async def wait_ready(self, timeout=None) -> bool:
+        """Wait for the model. False on timeout; raises if loading failed."""
+        try:
+            await asyncio.wait_for(self.ready.wait(), timeout)
+        except asyncio.TimeoutError:
             return False
-        elif data.startswith("transcribe "):
-            path = data[len("transcribe "):]
-            log.debug("transcribing %s", path)
+        if self.load_error is not None:
+            raise RuntimeError(f"model failed to load: {self.load_error}")
+        return True
+
+    async def drain(self, timeout):
+        """Give connected clients up to timeout seconds to finish."""
+        pending = self.clients - {asyncio.current_task()}
+        if pending:
+            await asyncio.wait(pending, timeout=timeout)
+
+    def run(self, fn, *args):
+        """Run fn(model, *args) on an inference worker; returns an awaitable."""
+        loop = asyncio.get_running_loop()
+        return loop.run_in_executor(self.executor, fn, self.model, *args)
+
+    async def decode(self, source, kind, on_segment=None, trace=None, priority=None,
+                     cancel=None, options=None):
+        """Transcribe on a worker. Returns (segments, info); info may be None.
+
+        on_segment(text) is called from the worker thread as each segment is
+        decoded. Stage timings and counts are recorded in self.metrics, and as
+        spans under trace if the request carried a trace ID. Bulk requests are
+        decoded in chunks that each wait for a free worker. Raises Cancelled if
+        the CancelToken cancel is set first. options are decoding options;
+        with clip_timestamps the audio is neither trimmed nor chunked, since
+        the clips refer to the whole file.
+        """
+        accepted = time.monotonic()
+        accepted_wall = time.time()
+        self.metrics.begin(kind)
+        try:
+            priority = check_priority(priority)
+            decode_options(options)  # reject bad options before any work
+            clipped = bool(options and "clip_timestamps" in options)
+            if not self.ready.is_set():
+                log.debug("%s queued until the model is loaded", kind)
+            prep = time.monotonic()
+            audio, report = await unless_cancelled(
+                self._prepare(source, trim=not clipped), cancel
+            )
+            prepared = time.monotonic()
+            self._record_conditioning(report)
+            if audio is None:
+                self._record_stages(accepted, (prep, prepared), None, 0.0, trace, report)
+                return [], None
+            await unless_cancelled(self.wait_ready(), cancel)
+            if priority == BULK and not clipped:
+                segments, info, stamps = await self._decode_chunked(
+                    audio, on_segment, cancel, options
+                )
+            else:
+                async with self.scheduler.slot(
+                    priority, self.metrics.observe_wait, cancel
+                ):
+                    segments, info, stamps = await self._decode_timed(
+                        audio, on_segment, cancel, options
+                    )
+            self._record_stages(
+                accepted, (prep, prepared), stamps[1:3], stamps[3], trace, report
+            )
+            return _untrimmed(segments, info, report)
+        except Cancelled as e:
+            log.info("%s stopped: %s", kind, e)
+            self.metrics.cancel(kind)
+            raise
+        except Exception:
+            self.metrics.error(kind)
+            raise
+        finally:
+            total = time.monotonic() - accepted
+            self.metrics.end(total)
+            record(trace, "daemon.total", accepted_wall, total, kind=kind)
+
+    def _prepare(self, source, trim=True):
+        """Read and condition source on the preprocessing pool.
+
+        Resolves to (audio, report) as from core.load_conditioned; audio is
+        None if there is nothing to transcribe.
+        """
+        loop = asyncio.get_running_loop()
+        if not (self.condition and trim):
+            return loop.run_in_executor(self.prep, lambda: (load_audio(source), None))
+        return loop.run_in_executor(self.prep, load_conditioned, source, self.normalize)
+
+    def _record_conditioning(self, report):
+        if report is None:
+            return
+        self.metrics.add_conditioning(report)
+        log.debug(
+            "kept %.2f-%.2fs of %.2fs%s", report["start"], report["end"],
+            report["duration"], " (gated)" if report["gated"] else "",
+            extra={"conditioning": report},
+        )
+
+    async def _decode_timed(self, audio, on_segment, cancel=None, options=None):
+        if self.pool is not None:
+            return await self.pool.decode(audio, on_segment, cancel, options)
+        try:
+            return await self.run(decode_timed, audio, on_segment, cancel, options)
+        except Cancelled:
+            raise Cancelled(cancel.reason) from None
+
+    async def _decode_chunked(self, audio, on_segment, cancel=None, options=None):
+        """Decode in BULK_CHUNK_SECONDS pieces, letting other work in between.
+
+        Returns (segments, info, stamps) like core.decode_timed; the
+        inference time in stamps is the sum of the chunks' decode times,
+        not counting waits between them.
+        """
+        segments, info, inference, first = [], None, 0.0, None
+        for start, end in chunk_bounds(audio, BULK_CHUNK_SECONDS):
+            async with self.scheduler.slot(BULK, self.metrics.observe_wait, cancel):
+                part, part_info, stamps = await self._decode_timed(
+                    audio[start:end], on_segment, cancel, options
+                )
+            first = first or stamps[1]
+            inference += stamps[2] - stamps[1]
+            segments += [_shifted(seg, start / WHISPER_RATE) for seg in part]
+            info = info or part_info
+        audio_seconds = len(audio) / WHISPER_RATE
+        if info is not None:
+            info = copy.copy(info)
+            info.duration = audio_seconds
+        return segments, info, (first, first, first + inference, audio_seconds)
+
+    def _record_stages(self, accepted, prep, inference, audio_seconds, trace, report=None):
+        """Record stage times from monotonic (start, end) pairs.
+
+        prep covers reading, resampling and conditioning (whose report is
+        attached to the trace span); inference is None if there was nothing
+        to transcribe. Queue wait is the rest of the time before inference
+        started.
+        """
+        def span(name, t0, t1, **attrs):
+            record(trace, name, time.time() - (time.monotonic() - t0), t1 - t0, **attrs)
+
+        preprocess = prep[1] - prep[0]
+        self.metrics.observe("preprocess", preprocess)
+        span("daemon.preprocess", *prep, **({"conditioning": report} if report else {}))
+        started = inference[0] if inference else prep[1]
+        self.metrics.observe("queue_wait", started - accepted - preprocess)
+        span("daemon.queue_wait", prep[1], started)
+        if inference is None:
+            return  # too short to transcribe
+        seconds = inference[1] - inference[0]
+        self.metrics.observe("inference", seconds)
+        self.metrics.add_audio(audio_seconds, seconds)
+        span("daemon.inference", *inference)
+        log.debug(
+            "decoded %.1fs of audio in %.3fs", audio_seconds, inference[1] - accepted,
+            extra={"timings": {
+                "queue_wait": started - accepted - preprocess,
+                "preprocess": preprocess,
+                "inference": seconds,
+            }},
+        )
+
+    async def handle_client(self, reader, writer):
+        """Handle one client connection."""
+        self.clients.add(asyncio.current_task())
+        try:
+            raw = await reader.read(MAX_HEADER)
+            if not raw.strip():
+                return
+            verb, args, payload = parse_request(raw)
+
+            if verb == "ping":
+                writer.write(b"pong")
+            elif verb == "stats":
+                stats = self.metrics.snapshot()
+                stats["model_ready"] = self.ready.is_set() and self.load_error is None
+                stats["model"] = self.model_name
+                if self.pool is not None:
+                    stats["workers"] = len(self.pool.workers)
+                writer.write(json.dumps(stats).encode("utf-8"))
+            elif verb == "wait-ready":
+                writer.write(await self._wait_ready_reply(args.get("path")))
+            elif verb == "cue":
+                if self.cues and self.cues.play(args.get("path")):
+                    writer.write(b"ok")
+                else:
+                    writer.write(b"ERROR: cue unavailable")
+            elif verb in ("record-start", "record-stop"):
+                writer.write(await self._record(verb, args.get("path")))
+            elif verb == "cancel":
+                cancel = self.requests.get(args.get("path"))
+                if cancel is None:
+                    writer.write(b"ERROR: no such request")
+                else:
+                    cancel.cancel()
+                    writer.write(b"ok")
+            elif verb == "reload":
+                writer.write(await self._reload_reply(args))
+            elif verb == "shutdown":
+                writer.write(b"ok")
+                log.info("shutdown requested")
+                self.stop()
+            elif verb in ("transcribe", "stream"):
+                source = await self._read_source(reader, args, payload)
+                log.debug("%s %s", verb, args.get("path", f"<{args.get('size')} bytes>"))
+                await self._serve_request(verb, reader, writer, source, args)
+            else:
+                writer.write(b"ERROR: unknown command")
+            await writer.drain()
+        except Exception as e:
+            log.error("client error: %s", e)
+        finally:
+            self.clients.discard(asyncio.current_task())
+            writer.close()
             try:
-                text = transcribe_file(model, path)
-                conn.sendall(text.encode("utf-8"))
-                log.debug("result: %s", text[:80] if text else "(empty)")
-            except Exception as e:
-                log.error("transcription failed: %s", e)
-                conn.sendall(f"ERROR: {e}".encode("utf-8"))
-        else:
-            conn.sendall(b"ERROR: unknown command")
-    except Exception as e:
-        log.error("client error: %s", e)
-    finally:
-        conn.close()
-    return True
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+    async def _serve_request(self, verb, reader, writer, source, args):
+        """Run one transcription, cancellable by ID, deadline or disconnect."""
+        try:
+            deadline = float(args["deadline"]) if "deadline" in args else None
+        except (TypeError, ValueError):
+            writer.write(b"ERROR: deadline must be a number of seconds")
+            return
+        cancel = CancelToken(deadline)
+        request_id = args.get("id")
+        if request_id is not None:
+            self.requests[request_id] = cancel
+        watch = asyncio.create_task(_watch_disconnect(reader, cancel))
+        kwargs = {
+            "trace": args.get("trace"), "priority": args.get("priority"), "cancel": cancel,
+            "options": args.get("decode"),
+        }
+        try:
+            if verb == "stream":
+                await self._stream(writer, source, **kwargs)
+            else:
+                await self._transcribe(writer, source, **kwargs)
+        finally:
+            watch.cancel()
+            if request_id is not None and self.requests.get(request_id) is cancel:
+                del self.requests[request_id]
+
+    async def _wait_ready_reply(self, timeout) -> bytes:
+        try:
+            timeout = float(timeout) if timeout else None
+            if await self.wait_ready(timeout):
+                return b"ready"
+            return f"ERROR: not ready after {timeout:g}s".encode("utf-8")
+        except (ValueError, RuntimeError) as e:
+            return f"ERROR: {e}".encode("utf-8")
+
+    async def _reload_reply(self, args) -> bytes:
+        name = args.get("model") or args.get("path")
+        if not name:
+            return b"ERROR: reload needs a model name"
+        try:
+            await self.reload(name, args.get("compute_type"))
+        except Exception as e:
+            log.error("reload failed, still serving %s: %s", self.model_name, e)
+            return f"ERROR: {e}".encode("utf-8")
+        return b"ok"
+
+    async def _record(self, verb, arg) -> bytes:
+        if self.capture is None:
+            return b"ERROR: capture unavailable"
+        try:
+            if verb == "record-start":
+                self.capture.start(float(arg) if arg else self.preroll)
+                return b"ok"
+            if not arg:
+                return b"ERROR: record-stop needs a path"
+            if not await asyncio.to_thread(self.capture.stop_to_file, arg):
+                return b"ERROR: no audio recorded"
+            return b"ok"
+        except (ValueError, OSError) as e:
+            return f"ERROR: {e}".encode("utf-8")
+
+    async def _read_source(self, reader, args, payload):
+        """Return a path or file-like object for the request's audio."""
+        if "size" in args:
+            size = int(args["size"])
+            if len(payload) < size:
+                payload += await reader.readexactly(size - len(payload))
+            return io.BytesIO(payload[:size])
+        if "path" not in args:
+            raise ValueError("request has no path or audio data")
+        return args["path"]
+
+    async def _transcribe(self, writer, source, trace=None, priority=None, cancel=None,
+                          options=None):
+        try:
+            segments, _ = await self.decode(
+                source, "transcribe", trace=trace, priority=priority, cancel=cancel,
+                options=options,
+            )
+            text = " ".join(seg.text.strip() for seg in segments)
+            writer.write(text.encode("utf-8") if text else EMPTY_TRANSCRIPT)
+            log.debug("result: %s", text[:80] if text else "(empty)")
+        except Cancelled as e:
+            writer.write(f"ERROR: {e}".encode("utf-8"))
+        except Exception as e:
+            log.error("transcription failed: %s", e)
+            writer.write(f"ERROR: {e}".encode("utf-8"))
+
+    async def _stream(self, writer, source, trace=None, priority=None, cancel=None,
+                      options=None):
+        """Send each segment as its own line as soon as it is decoded."""
+        loop = asyncio.get_running_loop()
+        segments = asyncio.Queue()
 
+        def on_segment(text):
+            loop.call_soon_threadsafe(segments.put_nowait, text)
 
-def cleanup(*_):
-    for path in (SOCKET_PATH, PID_PATH):
+        fut = asyncio.ensure_future(
+            self.decode(source, "stream", on_segment, trace, priority, cancel, options)
+        )
+        fut.add_done_callback(lambda _: segments.put_nowait(None))
+        sent = False
+        try:
+            while (text := await segments.get()) is not None:
+                writer.write(text.replace("\n", " ").encode("utf-8") + b"\n")
+                await writer.drain()
+                sent = True
+        except OSError:
+            if cancel is not None:
+                cancel.cancel("client disconnected")
+            await asyncio.gather(fut, return_exceptions=True)
+            raise
+        try:
+            await fut
+            if not sent:
+                writer.write(EMPTY_TRANSCRIPT)
+        except Cancelled as e:
+            writer.write(f"ERROR: {e}\n".encode("utf-8"))
+        except Exception as e:
+            log.error("transcription failed: %s", e)
+            writer.write(f"ERROR: {e}\n".encode("utf-8"))
+
+
+async def _watch_disconnect(reader, cancel):
+    """Cancel once the client closes its end of the connection."""
+    try:
+        while await reader.read(4096):
+            pass
+    except OSError:
+        pass
+    cancel.cancel("client disconnected")
+
+
+def _pid_path(socket_path):
+    return PID_PATH if socket_path == SOCKET_PATH else socket_path + ".pid"
+
+
+def _untrimmed(segments, info, report):
+    """Map segments and info from conditioned audio back to the original."""
+    if report is None:
+        return segments, info
+    segments = [_shifted(seg, report["start"]) for seg in segments]
+    if info is not None:
+        info = copy.copy(info)
+        info.duration = report["duration"]
+    return segments, info
+
+
+def _shifted(seg, offset):
+    """Copy of a segment with its timestamps moved offset seconds later."""
+    if not offset:
+        return seg
+    seg = copy.copy(seg)
+    seg.start += offset
+    seg.end += offset
+    return seg
+
+
+def cleanup(code=0, socket_path=SOCKET_PATH):
+    for path in (socket_path, _pid_path(socket_path)):
         try:
             os.unlink(path)
         except FileNotFoundError:
             pass
     log.info("cleaned up, exiting")
-    sys.exit(0)
+    sys.exit(code)
+
+
+def _load_cues(daemon):
+    from stt.config import CUES
+
+    try:
+        from stt.cues import CuePlayer
+
+        daemon.cues = CuePlayer(CUES)
+    except Exception as e:
+        log.info("cues unavailable, clients will use paplay: %s", e)
+
+
+def _load_capture(daemon):
+    try:
+        from stt.audio import resolve_device
+        from stt.capture import Capture
+
+        daemon.capture = Capture(resolve_device(DEFAULT_DEVICE))
+        log.info("capture stream open at %d Hz", daemon.capture.rate)
+    except Exception as e:
+        log.info("capture unavailable, clients will run stt-record: %s", e)
+
+
+async def _listen(server, args):
+    """Bind the unix socket (and --listen address) and write the PID file."""
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, server.stop)
+
+    await server.start(args.socket)
+    if args.listen:
+        await server.start(parse_address(args.listen))
+        log.info("listening on TCP %s", args.listen)
+    with open(_pid_path(args.socket), "w") as f:
+        f.write(str(os.getpid()))
+    log.info("listening on %s (PID %d)", args.socket, os.getpid())
+
+
+async def _route(router, args):
+    await _listen(router, args)
+    log.info("routing to %s", ", ".join(b.label for b in router.backends))
+    await router.serve_until_stopped()
+
+
+async def _serve(daemon, args):
+    await _listen(daemon, args)
+    if args.http:
+        from stt.httpapi import HTTPServer
+
+        http = HTTPServer(daemon, concurrency=args.http_concurrency)
+        daemon.servers.append(await http.start(args.http_host, args.http))
+        log.info("serving HTTP on %s:%d", args.http_host, args.http)
+
+    if not args.no_cues:
+        threading.Thread(target=_load_cues, args=(daemon,), daemon=True).start()
+    if args.capture:
+        daemon.preroll = args.preroll
+        threading.Thread(target=_load_capture, args=(daemon,), daemon=True).start()
+    daemon.condition = not args.no_condition
+    daemon.normalize = args.normalize
+    daemon.model_name = args.model
+    daemon.loader = functools.partial(_load_replacement, args)
+    loading = asyncio.create_task(_load(daemon, args))
+    await daemon.serve_until_stopped()
+    loading.cancel()
+
+
+def _make_model(args, cpu_threads=None, warm=False):
+    if args.fake_rtf is not None:
+        from stt.fake import FakeModel
+
+        log.info("serving fake model (rtf=%g)", args.fake_rtf)
+        model = FakeModel(rtf=args.fake_rtf)
+    else:
+        model = load_model(
+            args.model, device="cpu" if args.cpu else "cuda",
+            compute_type=getattr(args, "compute_type", None), cpu_threads=cpu_threads,
+        )
+    if warm:
+        warm_up(model)
+    return model
+
+
+def _start_pool(args, warm=False):
+    from stt.workers import WorkerPool
+
+    pool = WorkerPool(args.procs, functools.partial(_make_model, args, warm=warm))
+    pool.wait_ready()
+    return pool
+
+
+def _load_replacement(args, model_name, compute_type=None):
+    """Blocking: build and warm up the (model, pool) for a reload.
+
+    A request without a compute type keeps the one the daemon runs with.
+    """
+    compute_type = compute_type or getattr(args, "compute_type", None)
+    args = argparse.Namespace(**{**vars(args), "model": model_name, "compute_type": compute_type})
+    if args.procs:
+        return None, _start_pool(args, warm=True)
+    return _make_model(args, warm=True), None
+
+
+def _in_thread(fn, *args):
+    """Run fn on a daemon thread, so a shutdown mid-load need not wait for it."""
+    loop = asyncio.get_running_loop()
+    fut = loop.create_future()
+
+    def settle(method, value):
+        if not fut.done():
+            method(value)
+
+    def target():
+        try:
+            result = fn(*args)
+        except Exception as e:
+            outcome = (fut.set_exception, e)
+        else:
+            outcome = (fut.set_result, result)
+        try:
+            loop.call_soon_threadsafe(settle, *outcome)
+        except RuntimeError:
+            pass  # loop already closed
+
+    threading.Thread(target=target, name="stt-load", daemon=True).start()
+    return fut
+
+
+async def _load(daemon, args):
+    """Load the model off the event loop while requests queue up."""
+    t0 = time.monotonic()
+    try:
+        if args.procs:
+            pool = await _in_thread(_start_pool, args)
+        else:
+            model = await _in_thread(_make_model, args)
+    except Exception as e:
+        log.error("model failed to load: %s", e)
+        daemon.fail_load(e)
+        await daemon.drain(timeout=1.0)
+        daemon.stop()
+        return
+    daemon.metrics.model_load_seconds = time.monotonic() - t0
+    if args.procs:
+        daemon.set_pool(pool)
+    else:
+        daemon.set_model(model)
+    log.info("model ready after %.1fs", daemon.metrics.model_load_seconds)
 
 
 def main():
@@ -67,16 +730,81 @@ def main():
         "-m", "--model", default="medium.en", help="Whisper model (default: medium.en)"
     )
     parser.add_argument("--cpu", action="store_true", help="Force CPU inference")
+    parser.add_argument(
+        "--compute-type", metavar="TYPE",
+        help="CTranslate2 compute type (default: from stt tune, else float16/int8)",
+    )
+    parser.add_argument(
+        "--procs", type=int, metavar="N",
+        help="With --cpu: decode in N worker processes, each with its own model "
+             "replica pinned to a share of the cores",
+    )
+    parser.add_argument(
+        "--fake-rtf", type=float, metavar="RTF",
+        help="Serve a fake model taking RTF seconds per audio second (load testing)",
+    )
+    parser.add_argument(
+        "--http", type=int, metavar="PORT",
+        help="Also serve the OpenAI-compatible transcription API on PORT",
+    )
+    parser.add_argument(
+        "--http-host", default="127.0.0.1", help="HTTP bind address (default: 127.0.0.1)"
+    )
+    parser.add_argument(
+        "--http-concurrency", type=int, default=2,
+        help="Max HTTP requests decoding at once (default: 2)",
+    )
+    parser.add_argument(
+        "--no-cues", action="store_true",
+        help="Don't keep an audio output open for stt-toggle's beeps",
+    )
+    parser.add_argument(
+        "--capture", action="store_true",
+        help="Keep the microphone open so stt-toggle recordings start instantly",
+    )
+    parser.add_argument(
+        "--preroll", type=float, default=PREROLL, metavar="SECS",
+        help=f"With --capture, audio from before the hotkey to keep (default: {PREROLL})",
+    )
+    parser.add_argument(
+        "--no-condition", action="store_true",
+        help="Send audio to the model as-is, without trimming silence or gating",
+    )
+    parser.add_argument(
+        "--normalize", action="store_true",
+        help="Scale each request's audio to a common peak level before inference",
+    )
+    parser.add_argument(
+        "--socket", default=SOCKET_PATH, metavar="PATH",
+        help="Unix socket to serve on (default: the one clients use)",
+    )
+    parser.add_argument(
+        "--listen", metavar="HOST:PORT",
+        help="Also serve the protocol over TCP (no authentication: trusted networks only)",
+    )
+    parser.add_argument(
+        "--route", action="append", metavar="ADDRESS",
+        help="Run as a router forwarding to this backend daemon (HOST:PORT or "
+             "socket path); repeat for each backend. No model is loaded.",
+    )
     args = parser.parse_args()
+    if args.procs and not args.cpu and args.fake_rtf is None:
+        parser.error("--procs needs --cpu (one GPU is shared better by one process)")
+    try:
+        backends = [parse_address(a) for a in args.route or ()]
+        if args.listen and not isinstance(parse_address(args.listen), tuple):
+            raise ValueError(f"--listen needs HOST:PORT, got {args.listen!r}")
+    except ValueError as e:
+        parser.error(str(e))
 
-    os.makedirs(os.path.dirname(SOCKET_PATH), exist_ok=True)
+    os.makedirs(os.path.dirname(args.socket), exist_ok=True)
     os.makedirs(os.path.dirname(PID_PATH), exist_ok=True)
 
     # Clean stale socket
-    if os.path.exists(SOCKET_PATH):
+    if os.path.exists(args.socket):
         try:
             s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-            s.connect(SOCKET_PATH)
+            s.connect(args.socket)
             s.sendall(b"ping")
             resp = s.recv(64)
             s.close()
@@ -84,31 +812,21 @@ def main():
                 log.error("daemon already running")
                 sys.exit(1)
         except (ConnectionRefusedError, FileNotFoundError):
-            os.unlink(SOCKET_PATH)
-
-    device = "cpu" if args.cpu else "cuda"
-    model = load_model(args.model, device=device)
+            os.unlink(args.socket)
 
-    signal.signal(signal.SIGTERM, cleanup)
-    signal.signal(signal.SIGINT, cleanup)
+    if backends:
+        from stt.router import Router
 
-    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-    sock.bind(SOCKET_PATH)
-    sock.listen(5)
-
-    with open(PID_PATH, "w") as f:
-        f.write(str(os.getpid()))
-
-    log.info("listening on %s (PID %d)", SOCKET_PATH, os.getpid())
+        try:
+            asyncio.run(_route(Router(backends), args))
+        finally:
+            cleanup(0, args.socket)
 
+    daemon = Daemon()
     try:
-        while True:
-            conn, _ = sock.accept()
-            keep_running = handle_client(conn, model)
-            if not keep_running:
-                break
+        asyncio.run(_serve(daemon, args))
     finally:
-        cleanup()
+        cleanup(1 if daemon.load_error else 0, args.socket)
 
 
 if __name__ == "__main__":
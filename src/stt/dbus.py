@@ -0,0 +1,330 @@
+"""Minimal session-bus client for desktop notifications.
+
+Speaks just enough of the D-Bus wire protocol (EXTERNAL auth, Hello, method
+calls, reading method returns) to call org.freedesktop.Notifications.Notify
+over one kept-open connection. Stdlib only: this is imported on the hotkey
+path, where a full D-Bus library costs more than the dunstify fork it
+replaces.
+
+Calls are written without waiting for the reply; the notification ID the
+server returns is picked up on the next call, so later updates replace the
+same notification in place.
+"""
+
+import os
+import socket
+import struct
+import threading
+import time
+
+METHOD_CALL = 1
+METHOD_RETURN = 2
+ERROR = 3
+
+FIELD_PATH = 1
+FIELD_INTERFACE = 2
+FIELD_MEMBER = 3
+FIELD_REPLY_SERIAL = 5
+FIELD_DESTINATION = 6
+FIELD_SIGNATURE = 8
+
+URGENCY = {"low": 0, "normal": 1, "critical": 2}
+
+
+class DBusError(Exception):
+    pass
+
+
+def session_bus_address(address=None):
+    """Return the socket address for the first usable unix: bus address."""
+    address = address or os.environ.get("DBUS_SESSION_BUS_ADDRESS", "")
+    for entry in address.split(";"):
+        transport, _, params = entry.partition(":")
+        if transport != "unix":
+            continue
+        kv = dict(p.split("=", 1) for p in params.split(",") if "=" in p)
+        if "path" in kv:
+            return kv["path"]
+        if "abstract" in kv:
+            return "\0" + kv["abstract"]
+    if not address and os.path.exists(f"/run/user/{os.getuid()}/bus"):
+        return f"/run/user/{os.getuid()}/bus"
+    raise DBusError("no unix session bus address")
+
+
+class _Writer:
+    """Little-endian marshaller; offsets are relative to the message start."""
+
+    def __init__(self):
+        self.buf = bytearray()
+
+    def align(self, n):
+        self.buf += b"\0" * (-len(self.buf) % n)
+
+    def byte(self, v):
+        self.buf.append(v)
+
+    def uint32(self, v):
+        self.align(4)
+        self.buf += struct.pack("<I", v)
+
+    def int32(self, v):
+        self.align(4)
+        self.buf += struct.pack("<i", v)
+
+    def string(self, s):
+        data = s.encode("utf-8")
+        self.uint32(len(data))
+        self.buf += data + b"\0"
+
+    def signature(self, s):
+        self.byte(len(s))
+        self.buf += s.encode("ascii") + b"\0"
+
+    def array(self, align, items, write):
+        self.uint32(0)
+        at = len(self.buf) - 4
+        self.align(align)
+        start = len(self.buf)
+        for item in items:
+            write(item)
+        self.buf[at:at + 4] = struct.pack("<I", len(self.buf) - start)
+
+
+def _write_variant(w, value):
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise TypeError(f"unsupported variant {value!r}")
+    if isinstance(value, str):
+        w.signature("s")
+        w.string(value)
+    elif 0 <= value < 256:
+        w.signature("y")
+        w.byte(value)
+    else:
+        w.signature("i")
+        w.int32(value)
+
+
+def encode_notify(serial, app, replaces_id, title, body, timeout, urgency) -> bytes:
+    """Marshal a Notify call (signature susssasa{sv}i)."""
+    w = _Writer()
+    w.string(app)
+    w.uint32(replaces_id)
+    w.string("")
+    w.string(title)
+    w.string(body)
+    w.array(4, [], w.string)
+
+    def entry(kv):
+        w.align(8)
+        w.string(kv[0])
+        _write_variant(w, kv[1])
+
+    w.array(8, [("urgency", URGENCY.get(urgency, 1))], entry)
+    w.int32(timeout)
+    return encode_message(
+        serial, "/org/freedesktop/Notifications", "org.freedesktop.Notifications",
+        "Notify", "org.freedesktop.Notifications", "susssasa{sv}i", bytes(w.buf),
+    )
+
+
+def encode_message(serial, path, interface, member, destination, signature="", body=b""):
+    w = _Writer()
+    w.buf += b"l"
+    w.byte(METHOD_CALL)
+    w.byte(0)
+    w.byte(1)
+    w.uint32(len(body))
+    w.uint32(serial)
+
+    fields = [
+        (FIELD_PATH, "o", path),
+        (FIELD_INTERFACE, "s", interface),
+        (FIELD_MEMBER, "s", member),
+        (FIELD_DESTINATION, "s", destination),
+    ]
+    if signature:
+        fields.append((FIELD_SIGNATURE, "g", signature))
+
+    def field(f):
+        code, sig, value = f
+        w.align(8)
+        w.byte(code)
+        w.signature(sig)
+        if sig == "g":
+            w.signature(value)
+        else:
+            w.string(value)
+
+    w.array(8, fields, field)
+    w.align(8)
+    return bytes(w.buf) + body
+
+
+def parse_message(data):
+    """Parse one message from data.
+
+    Returns (type, reply_serial, body, length), or None if data does not yet
+    hold a complete message. Only method-return bodies of signature "u" are
+    decoded (to an int); other bodies are returned raw.
+    """
+    if len(data) < 16:
+        return None
+    if data[0:1] != b"l":
+        raise DBusError("big-endian messages are not supported")
+    kind = data[1]
+    body_len, _, fields_len = struct.unpack_from("<III", data, 4)
+    header_len = 16 + fields_len + (-(16 + fields_len) % 8)
+    total = header_len + body_len
+    if len(data) < total:
+        return None
+
+    reply_serial = signature = None
+    pos = 16
+    end = 16 + fields_len
+    while pos < end:
+        pos += -pos % 8
+        code = data[pos]
+        sig_len = data[pos + 1]
+        sig = data[pos + 2:pos + 2 + sig_len].decode("ascii")
+        pos += 3 + sig_len
+        if sig in ("u", "i"):
+            pos += -pos % 4
+            value = struct.unpack_from("<I", data, pos)[0]
+            pos += 4
+        elif sig in ("s", "o"):
+            pos += -pos % 4
+            n = struct.unpack_from("<I", data, pos)[0]
+            value = data[pos + 4:pos + 4 + n].decode("utf-8")
+            pos += 5 + n
+        elif sig == "g":
+            n = data[pos]
+            value = data[pos + 1:pos + 1 + n].decode("ascii")
+            pos += 2 + n
+        else:
+            raise DBusError(f"unexpected header field type {sig!r}")
+        if code == FIELD_REPLY_SERIAL:
+            reply_serial = value
+        elif code == FIELD_SIGNATURE:
+            signature = value
+
+    body = data[header_len:total]
+    if kind == METHOD_RETURN and signature == "u":
+        body = struct.unpack_from("<I", body)[0]
+    return kind, reply_serial, body, total
+
+
+class Notifier:
+    """Sends notifications over a persistent session-bus connection.
+
+    Updates closer together than min_interval are coalesced: only the latest
+    one is sent, once the interval has passed.
+    """
+
+    def __init__(self, app="STT", replaces_id=0, min_interval=0.1, address=None):
+        self.app = app
+        self.replaces_id = replaces_id
+        self.min_interval = min_interval
+        self.lock = threading.Lock()
+        self.serial = 0
+        self.last_sent = 0.0
+        self.queued = None
+        self.timer = None
+        self.inbox = b""
+        self.sock = self._connect(session_bus_address(address))
+
+    def _next_serial(self):
+        self.serial += 1
+        return self.serial
+
+    def _connect(self, address):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(1.0)
+        try:
+            sock.connect(address)
+            uid = str(os.getuid()).encode().hex()
+            sock.sendall(b"\0AUTH EXTERNAL " + uid.encode() + b"\r\n")
+            reply = b""
+            while b"\r\n" not in reply:
+                chunk = sock.recv(256)
+                if not chunk:
+                    raise DBusError("bus closed during auth")
+                reply += chunk
+            if not reply.startswith(b"OK "):
+                raise DBusError(f"auth rejected: {reply.strip().decode(errors='replace')}")
+            # Hello must be the first message; its reply is read lazily
+            sock.sendall(b"BEGIN\r\n" + encode_message(
+                self._next_serial(), "/org/freedesktop/DBus", "org.freedesktop.DBus",
+                "Hello", "org.freedesktop.DBus",
+            ))
+        except BaseException:
+            sock.close()
+            raise
+        sock.setblocking(False)
+        return sock
+
+    def close(self):
+        with self.lock:
+            if self.timer:
+                self.timer.cancel()
+                self.timer = None
+            self.sock.close()
+
+    def notify(self, title, body, timeout=2000, urgency="low"):
+        """Show or update the notification without waiting for the server."""
+        with self.lock:
+            wait = self.last_sent + self.min_interval - time.monotonic()
+            if wait > 0:
+                self.queued = (title, body, timeout, urgency)
+                if self.timer is None:
+                    self.timer = threading.Timer(wait, self.flush)
+                    self.timer.daemon = True
+                    self.timer.start()
+                return
+            self.queued = None
+            self._send(title, body, timeout, urgency)
+
+    def flush(self):
+        """Send a coalesced update now, if one is waiting."""
+        with self.lock:
+            if self.timer:
+                self.timer.cancel()
+                self.timer = None
+            if self.queued:
+                args, self.queued = self.queued, None
+                try:
+                    self._send(*args)
+                except (OSError, DBusError):
+                    # Runs on the timer thread too; the next notify() sees
+                    # the closed socket and falls back
+                    self.sock.close()
+
+    def _send(self, title, body, timeout, urgency):
+        self._read_replies()
+        serial = self._next_serial()
+        msg = encode_notify(
+            serial, self.app, self.replaces_id, title, body, timeout, urgency
+        )
+        self.sock.setblocking(True)
+        try:
+            self.sock.sendall(msg)
+        finally:
+            self.sock.setblocking(False)
+        self.last_sent = time.monotonic()
+
+    def _read_replies(self):
+        """Drain replies that have arrived; remember the server's notification ID."""
+        while True:
+            try:
+                chunk = self.sock.recv(65536)
+            except BlockingIOError:
+                break
+            if not chunk:
+                raise DBusError("bus connection closed")
+            self.inbox += chunk
+        while (msg := parse_message(self.inbox)) is not None:
+            kind, _, body, length = msg
+            self.inbox = self.inbox[length:]
+            # Notify is the only call returning "u" (Hello returns "s")
+            if kind == METHOD_RETURN and isinstance(body, int) and body:
+                self.replaces_id = body
@@ -0,0 +1,65 @@
+"""Stand-ins for a real model and a real speaker, for benchmarks and load tests."""
+
+import time
+
+import numpy as np
+
+from stt.config import WHISPER_RATE
+
+
+class FakeSegment:
+    def __init__(self, text, start, end):
+        self.text = text
+        self.start = start
+        self.end = end
+
+
+class FakeInfo:
+    def __init__(self, duration):
+        self.language = "en"
+        self.language_probability = 1.0
+        self.duration = duration
+
+
+class FakeModel:
+    """Mimics WhisperModel.transcribe without doing any inference.
+
+    Each call sleeps rtf * audio duration, so a fake daemon can stand in for
+    a model of known speed when testing the protocol and scheduling.
+    """
+
+    def __init__(self, text="hello world", rtf=0.0):
+        self.text = text
+        self.rtf = rtf
+
+    def transcribe(self, audio, **kwargs):
+        duration = len(audio) / WHISPER_RATE
+        info = FakeInfo(duration)
+
+        def segments():
+            if self.rtf:
+                time.sleep(duration * self.rtf)
+            yield FakeSegment(f" {self.text}", 0.0, duration)
+
+        return segments(), info
+
+
+def synthetic_speech(seconds, rate=WHISPER_RATE, seed=0):
+    """Return float32 audio with speech-like structure.
+
+    A 120-200 Hz voiced harmonic series with formant-like weighting, gated by a
+    ~4 Hz syllable envelope, plus pauses and a little noise. Enough to exercise
+    energy gates and resamplers; not intelligible.
+    """
+    rng = np.random.default_rng(seed)
+    n = int(seconds * rate)
+    t = np.arange(n) / rate
+    f0 = 150 + 30 * np.sin(2 * np.pi * 0.3 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / rate
+    voiced = sum(
+        np.sin(k * phase) / k * (1.5 if 3 <= k <= 5 else 1.0) for k in range(1, 12)
+    )
+    syllables = np.clip(np.sin(2 * np.pi * 4 * t), 0, None) ** 2
+    pauses = (np.sin(2 * np.pi * 0.25 * t) > -0.6).astype(np.float64)
+    audio = 0.1 * voiced * syllables * pauses + 0.002 * rng.standard_normal(n)
+    return audio.astype(np.float32)
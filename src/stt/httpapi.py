@@ -0,0 +1,268 @@
+"""OpenAI-compatible HTTP endpoint for stt-daemon.
+
+Serves POST /v1/audio/transcriptions and /v1/audio/translations (to English)
+(multipart/form-data with a "file" part) on a loopback port, sharing the
+daemon's loaded model and inference workers, and GET /metrics in Prometheus
+text format.
+Supported response_format values: json, text, srt, verbose_json. An optional
+"priority" field (default "bulk") sets the scheduling class, so HTTP batch
+work yields to push-to-talk dictation unless it asks for "interactive".
+The OpenAI "language" and "prompt" fields are passed on as decoding options.
+Connections are kept alive between requests; at most `concurrency` requests
+decode at once.
+"""
+
+import asyncio
+import io
+import json
+import re
+
+from stt.log import setup_logging
+from stt.scheduler import BULK, check_priority
+
+log = setup_logging("stt.httpapi")
+
+MAX_BODY = 100 * 1024 * 1024
+MAX_HEAD = 64 * 1024
+IDLE_TIMEOUT = 60
+FORMATS = ("json", "text", "srt", "verbose_json")
+TRANSCRIPTIONS = "/v1/audio/transcriptions"
+TRANSLATIONS = "/v1/audio/translations"
+TASKS = {TRANSCRIPTIONS: "transcribe", TRANSLATIONS: "translate"}  # by endpoint
+METRICS = "/metrics"
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    411: "Length Required",
+    413: "Payload Too Large",
+    431: "Request Header Fields Too Large",
+    500: "Internal Server Error",
+}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _params(header: str) -> dict:
+    """Parse key=value / key="value" parameters from a header value."""
+    return {
+        k.lower(): v1 or v2
+        for k, v1, v2 in re.findall(r';\s*([\w-]+)=(?:"([^"]*)"|([^;\s]*))', header)
+    }
+
+
+def parse_multipart(body: bytes, content_type: str) -> dict:
+    """Return {field name: (filename, data)} from a multipart/form-data body."""
+    if not content_type.lower().startswith("multipart/form-data"):
+        raise HTTPError(400, "expected multipart/form-data")
+    boundary = _params(content_type).get("boundary")
+    if not boundary:
+        raise HTTPError(400, "multipart boundary missing")
+    delim = b"\r\n--" + boundary.encode("latin-1")
+    fields = {}
+    for part in (b"\r\n" + body).split(delim)[1:]:
+        if part.startswith(b"--"):
+            break
+        head, _, data = part.partition(b"\r\n\r\n")
+        disposition = ""
+        for line in head.decode("latin-1").split("\r\n"):
+            name, _, value = line.partition(":")
+            if name.strip().lower() == "content-disposition":
+                disposition = value.strip()
+        params = _params(disposition)
+        if "name" in params:
+            fields[params["name"]] = (params.get("filename"), data)
+    return fields
+
+
+def _srt_time(t: float) -> str:
+    ms = round(t * 1000)
+    h, ms = divmod(ms, 3_600_000)
+    m, ms = divmod(ms, 60_000)
+    s, ms = divmod(ms, 1000)
+    return f"{h:02d}:{m:02d}:{s:02d},{ms:03d}"
+
+
+def format_srt(segments) -> str:
+    blocks = [
+        f"{i}\n{_srt_time(seg.start)} --> {_srt_time(seg.end)}\n{seg.text.strip()}\n"
+        for i, seg in enumerate(segments, 1)
+    ]
+    return "\n".join(blocks)
+
+
+def render(fmt, segments, info, task="transcribe") -> tuple[str, bytes]:
+    """Return (content type, body) for a finished transcription."""
+    text = " ".join(seg.text.strip() for seg in segments)
+    if fmt == "text":
+        return "text/plain; charset=utf-8", text.encode("utf-8")
+    if fmt == "srt":
+        return "text/plain; charset=utf-8", format_srt(segments).encode("utf-8")
+    result = {"text": text}
+    if fmt == "verbose_json":
+        result = {
+            "task": task,
+            "language": info.language if info else None,
+            "duration": info.duration if info else 0.0,
+            "text": text,
+            "segments": [
+                {"id": i, "start": seg.start, "end": seg.end, "text": seg.text}
+                for i, seg in enumerate(segments)
+            ],
+        }
+    return "application/json", json.dumps(result).encode("utf-8")
+
+
+def _parse_head(head: bytes):
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, version = lines[0].split(" ", 2)
+    except ValueError:
+        raise HTTPError(400, "malformed request line") from None
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+    return method, target, version, headers
+
+
+def _response(status, ctype, body, keep_alive) -> bytes:
+    head = (
+        f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+        f"Content-Type: {ctype}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode("latin-1") + body
+
+
+def _error_body(message) -> bytes:
+    return json.dumps(
+        {"error": {"message": message, "type": "invalid_request_error"}}
+    ).encode("utf-8")
+
+
+class HTTPServer:
+    """HTTP/1.1 front end that runs requests on a Daemon's workers."""
+
+    def __init__(self, daemon, concurrency=2):
+        self.daemon = daemon
+        self.limit = asyncio.Semaphore(concurrency)
+
+    async def start(self, host, port):
+        return await asyncio.start_server(
+            self.handle_connection, host, port, limit=MAX_HEAD
+        )
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while await self._handle_request(reader, writer):
+                pass
+        except Exception as e:
+            log.error("http client error: %s", e)
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+    async def _handle_request(self, reader, writer) -> bool:
+        """Serve one request. Returns True to keep the connection open."""
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), IDLE_TIMEOUT)
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+            return False
+        except asyncio.LimitOverrunError:
+            writer.write(_response(431, "application/json", _error_body("headers too large"), False))
+            await writer.drain()
+            return False
+
+        try:
+            method, target, version, headers = _parse_head(head)
+            body = await self._read_body(reader, writer, headers)
+        except HTTPError as e:
+            writer.write(_response(e.status, "application/json", _error_body(str(e)), False))
+            await writer.drain()
+            return False
+
+        connection = headers.get("connection", "").lower()
+        if version == "HTTP/1.0":
+            keep_alive = connection == "keep-alive"
+        else:
+            keep_alive = connection != "close"
+
+        try:
+            status, ctype, payload = 200, *await self.dispatch(method, target, headers, body)
+        except HTTPError as e:
+            status, ctype, payload = e.status, "application/json", _error_body(str(e))
+        except Exception as e:
+            log.error("http transcription failed: %s", e)
+            status, ctype, payload = 500, "application/json", _error_body(str(e))
+        writer.write(_response(status, ctype, payload, keep_alive))
+        await writer.drain()
+        log.debug("http %s %s -> %d", method, target, status)
+        return keep_alive
+
+    async def _read_body(self, reader, writer, headers) -> bytes:
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            raise HTTPError(411, "chunked uploads are not supported")
+        try:
+            length = int(headers.get("content-length", "0") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            raise HTTPError(400, "malformed Content-Length")
+        if length > MAX_BODY:
+            raise HTTPError(413, f"upload larger than {MAX_BODY} bytes")
+        if length and headers.get("expect", "").lower() == "100-continue":
+            writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+            await writer.drain()
+        return await reader.readexactly(length) if length else b""
+
+    async def dispatch(self, method, target, headers, body) -> tuple[str, bytes]:
+        """Route a request. Returns (content type, body) or raises HTTPError."""
+        path = target.split("?", 1)[0]
+        if path == METRICS:
+            if method != "GET":
+                raise HTTPError(405, "use GET")
+            metrics = self.daemon.metrics.prometheus()
+            return "text/plain; version=0.0.4", metrics.encode("utf-8")
+        task = TASKS.get(path)
+        if task is None:
+            raise HTTPError(404, f"no route for {path}")
+        if method != "POST":
+            raise HTTPError(405, "use POST")
+
+        form = parse_multipart(body, headers.get("content-type", ""))
+        if "file" not in form:
+            raise HTTPError(400, "missing 'file' field")
+        fmt = form.get("response_format", (None, b"json"))[1].decode("utf-8").strip()
+        if fmt not in FORMATS:
+            raise HTTPError(400, f"unsupported response_format '{fmt}'")
+
+        try:
+            priority = check_priority(
+                form.get("priority", (None, BULK.encode()))[1].decode("utf-8").strip()
+            )
+        except ValueError as e:
+            raise HTTPError(400, str(e)) from None
+
+        options = {"task": task}
+        for field, option in (("language", "language"), ("prompt", "initial_prompt")):
+            if field in form:
+                options[option] = form[field][1].decode("utf-8").strip()
+        filename, data = form["file"]
+        log.debug("http transcribe %s (%d bytes, %s, %s)", filename, len(data), fmt, priority)
+        async with self.limit:
+            segments, info = await self.daemon.decode(
+                io.BytesIO(data), "http", priority=priority, options=options
+            )
+        return render(fmt, segments, info, task)
@@ -0,0 +1,228 @@
+"""stt-loadtest — replay recordings against stt-daemon and report capacity.
+
+Arrival processes:
+  open    Poisson arrivals at --rate requests/s, independent of completions
+  closed  --users concurrent dictators, each waiting --think seconds
+          (exponentially distributed) between requests
+
+Audio comes from a directory of WAVs (--wavs) or synthetic speech-like clips.
+--fake runs an in-process daemon with a fake model, for protocol-only tests.
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from stt.aio import Client, DaemonError
+from stt.log import setup_logging
+from stt.protocol import encode_request
+
+log = setup_logging("stt.loadtest")
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, round(q / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class Recorder:
+    """Collects per-request outcomes during a run."""
+
+    def __init__(self):
+        self.latencies = []
+        self.audio_seconds = 0.0
+        self.errors = 0
+        self.timeouts = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def report(self, elapsed) -> dict:
+        lat = sorted(self.latencies)
+        return {
+            "elapsed": elapsed,
+            "ok": len(lat),
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "throughput": len(lat) / elapsed if elapsed else 0.0,
+            "audio_seconds_per_second": self.audio_seconds / elapsed if elapsed else 0.0,
+            "max_in_flight": self.max_in_flight,
+            "latency": {
+                "mean": sum(lat) / len(lat) if lat else None,
+                **{f"p{q}": percentile(lat, q) for q in (50, 90, 95, 99)},
+                "max": lat[-1] if lat else None,
+            },
+        }
+
+
+def load_clips(wav_dir, synthetic, seconds, tmpdir):
+    """Return [(path, duration)] to replay."""
+    import soundfile as sf
+
+    if wav_dir:
+        paths = sorted(glob.glob(os.path.join(wav_dir, "*.wav")))
+        if not paths:
+            raise SystemExit(f"no .wav files in {wav_dir}")
+        return [(os.path.abspath(p), sf.info(p).duration) for p in paths]
+
+    from stt.config import WHISPER_RATE
+    from stt.fake import synthetic_speech
+
+    clips = []
+    for i in range(synthetic):
+        path = os.path.join(tmpdir, f"synthetic-{i}.wav")
+        sf.write(path, synthetic_speech(seconds, seed=i), WHISPER_RATE, subtype="PCM_16")
+        clips.append((path, seconds))
+    return clips
+
+
+async def one_request(client, clip, rec, timeout, inline):
+    path, duration = clip
+    if inline:
+        with open(path, "rb") as f:
+            msg = encode_request("transcribe", data=f.read())
+    else:
+        msg = encode_request("transcribe", path=path)
+    rec.in_flight += 1
+    rec.max_in_flight = max(rec.max_in_flight, rec.in_flight)
+    t0 = time.perf_counter()
+    try:
+        reply = await asyncio.wait_for(client.request(msg), timeout)
+        if reply.startswith("ERROR:"):
+            raise DaemonError(reply)
+        rec.latencies.append(time.perf_counter() - t0)
+        rec.audio_seconds += duration
+    except asyncio.TimeoutError:
+        rec.timeouts += 1
+    except (OSError, DaemonError) as e:
+        log.debug("request failed: %s", e)
+        rec.errors += 1
+    finally:
+        rec.in_flight -= 1
+
+
+async def run_open(client, clips, rec, args):
+    """Poisson arrivals: exponential gaps at args.rate requests/s."""
+    rng = random.Random(args.seed)
+    tasks = []
+    deadline = time.perf_counter() + args.duration
+    sent = 0
+    while time.perf_counter() < deadline and (not args.requests or sent < args.requests):
+        clip = clips[sent % len(clips)]
+        tasks.append(asyncio.create_task(
+            one_request(client, clip, rec, args.timeout, args.inline)
+        ))
+        sent += 1
+        await asyncio.sleep(rng.expovariate(args.rate))
+    await asyncio.gather(*tasks)
+
+
+async def run_closed(client, clips, rec, args):
+    """args.users loops of request, then exponential think time."""
+    deadline = time.perf_counter() + args.duration
+    budget = [args.requests or float("inf")]
+
+    async def user(n):
+        rng = random.Random(args.seed + n)
+        i = n
+        while time.perf_counter() < deadline and budget[0] > 0:
+            budget[0] -= 1
+            await one_request(client, clips[i % len(clips)], rec, args.timeout, args.inline)
+            i += args.users
+            if args.think:
+                await asyncio.sleep(rng.expovariate(1 / args.think))
+
+    await asyncio.gather(*(user(n) for n in range(args.users)))
+
+
+async def run(args, clips, socket_path=None) -> dict:
+    client = Client(socket_path, timeout=args.timeout)
+    if not await client.ping():
+        raise SystemExit(f"stt-daemon not reachable at {client.path}")
+    rec = Recorder()
+    t0 = time.perf_counter()
+    if args.mode == "open":
+        await run_open(client, clips, rec, args)
+    else:
+        await run_closed(client, clips, rec, args)
+    return rec.report(time.perf_counter() - t0)
+
+
+def _ms(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.0f}ms"
+
+
+def print_report(report):
+    lat = report["latency"]
+    print(f"requests:    {report['ok']} ok, {report['errors']} errors, "
+          f"{report['timeouts']} timeouts in {report['elapsed']:.1f}s")
+    print(f"throughput:  {report['throughput']:.2f} req/s, "
+          f"{report['audio_seconds_per_second']:.1f} audio s/s, "
+          f"max in flight {report['max_in_flight']}")
+    print(f"latency:     mean={_ms(lat['mean'])} p50={_ms(lat['p50'])} "
+          f"p90={_ms(lat['p90'])} p95={_ms(lat['p95'])} p99={_ms(lat['p99'])} "
+          f"max={_ms(lat['max'])}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="stt-loadtest", description="Replay audio against stt-daemon"
+    )
+    parser.add_argument("--mode", choices=["open", "closed"], default="closed",
+                        help="Arrival process (default: closed)")
+    parser.add_argument("--rate", type=float, default=1.0,
+                        help="Open loop: mean arrivals per second (default: 1)")
+    parser.add_argument("--users", type=int, default=4,
+                        help="Closed loop: concurrent users (default: 4)")
+    parser.add_argument("--think", type=float, default=0.0,
+                        help="Closed loop: mean think time in seconds (default: 0)")
+    parser.add_argument("--duration", type=float, default=30.0,
+                        help="Stop issuing requests after this many seconds (default: 30)")
+    parser.add_argument("-n", "--requests", type=int, default=0,
+                        help="Stop after this many requests (default: unlimited)")
+    parser.add_argument("--timeout", type=float, default=30.0,
+                        help="Per-request timeout in seconds (default: 30)")
+    parser.add_argument("--wavs", metavar="DIR", help="Replay the .wav files in DIR")
+    parser.add_argument("--synthetic", type=int, default=8,
+                        help="Number of synthetic clips when --wavs is not given (default: 8)")
+    parser.add_argument("--clip-seconds", type=float, default=5.0,
+                        help="Synthetic clip length (default: 5)")
+    parser.add_argument("--inline", action="store_true",
+                        help="Send audio bytes in the request instead of a path")
+    parser.add_argument("--fake", action="store_true",
+                        help="Run against an in-process daemon with a fake model")
+    parser.add_argument("--fake-rtf", type=float, default=0.0,
+                        help="Fake model seconds of work per audio second (default: 0)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", metavar="FILE", help="Also write the report as JSON")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="stt-loadtest-") as tmp:
+        clips = load_clips(args.wavs, args.synthetic, args.clip_seconds, tmp)
+        if args.fake:
+            from stt.bench import fake_daemon
+            from stt.fake import FakeModel
+
+            with fake_daemon(FakeModel(rtf=args.fake_rtf)) as sock:
+                report = asyncio.run(run(args, clips, sock))
+        else:
+            report = asyncio.run(run(args, clips))
+
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    if not report["ok"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
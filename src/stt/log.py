@@ -1,30 +1,199 @@
-"""Logging setup for the STT system."""
+"""Logging setup for the STT system.
 
+Every process gets one queue-based pipeline: log calls only enqueue the
+record, and a background writer thread (started on the first record) formats
+it into a size-rotated stt.log (DEBUG+) and stderr (WARNING+). Only core
+`logging` is imported here — logging.handlers pulls in socket and pickle,
+too slow for the hotkey path.
+
+Environment overrides:
+  STT_LOG_LEVEL   default level for stt.* loggers (default: DEBUG)
+  STT_LOG_LEVELS  per-module levels, e.g. "stt.daemon=INFO,stt.core=WARNING"
+  STT_LOG_FORMAT  "text" (default) or "json" for the log file; JSON lines
+                  include any `extra={"timings": {...}}` (or "conditioning")
+                  passed to a log call
+"""
+
+import atexit
 import logging
 import os
+import queue
+import threading
 
-from stt.config import LOG_DIR, LOG_PATH
+from stt.config import LOG_BACKUPS, LOG_DIR, LOG_MAX_BYTES, LOG_PATH
 
+_handler = None
+_levels = {}
+JSON_EXTRAS = ("timings", "conditioning")  # extra= keys JSON lines carry
 
-def setup_logging(name: str) -> logging.Logger:
-    """Return a logger that writes DEBUG+ to file, WARNING+ to stderr."""
-    os.makedirs(LOG_DIR, exist_ok=True)
 
-    logger = logging.getLogger(name)
-    if logger.handlers:
-        return logger
-    logger.setLevel(logging.DEBUG)
+class _RotatingFileHandler(logging.FileHandler):
+    """Size-rotated log that is shared by several processes.
 
-    fmt = logging.Formatter("%(asctime)s %(name)s %(levelname)s %(message)s")
+    Opens (and creates LOG_DIR) on the first record, and reopens the file if
+    another process rotated it away underneath us.
+    """
+
+    def __init__(self, path, max_bytes, backups):
+        super().__init__(path, delay=True)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._ino = None
+
+    def _open(self):
+        os.makedirs(LOG_DIR, exist_ok=True)
+        stream = super()._open()
+        self._ino = os.fstat(stream.fileno()).st_ino
+        return stream
+
+    def _rotate(self):
+        self.stream.close()
+        self.stream = None
+        for i in range(self.backups - 1, 0, -1):
+            src = f"{self.baseFilename}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.baseFilename}.{i + 1}")
+        if self.backups:
+            os.replace(self.baseFilename, self.baseFilename + ".1")
+        else:
+            os.truncate(self.baseFilename, 0)
+
+    def emit(self, record):
+        if self.stream is not None:
+            try:
+                moved = os.stat(self.baseFilename).st_ino != self._ino
+            except FileNotFoundError:
+                moved = True
+            if moved:
+                self.stream.close()
+                self.stream = None
+            elif self.max_bytes:
+                size = self.stream.tell() + len(self.format(record)) + 1
+                if size > self.max_bytes and self.stream.tell():
+                    self._rotate()
+        super().emit(record)
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line, for machine-readable timings."""
+
+    def format(self, record):
+        import json
+
+        entry = {
+            "ts": record.created,
+            "logger": record.name,
+            "level": record.levelname,
+            "pid": record.process,
+            "msg": record.getMessage(),
+        }
+        for key in JSON_EXTRAS:
+            value = getattr(record, key, None)
+            if value:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry)
+
+
+class _QueueHandler(logging.Handler):
+    """Hands records to a writer thread instead of doing I/O in the caller."""
+
+    def __init__(self, handlers):
+        super().__init__()
+        self.handlers = handlers
+        self.queue = queue.SimpleQueue()
+        self.thread = None
+        self.start_lock = threading.Lock()
 
-    fh = logging.FileHandler(LOG_PATH)
+    def emit(self, record):
+        try:
+            # Resolve args and tracebacks now; the objects may change later
+            if record.exc_info and not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.msg = record.getMessage()
+            record.args = None
+            if self.thread is None:
+                self._start()
+            self.queue.put(record)
+        except Exception:
+            self.handleError(record)
+
+    def _start(self):
+        with self.start_lock:
+            if self.thread is None:
+                self.thread = threading.Thread(
+                    target=self._write, name="stt-log", daemon=True
+                )
+                self.thread.start()
+
+    def _write(self):
+        while (record := self.queue.get()) is not None:
+            for handler in self.handlers:
+                if record.levelno >= handler.level:
+                    handler.handle(record)
+
+    def close(self):
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+        for handler in self.handlers:
+            handler.close()
+        super().close()
+
+
+def parse_levels(spec: str) -> dict:
+    """Parse "name=LEVEL,name=LEVEL" into {name: level number}."""
+    levels = {}
+    for item in spec.split(","):
+        name, sep, level = item.partition("=")
+        if sep and name.strip():
+            levels[name.strip()] = logging.getLevelName(level.strip().upper())
+    return {k: v for k, v in levels.items() if isinstance(v, int)}
+
+
+def _configure():
+    """Install the process-wide queue pipeline on the "stt" logger."""
+    global _handler, _levels
+
+    fmt = logging.Formatter("%(asctime)s %(name)s %(levelname)s %(message)s")
+    fh = _RotatingFileHandler(LOG_PATH, LOG_MAX_BYTES, LOG_BACKUPS)
     fh.setLevel(logging.DEBUG)
-    fh.setFormatter(fmt)
-    logger.addHandler(fh)
+    if os.environ.get("STT_LOG_FORMAT", "text").lower() == "json":
+        fh.setFormatter(JSONFormatter())
+    else:
+        fh.setFormatter(fmt)
 
     sh = logging.StreamHandler()
     sh.setLevel(logging.WARNING)
     sh.setFormatter(fmt)
-    logger.addHandler(sh)
 
+    _handler = _QueueHandler([fh, sh])
+    root = logging.getLogger("stt")
+    root.addHandler(_handler)
+    root.setLevel(os.environ.get("STT_LOG_LEVEL", "DEBUG").upper())
+    root.propagate = False
+
+    _levels = parse_levels(os.environ.get("STT_LOG_LEVELS", ""))
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """Flush queued records and stop the background writer."""
+    global _handler
+    if _handler is None:
+        return
+    logging.getLogger("stt").removeHandler(_handler)
+    _handler.close()
+    _handler = None
+
+
+def setup_logging(name: str) -> logging.Logger:
+    """Return a logger that writes DEBUG+ to file, WARNING+ to stderr."""
+    if _handler is None:
+        _configure()
+    logger = logging.getLogger(name)
+    if name in _levels:
+        logger.setLevel(_levels[name])
     return logger
@@ -0,0 +1,202 @@
+"""In-process daemon metrics: counters, gauges and latency histograms.
+
+Metrics.snapshot() backs the daemon's "stats" command; Metrics.prometheus()
+renders the same data in Prometheus text format for GET /metrics.
+"""
+
+import math
+import threading
+import time
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+STAGES = ("queue_wait", "preprocess", "inference", "total")
+
+
+class Histogram:
+    """Fixed-bucket histogram (cumulative, Prometheus style)."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        i = 0
+        while i < len(self.buckets) and value > self.buckets[i]:
+            i += 1
+        self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self):
+        """Yield (upper bound, cumulative count), ending with +Inf."""
+        total = 0
+        for bound, n in zip((*self.buckets, math.inf), self.counts):
+            total += n
+            yield bound, total
+
+    def quantile(self, q):
+        """Estimate the q-quantile by interpolating within its bucket."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        lower, below = 0.0, 0
+        for bound, total in self.cumulative():
+            if total >= rank:
+                if math.isinf(bound):
+                    return lower
+                inside = total - below
+                return lower + (bound - lower) * (rank - below) / inside
+            lower, below = bound, total
+        return lower
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+
+class Metrics:
+    """Thread-safe metrics shared by the daemon's event loop and workers."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        self.model_load_seconds = None
+        self.requests = {}
+        self.errors = {}
+        self.cancelled = {}
+        self.in_flight = 0
+        self.audio_seconds = 0.0
+        self.inference_seconds = 0.0
+        self.trimmed_seconds = 0.0
+        self.gated = 0
+        self.histograms = {stage: Histogram() for stage in STAGES}
+        self.waits = {}
+
+    def begin(self, kind):
+        with self.lock:
+            self.requests[kind] = self.requests.get(kind, 0) + 1
+            self.in_flight += 1
+
+    def end(self, total_seconds):
+        with self.lock:
+            self.in_flight -= 1
+            self.histograms["total"].observe(total_seconds)
+
+    def error(self, kind):
+        with self.lock:
+            self.errors[kind] = self.errors.get(kind, 0) + 1
+
+    def cancel(self, kind):
+        with self.lock:
+            self.cancelled[kind] = self.cancelled.get(kind, 0) + 1
+
+    def observe(self, stage, seconds):
+        with self.lock:
+            self.histograms[stage].observe(seconds)
+
+    def observe_wait(self, priority, seconds):
+        """Time a request (or bulk chunk) of this priority waited for a worker."""
+        with self.lock:
+            self.waits.setdefault(priority, Histogram()).observe(seconds)
+
+    def add_audio(self, audio_seconds, inference_seconds):
+        with self.lock:
+            self.audio_seconds += audio_seconds
+            self.inference_seconds += inference_seconds
+
+    def add_conditioning(self, report):
+        """Count the silence trimmed, or the request gated, by core.condition."""
+        with self.lock:
+            if report["gated"]:
+                self.gated += 1
+            else:
+                self.trimmed_seconds += report["duration"] - (report["end"] - report["start"])
+
+    def real_time_factor(self):
+        """Inference time per second of audio (lower is faster)."""
+        if not self.audio_seconds:
+            return None
+        return self.inference_seconds / self.audio_seconds
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {
+                "uptime": time.monotonic() - self.started,
+                "model_load_seconds": self.model_load_seconds,
+                "in_flight": self.in_flight,
+                "requests": dict(self.requests),
+                "errors": dict(self.errors),
+                "cancelled": dict(self.cancelled),
+                "audio_seconds": self.audio_seconds,
+                "inference_seconds": self.inference_seconds,
+                "trimmed_seconds": self.trimmed_seconds,
+                "gated": self.gated,
+                "real_time_factor": self.real_time_factor(),
+                "latency": {s: h.snapshot() for s, h in self.histograms.items()},
+                "queue_wait": {p: h.snapshot() for p, h in sorted(self.waits.items())},
+            }
+
+    def prometheus(self) -> str:
+        with self.lock:
+            lines = []
+
+            def metric(name, kind, help_text, samples):
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{labels} {value}")
+
+            metric("stt_requests_total", "counter", "Transcription requests, by kind.",
+                   [(f'{{kind="{k}"}}', v) for k, v in sorted(self.requests.items())])
+            metric("stt_errors_total", "counter", "Failed transcription requests, by kind.",
+                   [(f'{{kind="{k}"}}', v) for k, v in sorted(self.errors.items())])
+            metric("stt_cancelled_total", "counter",
+                   "Requests cancelled or past their deadline, by kind.",
+                   [(f'{{kind="{k}"}}', v) for k, v in sorted(self.cancelled.items())])
+            metric("stt_audio_seconds_total", "counter", "Seconds of audio transcribed.",
+                   [("", self.audio_seconds)])
+            metric("stt_inference_seconds_total", "counter", "Seconds spent in the model.",
+                   [("", self.inference_seconds)])
+            metric("stt_trimmed_seconds_total", "counter",
+                   "Seconds of silence trimmed before inference.",
+                   [("", self.trimmed_seconds)])
+            metric("stt_gated_total", "counter",
+                   "Requests answered without inference because no speech was found.",
+                   [("", self.gated)])
+            rtf = self.real_time_factor()
+            metric("stt_real_time_factor", "gauge", "Inference seconds per audio second.",
+                   [("", rtf if rtf is not None else "NaN")])
+            metric("stt_in_flight_requests", "gauge", "Requests queued or decoding.",
+                   [("", self.in_flight)])
+            metric("stt_uptime_seconds", "gauge", "Seconds since the daemon started.",
+                   [("", time.monotonic() - self.started)])
+            load = self.model_load_seconds
+            metric("stt_model_load_seconds", "gauge", "Seconds taken to load the model.",
+                   [("", load if load is not None else "NaN")])
+
+            samples = []
+            for stage, h in self.histograms.items():
+                for bound, total in h.cumulative():
+                    le = "+Inf" if math.isinf(bound) else repr(float(bound))
+                    samples.append((f'_bucket{{stage="{stage}",le="{le}"}}', total))
+                samples.append((f'_sum{{stage="{stage}"}}', h.sum))
+                samples.append((f'_count{{stage="{stage}"}}', h.count))
+            metric("stt_stage_seconds", "histogram", "Request latency by stage.", samples)
+
+            samples = []
+            for priority, h in sorted(self.waits.items()):
+                for bound, total in h.cumulative():
+                    le = "+Inf" if math.isinf(bound) else repr(float(bound))
+                    samples.append((f'_bucket{{priority="{priority}",le="{le}"}}', total))
+                samples.append((f'_sum{{priority="{priority}"}}', h.sum))
+                samples.append((f'_count{{priority="{priority}"}}', h.count))
+            metric("stt_queue_wait_seconds", "histogram",
+                   "Time waiting for a worker, by priority.", samples)
+            return "\n".join(lines) + "\n"
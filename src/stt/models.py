@@ -0,0 +1,457 @@
+"""`stt model` — a local store of Whisper models, so loading never needs the network.
+
+WhisperModel("small.en") asks the Hugging Face hub which files make up the
+model before it looks at its cache, which slows startup and fails without
+network access. `stt model pull NAME` instead downloads NAME (a
+faster-whisper size such as "small.en", or the Hugging Face ID of a
+CTranslate2 conversion) once into MODELS_DIR, or copies it from a directory
+with --from on hosts that have no network at all, and records each file's
+size and SHA-256 in a manifest. load_model resolves names in the store to
+their directory; other names are loaded with local_files_only, so the daemon
+and tray never make a network request and a missing model fails at once.
+
+`stt model convert NAME CHECKPOINT` stores CTranslate2 conversions of a
+Transformers Whisper checkpoint (a fine-tune, say), one per quantization, so
+that load_model can pick the one matching its compute type instead of
+quantizing float weights on every start. The manifest keeps the checkpoint's
+checksum: converting again reuses variants made from the same checkpoint and
+replaces all of them if it has changed. It also keeps each checkpoint file's
+size and modification time, which resolve checks on every load: if the
+checkpoint has changed since, it is converted again before loading.
+
+  stt model pull NAME [--from DIR]   add a model to the store
+  stt model convert NAME CHECKPOINT  add a converted checkpoint to the store
+  stt model list                     stored models, their size and load times
+  stt model verify [NAME...]         check files against the manifest
+  stt model rm NAME                  remove a model from the store
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+
+from stt.config import MODELS_DIR
+from stt.log import setup_logging
+
+log = setup_logging("stt.models")
+
+MANIFEST = "stt-model.json"
+QUANTIZATIONS = (  # most precise first
+    "float32", "float16", "bfloat16", "int16", "int8_float32", "int8_float16",
+    "int8_bfloat16", "int8",
+)
+DEFAULT_QUANTIZATIONS = ("int8", "int8_float16", "float16")
+
+
+def model_dir(name, root=MODELS_DIR) -> str:
+    return os.path.join(root, name.replace("/", "--"))
+
+
+def read_manifest(name, root=MODELS_DIR) -> dict | None:
+    """The manifest of a stored model, or None if name is not in the store."""
+    try:
+        with open(os.path.join(model_dir(name, root), MANIFEST)) as f:
+            return json.load(f)
+    except (FileNotFoundError, NotADirectoryError, ValueError):
+        return None
+
+
+def _write_manifest(path, manifest):
+    tmp = os.path.join(path, f"{MANIFEST}.{os.getpid()}.tmp")
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2)
+        f.write("\n")
+    os.replace(tmp, os.path.join(path, MANIFEST))
+
+
+def _is_path(name) -> bool:
+    separators = (os.sep, os.altsep) if os.altsep else (os.sep,)
+    return name.startswith(("~", ".")) or any(sep in name for sep in separators)
+
+
+def resolve(name, compute_type=None, root=MODELS_DIR, run=None) -> str | None:
+    """Local directory to load model name from, or None if it isn't stored.
+
+    A name written as a path (containing a path separator, or starting
+    with "~" or ".") that is a directory is returned as it is; other names
+    are only looked up in the store, so a directory in the current one
+    called "small" does not shadow the stored model. For a converted
+    checkpoint this is the variant quantized as compute_type, or else the
+    most precise one, which CTranslate2 then converts as it loads. If the
+    checkpoint has changed since it was converted, that variant is converted
+    again first; if that fails, the earlier conversion is used.
+    """
+    if _is_path(name) and os.path.isdir(os.path.expanduser(name)):
+        return os.path.expanduser(name)
+    manifest = read_manifest(name, root)
+    if manifest is None:
+        return None
+    variants = manifest.get("variants")
+    if not variants:
+        return model_dir(name, root)
+    if compute_type not in variants:
+        compute_type = min(variants, key=QUANTIZATIONS.index)
+    if checkpoint_changed(manifest):
+        log.warning("checkpoint %s changed since %s was converted; converting it again",
+                    manifest["source"], name)
+        try:
+            convert(name, manifest["source"], [compute_type], root, run=run or _convert)
+        except Exception as e:
+            log.warning("cannot convert %s (%s); loading the earlier conversion, "
+                        "run: stt model convert %s %s", name, e, name, manifest["source"])
+    return os.path.join(model_dir(name, root), compute_type)
+
+
+def _sha256(path) -> str:
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def _file_entries(path, prefix="") -> dict:
+    return {
+        prefix + entry.name: {"size": entry.stat().st_size, "sha256": _sha256(entry.path)}
+        for entry in sorted(os.scandir(path), key=lambda e: e.name)
+        if entry.is_file() and not entry.name.startswith(MANIFEST)
+    }
+
+
+def _checkpoint_files(path):
+    """(relative path, path) of every file in a checkpoint, in a stable order."""
+    for top, dirs, files in os.walk(path):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for filename in sorted(files):
+            if not filename.startswith("."):
+                file = os.path.join(top, filename)
+                yield os.path.relpath(file, path), file
+
+
+def checkpoint_sha256(path) -> str:
+    """SHA-256 over the names and contents of every file in a checkpoint."""
+    digest = hashlib.sha256()
+    for name, file in _checkpoint_files(path):
+        digest.update(name.encode("utf-8") + b"\0")
+        digest.update(bytes.fromhex(_sha256(file)))
+    return digest.hexdigest()
+
+
+def checkpoint_fingerprint(path) -> dict:
+    """Size and modification time of every file in a checkpoint, by name.
+
+    Cheap enough to check on every load, unlike checkpoint_sha256.
+    """
+    fingerprint = {}
+    for name, file in _checkpoint_files(path):
+        st = os.stat(file)
+        fingerprint[name] = [st.st_size, st.st_mtime_ns]
+    return fingerprint
+
+
+def checkpoint_changed(manifest) -> bool:
+    """Whether a converted model's checkpoint changed since its conversion.
+
+    False if the checkpoint is gone, or was converted before fingerprints
+    were recorded: there is nothing to compare against.
+    """
+    recorded = manifest.get("checkpoint_files")
+    source = manifest.get("source")
+    if recorded is None or not source or not os.path.isdir(source):
+        return False
+    return checkpoint_fingerprint(source) != recorded
+
+
+def _download(name, path, revision=None):
+    from faster_whisper.utils import download_model
+
+    download_model(name, output_dir=path, revision=revision)
+    shutil.rmtree(os.path.join(path, ".cache"), ignore_errors=True)  # hub bookkeeping
+
+
+def pull(name, source=None, revision=None, root=MODELS_DIR, download=_download) -> dict:
+    """Add model name to the store, from the hub or a local directory source.
+
+    The files are assembled beside the store entry and moved into place once
+    complete, replacing any earlier copy. Returns the manifest.
+    """
+    os.makedirs(root, exist_ok=True)
+    final = model_dir(name, root)
+    partial = final + ".partial"
+    shutil.rmtree(partial, ignore_errors=True)
+    try:
+        if source:
+            shutil.copytree(
+                os.path.expanduser(source), partial,
+                ignore=lambda d, names: [n for n in names if n.startswith(".")],
+            )
+        else:
+            os.makedirs(partial)
+            download(name, partial, revision)
+        if not os.path.isfile(os.path.join(partial, "model.bin")):
+            raise FileNotFoundError(f"no model.bin in {source or name}")
+        manifest = {
+            "name": name,
+            "source": os.path.abspath(os.path.expanduser(source)) if source else name,
+            "revision": revision,
+            "pulled": time.time(),
+            "files": _file_entries(partial),
+            "load_seconds": {},
+        }
+        _write_manifest(partial, manifest)
+    except BaseException:
+        shutil.rmtree(partial, ignore_errors=True)
+        raise
+    shutil.rmtree(final, ignore_errors=True)
+    os.replace(partial, final)
+    return manifest
+
+
+def _convert(checkpoint, output_dir, quantization):
+    import torch  # noqa: F401  (the converter needs both, but doesn't say so)
+    import transformers  # noqa: F401
+    from ctranslate2.converters import TransformersConverter
+
+    copy = [
+        f for f in ("tokenizer.json", "preprocessor_config.json")
+        if os.path.isfile(os.path.join(checkpoint, f))
+    ]
+    TransformersConverter(checkpoint, copy_files=copy).convert(
+        output_dir, quantization=quantization
+    )
+
+
+def convert(name, checkpoint, quantizations=DEFAULT_QUANTIZATIONS, root=MODELS_DIR,
+            run=_convert, report=None) -> dict:
+    """Store a CTranslate2 conversion of checkpoint per quantization, as name.
+
+    Variants converted earlier from a checkpoint with the same checksum are
+    kept; if the checksum differs, or name holds something else, the entry is
+    replaced, though the old files are only deleted once a new variant is in
+    place. Each variant is moved into place and recorded in the manifest
+    once complete. report(quantization, converted) is called for each.
+    Returns the manifest.
+    """
+    unknown = [q for q in quantizations if q not in QUANTIZATIONS]
+    if unknown:
+        raise ValueError(f"unknown quantization {unknown[0]!r}")
+    checkpoint = os.path.abspath(os.path.expanduser(checkpoint))
+    if not os.path.isdir(checkpoint):
+        raise FileNotFoundError(f"no checkpoint directory {checkpoint}")
+    fingerprint = checkpoint_fingerprint(checkpoint)
+    checksum = checkpoint_sha256(checkpoint)
+    path = model_dir(name, root)
+    manifest = read_manifest(name, root)
+    if manifest is None:
+        shutil.rmtree(path, ignore_errors=True)
+    replaced = manifest is not None and manifest.get("checkpoint_sha256") != checksum
+    if manifest is None or replaced:
+        manifest = {
+            "name": name,
+            "source": checkpoint,
+            "checkpoint_sha256": checksum,
+            "checkpoint_files": fingerprint,
+            "pulled": time.time(),
+            "variants": [],
+            "files": {},
+            "load_seconds": {},
+        }
+    os.makedirs(path, exist_ok=True)
+    for quantization in quantizations:
+        if quantization in manifest["variants"]:
+            if report:
+                report(quantization, False)
+            continue
+        final = os.path.join(path, quantization)
+        partial = final + ".partial"
+        shutil.rmtree(partial, ignore_errors=True)
+        try:
+            run(checkpoint, partial, quantization)
+        except BaseException:
+            shutil.rmtree(partial, ignore_errors=True)
+            raise
+        shutil.rmtree(final, ignore_errors=True)
+        os.replace(partial, final)
+        manifest["variants"].append(quantization)
+        manifest["files"].update(_file_entries(final, prefix=quantization + "/"))
+        _write_manifest(path, manifest)
+        if replaced:  # the old entry's files, now that the manifest no longer lists them
+            for entry in os.scandir(path):
+                if entry.name not in (MANIFEST, *manifest["variants"]):
+                    _remove(entry.path)
+            replaced = False
+        if report:
+            report(quantization, True)
+    if manifest["variants"] and manifest.get("checkpoint_files") != fingerprint:
+        manifest["checkpoint_files"] = fingerprint  # touched, same contents
+        _write_manifest(path, manifest)
+    return manifest
+
+
+def _remove(path):
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        os.remove(path)
+
+
+def stored(root=MODELS_DIR) -> list:
+    """Manifests of every model in the store, by name."""
+    try:
+        entries = os.listdir(root)
+    except FileNotFoundError:
+        return []
+    manifests = []
+    for entry in sorted(entries):
+        try:
+            with open(os.path.join(root, entry, MANIFEST)) as f:
+                manifests.append(json.load(f))
+        except (FileNotFoundError, NotADirectoryError, ValueError):
+            continue
+    return manifests
+
+
+def model_size(manifest) -> int:
+    return sum(f["size"] for f in manifest["files"].values())
+
+
+def verify(name, root=MODELS_DIR) -> list:
+    """Problems with a stored model's files; an empty list if it is intact."""
+    manifest = read_manifest(name, root)
+    if manifest is None:
+        return [f"{name} is not in the store"]
+    path = model_dir(name, root)
+    problems = []
+    for filename, expected in manifest["files"].items():
+        file = os.path.join(path, filename)
+        if not os.path.isfile(file):
+            problems.append(f"{filename} is missing")
+        elif os.path.getsize(file) != expected["size"]:
+            problems.append(f"{filename} has the wrong size")
+        elif _sha256(file) != expected["sha256"]:
+            problems.append(f"{filename} does not match its checksum")
+    return problems
+
+
+def remove(name, root=MODELS_DIR):
+    if read_manifest(name, root) is None:
+        raise FileNotFoundError(f"{name} is not in the store")
+    shutil.rmtree(model_dir(name, root))
+
+
+def record_load(name, key, seconds, root=MODELS_DIR):
+    """Note how long the last load of a stored model took, under key."""
+    manifest = read_manifest(name, root)
+    if manifest is None:
+        return
+    manifest.setdefault("load_seconds", {})[key] = round(seconds, 2)
+    try:
+        _write_manifest(model_dir(name, root), manifest)
+    except OSError:
+        pass  # a read-only store still loads
+
+
+def _megabytes(size):
+    return f"{size / 1e6:,.0f} MB"
+
+
+def cmd_pull(args):
+    for name in args.names:
+        print(f"Pulling {name}...", file=sys.stderr)
+        manifest = pull(name, source=args.source, revision=args.revision)
+        print(f"{name}: {_megabytes(model_size(manifest))} in {model_dir(name)}")
+
+
+def cmd_convert(args):
+    def report(quantization, converted):
+        state = "converted" if converted else "unchanged checkpoint, kept"
+        print(f"{args.name} {quantization}: {state}", file=sys.stderr)
+
+    manifest = convert(args.name, args.checkpoint, args.quantization.split(","),
+                       report=report)
+    print(f"{args.name}: {_megabytes(model_size(manifest))} in {model_dir(args.name)}")
+
+
+def cmd_list(args):
+    manifests = stored()
+    if not manifests:
+        print(f"No models in {MODELS_DIR}. Add one with: stt model pull NAME",
+              file=sys.stderr)
+        return
+    print(f"{'model':<28} {'size':>10}  load time")
+    for m in manifests:
+        loads = ", ".join(f"{k} {v:.1f}s" for k, v in sorted(m.get("load_seconds", {}).items()))
+        print(f"{m['name']:<28} {_megabytes(model_size(m)):>10}  {loads or '-'}")
+        if m.get("variants"):
+            print(f"  variants: {', '.join(m['variants'])}")
+
+
+def cmd_verify(args) -> bool:
+    names = args.names or [m["name"] for m in stored()]
+    ok = True
+    for name in names:
+        problems = verify(name)
+        print(f"{name}: {'ok' if not problems else '; '.join(problems)}")
+        ok = ok and not problems
+    return ok
+
+
+def cmd_rm(args):
+    for name in args.names:
+        remove(name)
+        print(f"Removed {name}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="stt model", description=f"Manage the local model store ({MODELS_DIR})"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    p = commands.add_parser("pull", help="Download a model into the store")
+    p.add_argument("names", nargs="+", metavar="NAME",
+                   help="Model size (e.g. small.en) or Hugging Face ID")
+    p.add_argument("--from", dest="source", metavar="DIR",
+                   help="Copy a CTranslate2 model directory instead of downloading")
+    p.add_argument("--revision", help="Hub revision to download (default: latest)")
+    p = commands.add_parser(
+        "convert", help="Convert a Transformers checkpoint, one variant per quantization"
+    )
+    p.add_argument("name", help="Name to load it by (e.g. stt-daemon -m NAME)")
+    p.add_argument("checkpoint", help="Directory of a Transformers Whisper checkpoint")
+    p.add_argument(
+        "-q", "--quantization", default=",".join(DEFAULT_QUANTIZATIONS),
+        help=f"Comma-separated quantizations (default: {','.join(DEFAULT_QUANTIZATIONS)})",
+    )
+    commands.add_parser("list", help="List stored models with size and load times")
+    p = commands.add_parser("verify", help="Check stored files against their checksums")
+    p.add_argument("names", nargs="*", metavar="NAME", help="Models to check (default: all)")
+    p = commands.add_parser("rm", help="Delete a model from the store")
+    p.add_argument("names", nargs="+", metavar="NAME")
+    args = parser.parse_args(argv)
+
+    if getattr(args, "source", None) and len(args.names) > 1:
+        parser.error("--from takes one model name")
+    try:
+        if args.command == "pull":
+            cmd_pull(args)
+        elif args.command == "convert":
+            cmd_convert(args)
+        elif args.command == "list":
+            cmd_list(args)
+        elif args.command == "verify":
+            if not cmd_verify(args):
+                sys.exit(1)
+        elif args.command == "rm":
+            cmd_rm(args)
+    except ImportError as e:
+        print(f"stt model {args.command}: {e} (converting needs the convert extra:"
+              " uv tool install -e '.[convert]')", file=sys.stderr)
+        sys.exit(1)
+    except (OSError, ValueError) as e:
+        print(f"stt model {args.command}: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,81 @@
-"""Wrappers for text input, notifications, and sound playback."""
+"""Wrappers for text input, notifications, and sound playback.
 
+Text output shells out to xdotool/bspc/xclip by default. Processes call
+use_x11() once to switch to an in-process X11 connection (stt.x11); the
+tools remain the fallback whenever that backend is unavailable or fails.
+
+Notifications go straight to the session bus (stt.dbus) without waiting for
+a reply, falling back to dunstify. use_cues() likewise preloads the start/stop
+sounds (stt.cues) in place of a paplay per beep.
+"""
+
+import atexit
+import os
 import subprocess
 
 from stt.compat import WINDOWS
-from stt.config import NOTIFY_ID
+from stt.config import CUES, NOTIFY_ID, NOTIFY_MIN_INTERVAL
+from stt.log import setup_logging
+from stt.trace import span
+
+log = setup_logging("stt.output")
+
+_x11 = None
+_x11_clipboard = True
+_notifier = None
+_cues = None
+
+
+def use_x11(clipboard=True) -> bool:
+    """Route typing, pasting and the clipboard through a persistent X11 connection.
+
+    The clipboard is then owned by this process, so processes that exit
+    right after the paste (stt-transcribe) pass clipboard=False to keep
+    xclip, which stays behind to serve it; window activation, keys and
+    bspwm still go over the connection. Returns False, leaving the
+    subprocess path in place, when python-xlib, the display or its XTEST
+    extension is missing.
+    """
+    global _x11, _x11_clipboard
+    _x11_clipboard = clipboard
+    if _x11 is None and not WINDOWS and os.environ.get("DISPLAY"):
+        try:
+            from stt.x11 import X11
+
+            _x11 = X11()
+            log.info("using in-process X11 output")
+        except Exception as e:
+            log.info("X11 backend unavailable, using xdotool/xclip: %s", e)
+    return _x11 is not None
+
+
+def _run(cmd, **kwargs):
+    """subprocess.run with a trace span named after the tool and subcommand."""
+    with span(" ".join(cmd[:2])):
+        return subprocess.run(cmd, **kwargs)
 
 
 def type_text(text, window_id=None):
     if not text:
         return
+    with span("output.type_text"):
+        _type_text(text, window_id)
+
+
+def _type_text(text, window_id):
+    if _x11:
+        try:
+            _type_text_x11(text, window_id)
+            return
+        except Exception as e:
+            from stt.x11 import TypingError
+
+            # Only the characters not yet typed: the rest already reached the window
+            if isinstance(e, TypingError):
+                text = text[e.sent:]
+            log.warning("X11 typing failed, falling back to xdotool: %s", e)
+            if not text:
+                return
     if WINDOWS:
         from pynput.keyboard import Controller
         Controller().type(text)
@@ -16,46 +83,112 @@ def type_text(text, window_id=None):
         # Text must already be on clipboard. Temporarily disable BSPWM's
         # focus_follows_pointer so it can't steal focus during the paste,
         # then activate target → ctrl+v → restore → re-enable.
-        cur = subprocess.run(
+        cur = _run(
             ["xdotool", "getactivewindow"],
             capture_output=True, text=True, check=False,
         )
         cur_id = cur.stdout.strip()
-        ffp = subprocess.run(
+        ffp = _run(
             ["bspc", "config", "focus_follows_pointer"],
             capture_output=True, text=True, check=False,
         )
         had_ffp = ffp.stdout.strip() == "true"
         try:
             if had_ffp:
-                subprocess.run(
+                _run(
                     ["bspc", "config", "focus_follows_pointer", "false"],
                     check=False,
                 )
-            subprocess.run([
+            _run([
                 "xdotool",
                 "windowactivate", "--sync", window_id,
                 "key", "--clearmodifiers", "ctrl+shift+v",
             ], check=False)
             if cur_id and cur_id != window_id:
-                subprocess.run([
+                _run([
                     "xdotool", "windowactivate", "--sync", cur_id,
                 ], check=False)
         finally:
             if had_ffp:
-                subprocess.run(
+                _run(
                     ["bspc", "config", "focus_follows_pointer", "true"],
                     check=False,
                 )
     else:
-        subprocess.run(
+        _run(
             ["xdotool", "type", "--clearmodifiers", "--", text], check=False,
         )
 
 
+def _type_text_x11(text, window_id):
+    from stt.x11 import bspc
+
+    if not window_id:
+        with span("x11 type"):
+            _x11.type(text)
+        return
+    # Same sequence as the xdotool path below, without spawning anything
+    target = int(window_id, 0)
+    cur_id = _x11.active_window()
+    had_ffp = (bspc("config", "focus_follows_pointer") or "").strip() == "true"
+    try:
+        if had_ffp:
+            bspc("config", "focus_follows_pointer", "false")
+        with span("x11 paste"):
+            _x11.activate(target)
+            _x11.key("ctrl+shift+v")
+            if cur_id and cur_id != target:
+                _x11.activate(cur_id)
+    finally:
+        if had_ffp:
+            bspc("config", "focus_follows_pointer", "true")
+
+
+def backspace(count):
+    """Erase count characters before the cursor in the focused window."""
+    if count <= 0:
+        return
+    with span("output.backspace"):
+        _backspace(count)
+
+
+def _backspace(count):
+    if _x11:
+        try:
+            while count:
+                _x11.key("BackSpace")
+                count -= 1
+            return
+        except Exception as e:
+            # Only the backspaces not yet sent: the rest already erased text
+            log.warning("X11 backspace failed, falling back to xdotool: %s", e)
+    if WINDOWS:
+        from pynput.keyboard import Controller, Key
+
+        keyboard = Controller()
+        for _ in range(count):
+            keyboard.tap(Key.backspace)
+    else:
+        _run(
+            ["xdotool", "key", "--clearmodifiers", "--repeat", str(count), "BackSpace"],
+            check=False,
+        )
+
+
 def copy_to_clipboard(text):
     if not text:
         return
+    with span("output.copy_to_clipboard"):
+        _copy_to_clipboard(text)
+
+
+def _copy_to_clipboard(text):
+    if _x11 and _x11_clipboard:
+        try:
+            _x11.set_clipboard(text)
+            return
+        except Exception as e:
+            log.warning("X11 clipboard failed, falling back to xclip: %s", e)
     if WINDOWS:
         subprocess.run(
             ["powershell", "-Command", f"Set-Clipboard -Value '{text}'"],
@@ -72,6 +205,42 @@ def copy_to_clipboard(text):
 
 
 def notify(title, body, timeout=2000, urgency="low"):
+    with span("output.notify", body=body[:40]):
+        _notify(title, body, timeout, urgency)
+
+
+def _dbus_notify(title, body, timeout, urgency) -> bool:
+    """Notify over D-Bus; False means the caller should use dunstify."""
+    global _notifier
+    if _notifier is None:
+        from stt.dbus import DBusError, Notifier
+
+        try:
+            _notifier = Notifier(
+                replaces_id=int(NOTIFY_ID), min_interval=NOTIFY_MIN_INTERVAL
+            )
+        except (OSError, DBusError) as e:
+            log.debug("D-Bus notifications unavailable, using dunstify: %s", e)
+            _notifier = False
+            return False
+        atexit.register(_notifier.flush)
+    if not _notifier:
+        return False
+    from stt.dbus import DBusError
+
+    try:
+        _notifier.notify(title, body, timeout, urgency)
+        return True
+    except (OSError, DBusError) as e:
+        log.warning("D-Bus notification failed, using dunstify: %s", e)
+        _notifier.close()
+        _notifier = None
+        return False
+
+
+def _notify(title, body, timeout, urgency):
+    if not WINDOWS and _dbus_notify(title, body, timeout, urgency):
+        return
     if WINDOWS:
         # PowerShell toast notification
         ps = (
@@ -97,6 +266,33 @@ def notify(title, body, timeout=2000, urgency="low"):
 
 
 def play_sound(path):
+    with span("output.play_sound"):
+        _play_sound(path)
+
+
+def use_cues() -> bool:
+    """Decode the cue sounds once and play them through an open output stream.
+
+    For long-lived processes; returns False, leaving paplay in place, when the
+    output device or cue files are unavailable.
+    """
+    global _cues
+    if _cues is None and not WINDOWS:
+        try:
+            from stt.cues import CuePlayer
+
+            _cues = CuePlayer(CUES)
+            log.info("preloaded cues: %s", ", ".join(_cues.cues))
+        except Exception as e:
+            log.info("in-memory cues unavailable, using paplay: %s", e)
+    return _cues is not None
+
+
+def _play_sound(path):
+    if _cues:
+        name = next((n for n, p in CUES.items() if p and p == path), None)
+        if name and _cues.play(name):
+            return
     if WINDOWS:
         import winsound
         winsound.MessageBeep()
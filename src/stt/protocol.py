@@ -0,0 +1,78 @@
+"""Wire format shared by stt-daemon and its clients.
+
+A request is one message: "<verb>" or "<verb> <arg>". The argument is either
+a plain path (the original format, still accepted) or a JSON object:
+
+  transcribe /tmp/a.wav
+  transcribe {"path": "/tmp/a.wav"}
+  transcribe {"size": 12345}\\n<12345 bytes of audio file data>
+
+A request with "size" carries the audio inline: its header ends at the first
+newline and is followed by exactly that many bytes.
+
+The same requests are served over a unix socket or, with `stt-daemon
+--listen`, TCP. Addresses are written as a socket path or "host:port".
+
+A transcription with no text is answered with EMPTY_TRANSCRIPT (a single
+newline) rather than nothing, so a connection that closes before the first
+reply byte always means the daemon went away.
+"""
+
+import json
+
+MAX_HEADER = 65536
+EMPTY_TRANSCRIPT = b"\n"
+
+
+def encode_request(verb: str, path: str | None = None, data: bytes | None = None,
+                   **options) -> bytes:
+    """Build a request. Uses the plain "<verb> <path>" form when possible."""
+    if data is None and not options:
+        return (f"{verb} {path}" if path else verb).encode("utf-8")
+    args = dict(options)
+    if path is not None:
+        args["path"] = path
+    if data is not None:
+        args["size"] = len(data)
+    header = f"{verb} {json.dumps(args)}".encode("utf-8")
+    if data is None:
+        return header
+    return header + b"\n" + data
+
+
+def parse_request(raw: bytes) -> tuple[str, dict, bytes]:
+    """Split a request into (verb, args, payload_start).
+
+    payload_start holds any inline audio bytes that arrived with the header;
+    the caller reads the remaining args["size"] - len(payload_start) bytes.
+    """
+    head, sep, rest = raw.partition(b"\n")
+    if not sep:
+        rest = b""
+    text = head.decode("utf-8").strip()
+    verb, _, arg = text.partition(" ")
+    arg = arg.strip()
+    if arg.startswith("{"):
+        args = json.loads(arg)
+        if not isinstance(args, dict):
+            raise ValueError("request arguments must be a JSON object")
+    elif arg:
+        args = {"path": arg}
+    else:
+        args = {}
+    return verb, args, rest
+
+
+def parse_address(text: str):
+    """Return a unix socket path as-is, or "host:port" as (host, port)."""
+    if "/" in text:
+        return text
+    host, sep, port = text.rpartition(":")
+    if not sep or not port.isdigit():
+        raise ValueError(f"expected a socket path or host:port, got {text!r}")
+    return host.strip("[]") or "127.0.0.1", int(port)
+
+
+def transcript_text(reply: str) -> str:
+    """The text of a transcribe reply: "" for EMPTY_TRANSCRIPT."""
+    return "" if reply == EMPTY_TRANSCRIPT.decode() else reply
@@ -0,0 +1,279 @@
+"""Router mode: one endpoint in front of several stt-daemons.
+
+`stt-daemon --route host:port --route host:port ...` serves the normal
+protocol without loading a model, and forwards each transcription to the
+backend daemon with the fewest outstanding requests (backends run with
+--listen HOST:PORT). Backends are pinged every HEALTH_INTERVAL seconds; an
+unhealthy one is only tried when no healthy backend is left. If a backend
+fails before its reply starts (including closing the connection without a
+reply byte), or replies with an error about its own state (its model failed
+to load, a worker died), the request is retried on the next one; once reply bytes have reached the client it cannot be, and the
+client gets an error line instead. Other error replies are relayed and
+counted as errors.
+
+Audio given by path is read here and sent inline, since backends on other
+hosts cannot open the client's files. A client disconnecting closes the
+connection to its backend, which cancels the decode there; "cancel <id>" is
+passed to every backend. "reload" reloads the backends one after another,
+stopping at the first that fails.
+"""
+
+import asyncio
+import json
+import os
+import time
+
+from stt.aio import Client, open_connection
+from stt.config import HEALTH_INTERVAL
+from stt.log import setup_logging
+from stt.metrics import Metrics
+from stt.protocol import MAX_HEADER, encode_request, parse_request
+
+log = setup_logging("stt.router")
+
+CONNECT_TIMEOUT = 2.0
+# Error replies that say the backend cannot serve, not that the request is bad
+BACKEND_ERRORS = (b"ERROR: model failed to load", b"ERROR: not ready", b"ERROR: worker")
+
+
+def _label(address) -> str:
+    return f"{address[0]}:{address[1]}" if isinstance(address, tuple) else address
+
+
+class Backend:
+    """One stt-daemon behind the router, with its load and health."""
+
+    def __init__(self, address):
+        self.address = address
+        self.label = _label(address)
+        self.healthy = True  # until a health check says otherwise
+        self.outstanding = 0
+        self.requests = 0
+        self.failures = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "address": self.label,
+            "healthy": self.healthy,
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "failures": self.failures,
+        }
+
+
+class Router:
+    """Accepts daemon requests and forwards them to backend daemons."""
+
+    def __init__(self, backends, health_interval=HEALTH_INTERVAL, metrics=None):
+        self.backends = [Backend(address) for address in backends]
+        self.health_interval = health_interval
+        self.metrics = metrics or Metrics()
+        self.stopping = asyncio.Event()
+        self.servers = []
+
+    async def start(self, address):
+        if isinstance(address, tuple):
+            server = await asyncio.start_server(self.handle_client, *address, backlog=128)
+        else:
+            server = await asyncio.start_unix_server(
+                self.handle_client, path=address, backlog=128
+            )
+        self.servers.append(server)
+
+    async def serve_until_stopped(self):
+        health = asyncio.create_task(self._health_loop())
+        await self.stopping.wait()
+        health.cancel()
+        for server in self.servers:
+            server.close()
+
+    def stop(self):
+        self.stopping.set()
+
+    def pick(self, exclude=()):
+        """The least-loaded backend not in exclude, preferring healthy ones."""
+        candidates = [b for b in self.backends if b not in exclude]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda b: (not b.healthy, b.outstanding, b.requests))
+
+    async def check(self, backend):
+        up = await Client(backend.address, timeout=CONNECT_TIMEOUT).ping()
+        if up != backend.healthy:
+            log.warning("backend %s is %s", backend.label, "up" if up else "down")
+        backend.healthy = up
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.gather(*(self.check(b) for b in self.backends))
+            await asyncio.sleep(self.health_interval)
+
+    async def handle_client(self, reader, writer):
+        try:
+            raw = await reader.read(MAX_HEADER)
+            if not raw.strip():
+                return
+            verb, args, payload = parse_request(raw)
+
+            if verb == "ping":
+                writer.write(b"pong")
+            elif verb == "stats":
+                stats = self.metrics.snapshot()
+                stats["model_ready"] = any(b.healthy for b in self.backends)
+                stats["backends"] = [b.snapshot() for b in self.backends]
+                writer.write(json.dumps(stats).encode("utf-8"))
+            elif verb == "wait-ready":
+                await self.forward(writer, raw)
+            elif verb == "cancel":
+                writer.write(await self._cancel(raw))
+            elif verb == "reload":
+                writer.write(await self._reload(raw))
+            elif verb == "shutdown":
+                writer.write(b"ok")
+                log.info("shutdown requested")
+                self.stop()
+            elif verb in ("transcribe", "stream"):
+                request = await self._inline(reader, verb, args, payload)
+                await self._forward_until_disconnect(reader, writer, request, verb)
+            else:
+                writer.write(b"ERROR: unknown command")
+            await writer.drain()
+        except Exception as e:
+            log.error("client error: %s", e)
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+    async def _inline(self, reader, verb, args, payload) -> bytes:
+        """Re-encode the request with its audio carried inline."""
+        options = {k: v for k, v in args.items() if k not in ("path", "size")}
+        if "size" in args:
+            size = int(args["size"])
+            if len(payload) < size:
+                payload += await reader.readexactly(size - len(payload))
+            data = payload[:size]
+        elif "path" in args:
+            data = await asyncio.to_thread(_read_file, args["path"])
+        else:
+            raise ValueError("request has no path or audio data")
+        return encode_request(verb, data=data, **options)
+
+    async def _cancel(self, raw) -> bytes:
+        """Send a cancel to every backend; ok if one of them knew the ID."""
+        async def send(backend):
+            try:
+                return await Client(backend.address, timeout=CONNECT_TIMEOUT).request(raw)
+            except (OSError, asyncio.TimeoutError):
+                return ""
+
+        replies = await asyncio.gather(*(send(b) for b in self.backends))
+        return b"ok" if "ok" in replies else b"ERROR: no such request"
+
+    async def _reload(self, raw) -> bytes:
+        for backend in self.backends:
+            try:
+                client = Client(backend.address, timeout=CONNECT_TIMEOUT)
+                reply = await client.request(raw, timeout=None)
+            except (OSError, asyncio.TimeoutError) as e:
+                reply = f"ERROR: {e or type(e).__name__}"
+            if reply != "ok":
+                reply = reply.removeprefix("ERROR: ")
+                return f"ERROR: backend {backend.label}: {reply}".encode("utf-8")
+        return b"ok"
+
+    async def _forward_until_disconnect(self, reader, writer, request, kind):
+        """Forward request, abandoning it if the client hangs up first."""
+        forwarding = asyncio.ensure_future(self._forward_timed(writer, request, kind))
+        watch = asyncio.ensure_future(_until_closed(reader))
+        try:
+            await asyncio.wait({forwarding, watch}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            watch.cancel()
+        if not forwarding.done():
+            log.info("client disconnected; abandoning %s", kind)
+            forwarding.cancel()
+        try:
+            await forwarding
+        except asyncio.CancelledError:
+            pass
+
+    async def _forward_timed(self, writer, request, kind):
+        accepted = time.monotonic()
+        self.metrics.begin(kind)
+        try:
+            if not await self.forward(writer, request):
+                self.metrics.error(kind)
+        finally:
+            self.metrics.end(time.monotonic() - accepted)
+
+    async def forward(self, writer, request) -> bool:
+        """Relay request to backends until one replies; False on an error reply."""
+        tried = []
+        error = b"ERROR: no backend available"
+        while (backend := self.pick(tried)) is not None:
+            tried.append(backend)
+            backend.outstanding += 1
+            backend.requests += 1
+            w = None
+            try:
+                try:
+                    r, w = await asyncio.wait_for(
+                        open_connection(backend.address), CONNECT_TIMEOUT
+                    )
+                    w.write(request)
+                    await w.drain()
+                    chunk = await r.read(65536)
+                except (OSError, asyncio.TimeoutError) as e:
+                    backend.failures += 1
+                    backend.healthy = False
+                    log.warning("backend %s failed: %s", backend.label, e or type(e).__name__)
+                    continue
+                if not chunk:
+                    # Daemons always reply (EMPTY_TRANSCRIPT for no text), so
+                    # EOF here means the backend died with the request
+                    backend.failures += 1
+                    backend.healthy = False
+                    error = f"ERROR: backend {backend.label} closed the connection".encode()
+                    log.warning("backend %s closed the connection without replying",
+                                backend.label)
+                    continue
+                if chunk.startswith(BACKEND_ERRORS):
+                    backend.failures += 1
+                    backend.healthy = False
+                    error = chunk.rstrip(b"\n")
+                    log.warning("backend %s cannot serve: %s", backend.label,
+                                error.decode("utf-8", "replace"))
+                    continue
+                failed = chunk.startswith(b"ERROR:")
+                try:
+                    while chunk:
+                        writer.write(chunk)
+                        await writer.drain()
+                        chunk = await r.read(65536)
+                except OSError as e:
+                    # Part of the reply is already out; too late to fail over
+                    log.warning("relay from %s broke off: %s", backend.label, e)
+                    writer.write(f"\nERROR: backend {backend.label} failed".encode("utf-8"))
+                    return False
+                return not failed
+            finally:
+                if w is not None:
+                    w.close()  # also tells the backend to stop if we were cancelled
+                backend.outstanding -= 1
+        writer.write(error)
+        return False
+
+
+async def _until_closed(reader):
+    try:
+        await reader.read()
+    except OSError:
+        pass
+
+
+def _read_file(path) -> bytes:
+    with open(os.path.expanduser(path), "rb") as f:
+        return f.read()
@@ -0,0 +1,186 @@
+"""Priority scheduling of decode slots in the daemon.
+
+Each request is "interactive" (push-to-talk dictation, the default) or "bulk"
+(long files from batch jobs). The daemon has a fixed number of decode slots,
+one per inference worker; when a slot frees up it goes to the waiting request
+with the best rank, which is its class (interactive 0, bulk 1) minus one for
+every `aging` seconds it has waited. Interactive work therefore goes first,
+but bulk work that has waited `aging` seconds competes with fresh dictation,
+so it cannot starve.
+
+The daemon splits bulk audio into chunks that each take a slot of their own,
+so a dictation waits for at most one chunk of an hour-long file.
+
+A request can also carry a CancelToken. A request cancelled while it waits
+leaves the queue without being decoded; one cancelled while it decodes stops
+at the next segment (see core.decode_timed).
+"""
+
+import asyncio
+import itertools
+import threading
+import time
+from contextlib import asynccontextmanager
+
+import numpy as np
+
+from stt.config import AGING_SECONDS, WHISPER_RATE
+from stt.core import Cancelled
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+RANKS = {INTERACTIVE: 0, BULK: 1}
+
+
+def check_priority(priority) -> str:
+    """Return priority, defaulting to interactive; ValueError if unknown."""
+    if priority is None:
+        return INTERACTIVE
+    if priority not in RANKS:
+        raise ValueError(f"unknown priority {priority!r} (use {' or '.join(RANKS)})")
+    return priority
+
+
+class CancelToken:
+    """Cancellation state of one request, shared with the thread decoding it.
+
+    Set by cancel() (the cancel verb, a client disconnecting) or, if deadline
+    seconds were given, once they have passed. cancel() must be called on the
+    event loop; is_set() may be called from any thread.
+    """
+
+    def __init__(self, deadline=None):
+        self.expires = None if deadline is None else time.monotonic() + deadline
+        self.flag = threading.Event()
+        self.event = asyncio.Event()
+        self._reason = None
+
+    @property
+    def reason(self) -> str:
+        return self._reason or "deadline passed"
+
+    def cancel(self, reason="cancelled"):
+        if not self.flag.is_set():
+            self._reason = reason
+            self.flag.set()
+            self.event.set()
+
+    def is_set(self) -> bool:
+        return self.flag.is_set() or (
+            self.expires is not None and time.monotonic() >= self.expires
+        )
+
+    async def wait(self):
+        """Return once the token is cancelled or its deadline passes."""
+        timeout = None if self.expires is None else max(0.0, self.expires - time.monotonic())
+        try:
+            await asyncio.wait_for(self.event.wait(), timeout)
+        except asyncio.TimeoutError:
+            self.cancel("deadline passed")
+
+
+async def unless_cancelled(aw, cancel):
+    """Await aw, abandoning it and raising Cancelled if cancel is set first."""
+    if cancel is None:
+        return await aw
+    task = asyncio.ensure_future(aw)
+    watch = asyncio.ensure_future(cancel.wait())
+    try:
+        await asyncio.wait({task, watch}, return_when=asyncio.FIRST_COMPLETED)
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
+    finally:
+        watch.cancel()
+    if task.done():
+        return task.result()
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    raise Cancelled(cancel.reason)
+
+
+class Scheduler:
+    """Hands out `slots` decode slots to waiting requests by aged priority."""
+
+    def __init__(self, slots=1, aging=AGING_SECONDS):
+        self.free = slots
+        self.aging = aging
+        self.waiting = []
+        self.order = itertools.count()
+
+    def _rank(self, entry, now):
+        rank, seq, enqueued, _ = entry
+        return rank - (now - enqueued) / self.aging, seq
+
+    async def acquire(self, priority) -> float:
+        """Wait for a slot; returns the seconds spent waiting."""
+        if self.free and not self.waiting:
+            self.free -= 1
+            return 0.0
+        fut = asyncio.get_running_loop().create_future()
+        entry = (RANKS[priority], next(self.order), time.monotonic(), fut)
+        self.waiting.append(entry)
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.cancelled():
+                self.waiting.remove(entry)
+            else:
+                self.release()  # granted just as we were cancelled
+            raise
+        return time.monotonic() - entry[2]
+
+    def release(self):
+        if not self.waiting:
+            self.free += 1
+            return
+        now = time.monotonic()
+        entry = min(self.waiting, key=lambda e: self._rank(e, now))
+        self.waiting.remove(entry)
+        entry[3].set_result(None)
+
+    @asynccontextmanager
+    async def slot(self, priority, on_wait=None, cancel=None):
+        """Hold a slot for the body; on_wait(priority, seconds) gets the wait.
+
+        Raises Cancelled, without taking a slot, if cancel is set first.
+        """
+        waited = await unless_cancelled(self.acquire(priority), cancel)
+        if on_wait:
+            on_wait(priority, waited)
+        try:
+            yield
+        finally:
+            self.release()
+
+
+def chunk_bounds(audio, chunk_seconds, search_seconds=5.0, rate=WHISPER_RATE) -> list:
+    """Split points for audio into chunks of at most chunk_seconds.
+
+    Each cut is placed in the quietest 100 ms window of the last
+    search_seconds before the limit (at most the second half of the chunk),
+    to avoid splitting a word, and early enough that the last chunk is at
+    least half a chunk long. Returns a
+    list of (start, end) sample indices.
+    """
+    limit = int(chunk_seconds * rate)
+    window = rate // 10
+    bounds = []
+    start = 0
+    while len(audio) - start > limit:
+        lo = start + max(limit // 2, limit - int(search_seconds * rate))
+        hi = min(start + limit, len(audio) - limit // 2)  # no tiny last chunk
+        frames = (hi - lo) // window
+        if frames < 1:
+            cut = hi
+        else:
+            region = audio[lo:lo + frames * window]
+            energy = np.square(region).reshape(frames, window).mean(axis=1)
+            cut = lo + int(np.argmin(energy)) * window + window // 2
+        bounds.append((start, cut))
+        start = cut
+    bounds.append((start, len(audio)))
+    return bounds
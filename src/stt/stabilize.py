@@ -0,0 +1,91 @@
+"""Commit words from successive partial transcripts of one utterance.
+
+Continuous mode re-decodes the utterance in progress every so often. A word
+is committed (typed) once `agreement` consecutive hypotheses agree on every
+word up to and including it; the unstable tail is held back until it settles
+or the utterance ends. Words are compared ignoring case and punctuation, so
+"world" settling into "world." does not count as a disagreement.
+
+When the final decode disagrees with words already typed, the default is to
+leave them and type only the rest; with corrections=True the divergent words
+are erased (backspaced) and retyped.
+"""
+
+import re
+
+
+def _norm(word) -> str:
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+def _common_prefix(a, b) -> int:
+    n = 0
+    for x, y in zip(a, b):
+        if _norm(x) != _norm(y):
+            break
+        n += 1
+    return n
+
+
+class Stabilizer:
+    """Turns partial and final transcripts into (erase, type) edits.
+
+    Each method returns (erase, text): the number of characters to backspace,
+    then the text to type.
+    """
+
+    def __init__(self, agreement=2, corrections=False):
+        self.agreement = max(1, agreement)
+        self.corrections = corrections
+        self.reset()
+
+    def reset(self):
+        self.history = []
+        self.committed = []
+
+    @property
+    def typed(self) -> str:
+        return " ".join(self.committed)
+
+    def _append(self, words) -> tuple[int, str]:
+        if not words:
+            return 0, ""
+        text = " ".join(words)
+        if self.committed:
+            text = " " + text
+        self.committed.extend(words)
+        return 0, text
+
+    def update(self, text) -> tuple[int, str]:
+        """Feed a partial hypothesis; type whatever has now stabilized."""
+        words = text.split()
+        self.history = (self.history + [words])[-self.agreement:]
+        if len(self.history) < self.agreement:
+            return 0, ""
+        stable = min(
+            _common_prefix(words, other) for other in self.history[:-1]
+        ) if self.agreement > 1 else len(words)
+        # Only extend: a disagreement with typed words waits for finish()
+        if _common_prefix(words, self.committed) < len(self.committed):
+            return 0, ""
+        return self._append(words[len(self.committed):stable])
+
+    def finish(self, text) -> tuple[int, str]:
+        """Feed the utterance's final transcript and reset.
+
+        Types the rest of the utterance plus a space separating it from the
+        next one.
+        """
+        words = text.split()
+        keep = _common_prefix(words, self.committed)
+        erase = 0
+        if keep < len(self.committed) and self.corrections:
+            erase = len(self.typed) - len(" ".join(self.committed[:keep]))
+            self.committed = self.committed[:keep]
+        else:
+            keep = len(self.committed)
+        _, rest = self._append(words[keep:])
+        if self.committed:
+            rest += " "
+        self.reset()
+        return erase, rest
@@ -1,6 +1,8 @@
 """Hotkey toggle for speech-to-text. Python rewrite of stt-toggle bash script.
 
 First press:  beep + notification, start recording.
+The beeps are played by stt-daemon from memory when it is running, and with
+`stt-daemon --capture` it records from its always-open microphone too.
 Second press: beep + notification, stop recording, transcribe, type.
 """
 
@@ -15,11 +17,13 @@ from stt.config import (
     SND_STOP,
     TOGGLE_LOCK,
     TOGGLE_PIDFILE,
+    TOGGLE_TRACEID,
     TOGGLE_WAVPATH,
     TOGGLE_WINDOWID,
 )
 from stt.log import setup_logging
 from stt.output import notify, play_sound
+from stt.trace import new_trace_id, set_current, span
 
 log = setup_logging("stt.toggle")
 
@@ -42,11 +46,44 @@ def _remove(*paths):
 
 def _stop():
     """Stop recording, transcribe, type."""
-    log.info("STOP pressed")
-    play_sound(SND_STOP)
-    notify("STT", "Transcribing...", timeout=2000)
+    trace_id = _read_file(TOGGLE_TRACEID)
+    set_current(trace_id)
+    log.info("STOP pressed (trace=%s)", trace_id)
+    with span("toggle.stop"):
+        _stop_recording(trace_id)
+
+
+def _daemon_ok(request, timeout=0.5) -> bool:
+    """Send a quick request to the daemon; True if it replied "ok"."""
+    from stt.client import daemon_send
+
+    try:
+        return daemon_send(request, timeout=timeout) == "ok"
+    except OSError:
+        return False
+
+
+def _cue(name, path):
+    """Play a beep through the daemon's open output stream, else paplay."""
+    with span("toggle.cue"):
+        if _daemon_ok(f"cue {name}"):
+            return
+    play_sound(path)
+
 
+def _stop_recording(trace_id):
+    wavfile = _read_file(TOGGLE_WAVPATH)
     pid_str = _read_file(TOGGLE_PIDFILE)
+    if not pid_str:
+        # No recorder process: the daemon's capture stream is recording.
+        # Stop it before the beep so the beep isn't in the recording.
+        with span("toggle.record_stop"):
+            if not _daemon_ok(f"record-stop {wavfile}", timeout=5.0):
+                log.warning("daemon could not save the recording")
+
+    _cue("stop", SND_STOP)
+    notify("STT", "Transcribing...", timeout=2000)
+
     if pid_str:
         pid = int(pid_str)
         log.debug("killing recorder PID=%d", pid)
@@ -55,23 +92,25 @@ def _stop():
         except ProcessLookupError:
             pass
         # Wait for process to exit
-        for _ in range(50):
-            try:
-                os.kill(pid, 0)
-            except ProcessLookupError:
-                break
-            time.sleep(0.1)
+        with span("toggle.wait_recorder"):
+            for _ in range(50):
+                try:
+                    os.kill(pid, 0)
+                except ProcessLookupError:
+                    break
+                time.sleep(0.1)
         log.debug("recorder exited")
 
     _remove(TOGGLE_LOCK, TOGGLE_PIDFILE)
 
-    wavfile = _read_file(TOGGLE_WAVPATH)
     window_id = _read_file(TOGGLE_WINDOWID)
-    _remove(TOGGLE_WAVPATH, TOGGLE_WINDOWID)
+    _remove(TOGGLE_WAVPATH, TOGGLE_WINDOWID, TOGGLE_TRACEID)
     if wavfile and os.path.exists(wavfile):
         cmd = ["stt-transcribe", wavfile]
         if window_id:
             cmd += ["--window", window_id]
+        if trace_id:
+            cmd += ["--trace", trace_id]
         log.debug("launching transcribe for %s (window=%s)", wavfile, window_id)
         subprocess.Popen(
             cmd,
@@ -84,27 +123,24 @@ def _stop():
 
 
 def _start():
-    """Ensure daemon, start recording."""
-    log.info("START pressed")
+    """Start recording, then make sure the daemon is up."""
+    trace_id = new_trace_id()
+    set_current(trace_id)
+    with open(TOGGLE_TRACEID, "w") as f:
+        f.write(trace_id)
+    log.info("START pressed (trace=%s)", trace_id)
+    with span("toggle.start"):
+        _start_recording(trace_id)
 
-    # Ensure daemon is running
-    from stt.client import daemon_running
-
-    if not daemon_running():
-        notify("STT", "Starting daemon...", timeout=3000, urgency="normal")
-        subprocess.run(
-            ["stt", "start"],
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-        )
-        time.sleep(3)
 
+def _start_recording(trace_id):
     # Capture focused window before any notifications steal focus
     try:
-        result = subprocess.run(
-            ["xdotool", "getactivewindow"],
-            capture_output=True, text=True, check=True,
-        )
+        with span("xdotool getactivewindow"):
+            result = subprocess.run(
+                ["xdotool", "getactivewindow"],
+                capture_output=True, text=True, check=True,
+            )
         window_id = result.stdout.strip()
         with open(TOGGLE_WINDOWID, "w") as f:
             f.write(window_id)
@@ -112,23 +148,45 @@ def _start():
     except (subprocess.CalledProcessError, FileNotFoundError):
         log.warning("could not capture active window ID")
 
-    play_sound(SND_START)
-    notify("STT", "Recording...", timeout=0)
-
     wavfile = f"/tmp/stt-recording-{os.getpid()}.wav"
     with open(TOGGLE_WAVPATH, "w") as f:
         f.write(wavfile)
 
     open(TOGGLE_LOCK, "w").close()
 
-    proc = subprocess.Popen(
-        ["stt-record", wavfile],
-        stdout=subprocess.DEVNULL,
-        stderr=subprocess.DEVNULL,
-    )
-    with open(TOGGLE_PIDFILE, "w") as f:
-        f.write(str(proc.pid))
-    log.info("recorder started PID=%d wav=%s", proc.pid, wavfile)
+    # Start the recorder before anything else so the first syllable isn't lost
+    with span("toggle.record_start"):
+        in_daemon = _daemon_ok("record-start")
+    if in_daemon:
+        log.info("daemon capture started, wav=%s", wavfile)
+    else:
+        proc = subprocess.Popen(
+            ["stt-record", wavfile, "--trace", trace_id],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        with open(TOGGLE_PIDFILE, "w") as f:
+            f.write(str(proc.pid))
+        log.info("recorder started PID=%d wav=%s", proc.pid, wavfile)
+
+    _cue("start", SND_START)
+    notify("STT", "Recording...", timeout=0)
+
+    # The daemon is only needed once recording stops
+    from stt.client import daemon_running
+
+    with span("toggle.daemon_check"):
+        running = daemon_running()
+    if not running:
+        notify("STT", "Recording... (starting daemon)", timeout=0, urgency="normal")
+        # Returns once the socket is bound; the transcription request made
+        # when recording stops waits in the daemon until the model is loaded
+        with span("toggle.start_daemon"):
+            subprocess.run(
+                ["stt", "start", "--no-wait"],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
 
 
 def main():
@@ -0,0 +1,146 @@
+"""Lightweight cross-process latency tracing for one dictation.
+
+stt-toggle creates a trace ID on the first hotkey press and hands it down the
+chain (toggle files, --trace arguments, the daemon request's "trace" field).
+Every process appends timed spans as JSON lines to TRACE_PATH; `stt trace`
+renders them as a waterfall or exports Chrome trace JSON (chrome://tracing,
+Perfetto).
+"""
+
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+from stt.config import TRACE_PATH
+
+MAX_TRACE_BYTES = 1024 * 1024
+
+_current = None
+
+
+def new_trace_id() -> str:
+    return os.urandom(8).hex()
+
+
+def set_current(trace_id):
+    """Set the trace ID used by span() when none is passed explicitly."""
+    global _current
+    _current = trace_id or None
+
+
+def current():
+    return _current
+
+
+def record(trace_id, name, start, duration, **attrs):
+    """Append one span. start is wall-clock seconds, duration is seconds."""
+    if not trace_id:
+        return
+    import json
+
+    entry = {
+        "trace": trace_id,
+        "name": name,
+        "proc": os.path.basename(sys.argv[0]) or "python",
+        "pid": os.getpid(),
+        "start": start,
+        "dur": duration,
+    }
+    if attrs:
+        entry["attrs"] = attrs
+    try:
+        if os.path.getsize(TRACE_PATH) > MAX_TRACE_BYTES:
+            os.replace(TRACE_PATH, TRACE_PATH + ".1")
+    except OSError:
+        pass
+    line = json.dumps(entry) + "\n"
+    try:
+        with open(TRACE_PATH, "a") as f:
+            f.write(line)
+    except FileNotFoundError:
+        os.makedirs(os.path.dirname(TRACE_PATH), exist_ok=True)
+        with open(TRACE_PATH, "a") as f:
+            f.write(line)
+    except OSError:
+        pass
+
+
+@contextmanager
+def span(name, trace_id=None, **attrs):
+    """Time the enclosed block and record it under trace_id (or the current one)."""
+    trace_id = trace_id or _current
+    if not trace_id:
+        yield
+        return
+    start = time.time()
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(trace_id, name, start, time.perf_counter() - t0, **attrs)
+
+
+def load(trace_id=None, path=None) -> list:
+    """Return spans for trace_id (default: the most recent trace), by start time."""
+    import json
+
+    path = path or TRACE_PATH
+    spans = []
+    for p in (path + ".1", path):
+        try:
+            with open(p) as f:
+                for line in f:
+                    try:
+                        spans.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        continue
+        except FileNotFoundError:
+            continue
+    if not spans:
+        return []
+    if trace_id is None:
+        trace_id = max(spans, key=lambda s: s["start"])["trace"]
+    return sorted((s for s in spans if s["trace"] == trace_id), key=lambda s: s["start"])
+
+
+def waterfall(spans, width=40) -> str:
+    """Render spans as a text waterfall, offsets relative to the first span."""
+    if not spans:
+        return "no spans recorded"
+    t0 = spans[0]["start"]
+    total = max(s["start"] + s["dur"] for s in spans) - t0
+    scale = width / total if total > 0 else 0
+    lines = [f"trace {spans[0]['trace']}  {total * 1000:.0f}ms"]
+    for s in spans:
+        offset = s["start"] - t0
+        lead = int(offset * scale)
+        bar = "#" * max(1, int(s["dur"] * scale))
+        lines.append(
+            f"{offset * 1000:7.0f}ms {s['dur'] * 1000:7.1f}ms  "
+            f"{s['proc'][:14]:<14} {s['name'][:28]:<28} |{' ' * lead}{bar}"
+        )
+    return "\n".join(lines)
+
+
+def chrome_trace(spans) -> dict:
+    """Convert spans to the Chrome trace event format."""
+    events = []
+    procs = {}
+    for s in spans:
+        procs[s["pid"]] = s["proc"]
+        events.append({
+            "name": s["name"],
+            "cat": s["proc"],
+            "ph": "X",
+            "ts": s["start"] * 1e6,
+            "dur": s["dur"] * 1e6,
+            "pid": s["pid"],
+            "tid": s["pid"],
+            "args": s.get("attrs", {}),
+        })
+    for pid, proc in procs.items():
+        events.append({
+            "name": "process_name", "ph": "M", "pid": pid, "args": {"name": proc},
+        })
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
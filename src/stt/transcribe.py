@@ -5,8 +5,11 @@ import os
 import sys
 
 from stt.client import daemon_send
+from stt.config import DICTATION_DECODE, READY_TIMEOUT
 from stt.log import setup_logging
-from stt.output import copy_to_clipboard, notify, type_text
+from stt.output import copy_to_clipboard, notify, type_text, use_x11
+from stt.protocol import encode_request
+from stt.trace import set_current, span
 
 log = setup_logging("stt.transcribe")
 
@@ -15,15 +18,28 @@ def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("wavpath")
     parser.add_argument("--window", default=None, help="target window ID for xdotool")
+    parser.add_argument("--trace", default=None, help="trace ID from stt-toggle")
     args = parser.parse_args()
+    set_current(args.trace)
 
+    with span("transcribe.main"):
+        _transcribe_and_type(args)
+
+
+def _transcribe_and_type(args):
     if not os.path.exists(args.wavpath):
         log.error("file not found: %s", args.wavpath)
         sys.exit(1)
 
     try:
         log.debug("transcribing %s", args.wavpath)
-        text = daemon_send(f"transcribe {args.wavpath}").strip()
+        options = {"trace": args.trace} if args.trace else {}
+        options["deadline"] = READY_TIMEOUT  # don't leave the daemon decoding for nobody
+        options["decode"] = DICTATION_DECODE
+        command = encode_request("transcribe", path=args.wavpath, **options)
+        # A daemon started by this dictation may still be loading its model
+        with span("transcribe.daemon_roundtrip"):
+            text = daemon_send(command.decode("utf-8"), timeout=READY_TIMEOUT).strip()
     except Exception as e:
         log.error("daemon error: %s", e)
         text = ""
@@ -34,6 +50,9 @@ def main():
             pass
 
     if text and not text.startswith("ERROR:"):
+        # One X connection instead of an xdotool/bspc process per step; the
+        # clipboard stays with xclip, which outlives this process
+        use_x11(clipboard=False)
         copy_to_clipboard(text)
         type_text(text, window_id=args.window)
         notify("STT", f"Typed: {text[:60]}")
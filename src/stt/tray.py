@@ -4,10 +4,19 @@ import os
 import threading
 
 from stt.compat import temp_dir
-from stt.config import CONFIG_PATH, DEFAULT_HOTKEY, DEFAULT_MODEL
+from stt.config import (
+    CONFIG_PATH,
+    DEFAULT_DEVICE,
+    DEFAULT_HOTKEY,
+    DEFAULT_MODEL,
+    DICTATION_DECODE,
+    PREROLL,
+    SND_START,
+    SND_STOP,
+)
 from stt.core import load_model, transcribe_file
 from stt.log import setup_logging
-from stt.output import notify, play_sound, type_text
+from stt.output import notify, play_sound, type_text, use_cues, use_x11
 
 log = setup_logging("stt.tray")
 
@@ -15,11 +24,16 @@ DEFAULT_CONFIG = f"""\
 model = "{DEFAULT_MODEL}"
 device = "cuda"
 hotkey = "{DEFAULT_HOTKEY}"
+capture = "false"
+preroll = "{PREROLL}"
 """
 
 
 def _read_config():
-    config = {"model": DEFAULT_MODEL, "device": "cuda", "hotkey": DEFAULT_HOTKEY}
+    config = {
+        "model": DEFAULT_MODEL, "device": "cuda", "hotkey": DEFAULT_HOTKEY,
+        "capture": "false", "preroll": str(PREROLL),
+    }
     if not os.path.exists(CONFIG_PATH):
         os.makedirs(os.path.dirname(CONFIG_PATH), exist_ok=True)
         with open(CONFIG_PATH, "w") as f:
@@ -77,6 +91,7 @@ class STTApp:
         self.recording = False
         self.stop_event = threading.Event()
         self.record_thread = None
+        self.capture = None
         self._current_wav = None
         self.hotkey_listener = None
         self.config = _read_config()
@@ -84,9 +99,13 @@ class STTApp:
     def start(self):
         import pystray
 
+        use_x11()
+        use_cues()
         notify("STT", "Loading model...")
         log.info("loading model %s on %s", self.config["model"], self.config["device"])
-        self.model = load_model(self.config["model"], self.config["device"])
+        self.model = self._load_model()
+        if self.config["capture"].lower() == "true":
+            self._open_capture()
         notify("STT", f"Ready. Press {self.config['hotkey']} to dictate.")
 
         self._bind_hotkey(self.config["hotkey"])
@@ -102,6 +121,29 @@ class STTApp:
         log.info("tray app started")
         self.icon.run()
 
+    def _load_model(self):
+        """Load the configured model, pulling it into the store on first run."""
+        name, device = self.config["model"], self.config["device"]
+        try:
+            return load_model(name, device)
+        except FileNotFoundError:
+            from stt.models import pull
+
+            notify("STT", f"Downloading model {name}...")
+            log.info("model %s not on this machine; pulling it", name)
+            pull(name)
+            return load_model(name, device)
+
+    def _open_capture(self):
+        """Keep the microphone open so recordings start instantly, with pre-roll."""
+        try:
+            from stt.audio import resolve_device
+            from stt.capture import Capture
+
+            self.capture = Capture(resolve_device(DEFAULT_DEVICE))
+        except Exception as e:
+            log.warning("capture unavailable, opening the mic per recording: %s", e)
+
     def _bind_hotkey(self, hotkey_str):
         """Stop old hotkey listener and start a new one."""
         import pynput.keyboard
@@ -152,11 +194,19 @@ class STTApp:
 
         self.recording = True
         self.stop_event.clear()
-        play_sound(None)
+        play_sound(SND_START)
         notify("STT", "Recording...")
 
         wavpath = os.path.join(temp_dir(), f"stt-{os.getpid()}.wav")
         self._current_wav = wavpath
+        if self.capture:
+            try:
+                preroll = float(self.config["preroll"])
+            except ValueError:
+                preroll = PREROLL
+            self.capture.start(preroll)
+            log.info("recording started from open stream: %s", wavpath)
+            return
         self.record_thread = threading.Thread(
             target=record_to_file,
             args=(wavpath,),
@@ -167,14 +217,16 @@ class STTApp:
         log.info("recording started: %s", wavpath)
 
     def _stop_recording(self):
+        wavpath = self._current_wav
+        self._current_wav = None
+        if self.capture and self.capture.recording:
+            self.capture.stop_to_file(wavpath)
         self.stop_event.set()
         if self.record_thread:
             self.record_thread.join(timeout=5)
+            self.record_thread = None
         self.recording = False
-        play_sound(None)
-
-        wavpath = self._current_wav
-        self._current_wav = None
+        play_sound(SND_STOP)
 
         if not wavpath or not os.path.exists(wavpath):
             notify("STT", "No audio file produced")
@@ -182,7 +234,7 @@ class STTApp:
 
         log.info("transcribing %s", wavpath)
         try:
-            text = transcribe_file(self.model, wavpath)
+            text = transcribe_file(self.model, wavpath, DICTATION_DECODE)
         except Exception as e:
             log.error("transcription failed: %s", e)
             notify("STT", f"Error: {e}")
@@ -211,6 +263,8 @@ class STTApp:
         log.info("quit requested")
         if self.hotkey_listener:
             self.hotkey_listener.stop()
+        if self.capture:
+            self.capture.close()
         self.icon.stop()
 
 
@@ -0,0 +1,210 @@
+"""`stt tune` — find the fastest compute type and thread count for this host.
+
+Transcribes a reference clip with each compute type the device supports, then
+sweeps CPU thread counts for the fastest one. The most precise type (float32)
+provides the reference transcript unless --reference gives one; a candidate
+qualifies if its word error rate against it is within --tolerance. The fastest
+qualifying configuration is saved to TUNE_PATH, keyed by model and device,
+where load_model (and so the daemon and tray) picks it up.
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+import time
+
+from stt.config import TUNE_PATH
+from stt.core import load_audio, load_model, transcribe_audio, tune_key
+
+COMPUTE_TYPES = {
+    "cpu": ("float32", "int8_float32", "int8", "int16", "bfloat16", "int8_bfloat16"),
+    "cuda": ("float32", "float16", "int8_float16", "int8", "bfloat16", "int8_bfloat16"),
+}
+REFERENCE_TYPE = "float32"
+
+
+def supported_compute_types(device) -> list:
+    import ctranslate2
+
+    available = ctranslate2.get_supported_compute_types(device)
+    return [t for t in COMPUTE_TYPES[device] if t in available]
+
+
+def thread_counts(cpus=None) -> list:
+    """1, 2, 4, ... up to the CPU count, always including the CPU count."""
+    cpus = cpus or os.cpu_count() or 1
+    counts = []
+    n = 1
+    while n < cpus:
+        counts.append(n)
+        n *= 2
+    return counts + [cpus]
+
+
+def _words(text):
+    return re.sub(r"[^\w\s']", " ", text.lower()).split()
+
+
+def word_error_rate(reference, hypothesis) -> float:
+    """Word-level edit distance divided by the reference length."""
+    ref, hyp = _words(reference), _words(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    prev = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        cur = [i]
+        for j, h in enumerate(hyp, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (r != h)))
+        prev = cur
+    return prev[-1] / len(ref)
+
+
+def run_config(model_name, device, audio, compute_type, threads, repeat) -> tuple:
+    """Return (median seconds per transcription, transcript) for one config."""
+    model = load_model(model_name, device, compute_type=compute_type, cpu_threads=threads)
+
+    def transcribe():
+        segments, _ = transcribe_audio(model, audio)
+        return " ".join(seg.text.strip() for seg in segments)
+
+    text = transcribe()  # warmup
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        transcribe()
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times), text
+
+
+def search(model_name, device, audio, compute_types, threads, repeat=3,
+           tolerance=0.05, reference=None, run=run_config, report=None) -> tuple:
+    """Benchmark candidates; return (results, best).
+
+    results is a list of dicts (compute_type, cpu_threads, seconds, wer, ok);
+    best is the fastest result within tolerance, or None.
+    """
+    results = []
+    default_threads = threads[-1] if threads else None
+
+    def measure(compute_type, n):
+        seconds, text = run(model_name, device, audio, compute_type, n, repeat)
+        result = {"compute_type": compute_type, "cpu_threads": n, "seconds": seconds,
+                  "text": text}
+        results.append(result)
+        return result
+
+    ordered = sorted(compute_types, key=lambda t: t != REFERENCE_TYPE)
+    for compute_type in ordered:
+        result = measure(compute_type, default_threads)
+        if reference is None:
+            reference = result["text"]
+        _score(result, reference, tolerance, report)
+
+    fastest = _fastest(results)
+    if fastest and device == "cpu":
+        for n in threads[:-1]:
+            _score(measure(fastest["compute_type"], n), reference, tolerance, report)
+    return results, _fastest(results)
+
+
+def _score(result, reference, tolerance, report):
+    result["wer"] = word_error_rate(reference, result["text"])
+    result["ok"] = result["wer"] <= tolerance
+    if report:
+        report(result)
+
+
+def _fastest(results):
+    ok = [r for r in results if r["ok"]]
+    return min(ok, key=lambda r: r["seconds"]) if ok else None
+
+
+def save_settings(model_name, device, settings, path=TUNE_PATH):
+    """Merge settings for this model and device into the tune file."""
+    try:
+        with open(path) as f:
+            saved = json.load(f)
+    except (FileNotFoundError, ValueError):
+        saved = {}
+    saved[tune_key(model_name, device)] = settings
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(saved, f, indent=2)
+        f.write("\n")
+    os.replace(tmp, path)
+
+
+def _print_result(r):
+    threads = r["cpu_threads"] or "-"
+    flag = "" if r["ok"] else "  (over tolerance)"
+    print(
+        f"{r['compute_type']:<14} {threads:>7} {r['seconds']:9.3f}s  wer {r['wer']:.3f}{flag}",
+        file=sys.stderr,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="stt tune",
+        description="Benchmark compute types and thread counts; save the fastest",
+    )
+    parser.add_argument("clip", help="Reference speech clip (a few seconds of real speech)")
+    parser.add_argument(
+        "-m", "--model", default="medium.en", help="Whisper model (default: medium.en)"
+    )
+    parser.add_argument("--cpu", action="store_true", help="Tune CPU inference")
+    parser.add_argument("-n", "--repeat", type=int, default=3, help="Runs per config (default: 3)")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.05,
+        help="Max word error rate against the reference transcript (default: 0.05)",
+    )
+    parser.add_argument(
+        "--reference", help=f"Expected transcript (default: the {REFERENCE_TYPE} output)"
+    )
+    parser.add_argument(
+        "--compute-types", help="Comma-separated compute types to try (default: all supported)"
+    )
+    parser.add_argument(
+        "--threads", help="Comma-separated CPU thread counts to try (default: 1, 2, 4, ... CPUs)"
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Don't save the result")
+    args = parser.parse_args(argv)
+
+    device = "cpu" if args.cpu else "cuda"
+    audio = load_audio(args.clip)
+    if audio is None:
+        parser.error(f"{args.clip} is too short to transcribe")
+    compute_types = (
+        args.compute_types.split(",") if args.compute_types
+        else supported_compute_types(device)
+    )
+    threads = (
+        [int(n) for n in args.threads.split(",")] if args.threads
+        else thread_counts() if device == "cpu" else [None]
+    )
+
+    print(f"{'compute type':<14} {'threads':>7} {'time':>10}", file=sys.stderr)
+    _, best = search(
+        args.model, device, audio, compute_types, sorted(threads, key=lambda n: n or 0),
+        repeat=args.repeat, tolerance=args.tolerance, reference=args.reference,
+        report=_print_result,
+    )
+    if best is None:
+        print("No configuration met the tolerance; nothing saved.", file=sys.stderr)
+        sys.exit(1)
+
+    settings = {"compute_type": best["compute_type"]}
+    if best["cpu_threads"]:
+        settings["cpu_threads"] = best["cpu_threads"]
+    print(f"fastest: {json.dumps(settings)}")
+    if not args.dry_run:
+        save_settings(args.model, device, settings)
+        print(f"saved to {TUNE_PATH}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
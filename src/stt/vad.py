@@ -0,0 +1,51 @@
+"""Energy-based utterance segmentation for continuous mode."""
+
+import numpy as np
+
+from stt.config import MIN_AUDIO_DURATION, SILENCE_DURATION, SILENCE_THRESHOLD
+
+
+class Segmenter:
+    """Split a stream of fixed-size audio chunks into utterances by RMS energy.
+
+    feed() returns a finished utterance (flat float32 array) once speech has
+    been followed by silence_duration of quiet, else None.
+    """
+
+    def __init__(self, rate, chunk_duration=0.1, threshold=SILENCE_THRESHOLD,
+                 silence_duration=SILENCE_DURATION, min_duration=MIN_AUDIO_DURATION):
+        self.threshold = threshold
+        self.silence_limit = round(silence_duration / chunk_duration)
+        self.min_frames = int(min_duration * rate)
+        self.buffer = []
+        self.silence_chunks = 0
+        self.has_speech = False
+
+    def feed(self, chunk):
+        rms = np.sqrt(np.mean(chunk**2))
+        if rms > self.threshold:
+            self.has_speech = True
+            self.silence_chunks = 0
+            self.buffer.append(chunk)
+        elif self.has_speech:
+            self.silence_chunks += 1
+            self.buffer.append(chunk)
+            if self.silence_chunks >= self.silence_limit:
+                return self.flush()
+        return None
+
+    def pending(self):
+        """Audio of the utterance in progress (flat float32), or None."""
+        if not self.has_speech:
+            return None
+        return np.concatenate(self.buffer, axis=0).flatten()
+
+    def flush(self):
+        """Return buffered audio if long enough, and reset."""
+        if not self.buffer:
+            return None
+        raw = np.concatenate(self.buffer, axis=0).flatten()
+        self.buffer.clear()
+        self.silence_chunks = 0
+        self.has_speech = False
+        return raw if len(raw) >= self.min_frames else None
@@ -0,0 +1,264 @@
+"""Model replicas in worker processes, for CPU-only hosts.
+
+One WhisperModel decode does not keep every core busy, and a single process
+decodes one request at a time per executor thread. `stt-daemon --cpu --procs
+N` instead runs N worker processes, each holding its own model replica and
+pinned to its own slice of the cores, with ctranslate2 using that many
+threads.
+
+Workers are started from a forkserver that has already imported
+faster_whisper, so each replica only pays for loading weights (from the page
+cache after the first). The model is not loaded in the daemon and forked:
+ctranslate2's thread pools do not survive fork().
+
+The daemon stays the front end: it accepts connections and parses requests
+as before, then hands each decode to an idle worker over a pipe. Segments
+stream back as they are decoded. Each worker also shares an Event with the
+daemon, which cancelling a request sets to stop the decode at the next segment.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import signal
+import threading
+
+from stt.core import Cancelled
+from stt.log import setup_logging
+
+log = setup_logging("stt.workers")
+
+
+def core_slices(procs, cpus=None) -> list:
+    """Split the usable CPUs into procs contiguous, near-equal slices."""
+    if cpus is None:
+        cpus = os.sched_getaffinity(0) if hasattr(os, "sched_getaffinity") else range(
+            os.cpu_count() or 1
+        )
+    cpus = sorted(cpus)
+    if procs >= len(cpus):
+        return [[cpus[i % len(cpus)]] for i in range(procs)]
+    size, extra = divmod(len(cpus), procs)
+    slices, at = [], 0
+    for i in range(procs):
+        n = size + (i < extra)
+        slices.append(cpus[at:at + n])
+        at += n
+    return slices
+
+
+async def _finished(future):
+    """Wait for future to finish, even if cancelled meanwhile; ignore its outcome."""
+    while not future.done():
+        try:
+            await asyncio.wait({future})
+        except asyncio.CancelledError:
+            pass
+    if not future.cancelled():
+        future.exception()  # retrieved, so it isn't logged as unhandled
+
+
+def _worker_main(conn, cores, factory, cancel):
+    """Worker process: load a replica, then decode jobs until told to stop."""
+    from stt.core import decode_timed
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the daemon handles shutdown
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    try:
+        model = factory(cpu_threads=len(cores))
+    except Exception as e:
+        conn.send(("error", f"{type(e).__name__}: {e}"))
+        return
+    conn.send(("ready", None))
+
+    def on_segment(text):
+        conn.send(("segment", text))
+
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+        source, options = job
+        try:
+            conn.send(("done", decode_timed(model, source, on_segment, cancel, options)))
+        except Cancelled:
+            conn.send(("cancelled", None))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+
+
+class WorkerError(RuntimeError):
+    pass
+
+
+class _Worker:
+    def __init__(self, ctx, index, cores, factory):
+        self.index = index
+        self.cores = cores
+        self.conn, child = ctx.Pipe()
+        self.cancel = ctx.Event()
+        self.broken = False
+        self.proc = ctx.Process(
+            target=_worker_main, args=(child, cores, factory, self.cancel),
+            name=f"stt-worker-{index}", daemon=True,
+        )
+        self.proc.start()
+        child.close()
+
+    def wait_ready(self):
+        try:
+            kind, error = self.conn.recv()
+        except EOFError:
+            kind, error = "error", f"exited with code {self.proc.exitcode}"
+        if kind != "ready":
+            raise WorkerError(f"worker {self.index} failed to load: {error}")
+
+    def decode(self, source, on_segment, options=None):
+        """Blocking: send one job, relay segments, return the result."""
+        try:
+            self.conn.send((source, options))
+            while True:
+                kind, value = self.conn.recv()
+                if kind == "segment":
+                    if on_segment:
+                        on_segment(value)
+                elif kind == "done":
+                    return value
+                elif kind == "cancelled":
+                    raise Cancelled("cancelled")
+                else:
+                    raise WorkerError(value)
+        except (EOFError, BrokenPipeError) as e:
+            self.broken = True
+            raise WorkerError(f"worker {self.index} died") from e
+
+    def stop(self, timeout=1.0):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.proc.join(timeout)
+        if self.proc.is_alive():
+            self.proc.terminate()
+            self.proc.join(timeout)
+        self.conn.close()
+
+
+class WorkerPool:
+    """Dispatches decodes to the first idle worker process.
+
+    factory(cpu_threads=N) builds a model in the worker; it must be picklable
+    (a module-level function or a functools.partial of one).
+    """
+
+    def __init__(self, procs, factory, context="forkserver"):
+        ctx = multiprocessing.get_context(context)
+        if context == "forkserver":
+            ctx.set_forkserver_preload(["stt.core"])
+        self.ctx = ctx
+        self.factory = factory
+        self.lock = threading.Lock()
+        self.workers = [
+            _Worker(ctx, i, cores, factory) for i, cores in enumerate(core_slices(procs))
+        ]
+        self.idle = None
+        self.active = 0
+        self.retiring = False
+
+    def wait_ready(self):
+        """Blocking: wait until every worker has loaded its model."""
+        try:
+            for worker in self.workers:
+                worker.wait_ready()
+        except WorkerError:
+            self.close()
+            raise
+        for worker in self.workers:
+            log.info("worker %d ready (PID %d, cores %s)",
+                     worker.index, worker.proc.pid, worker.cores)
+
+    async def decode(self, source, on_segment=None, cancel=None, options=None):
+        """Decode on an idle worker; returns core.decode_timed's result.
+
+        cancel is a scheduler.CancelToken; once set, the worker stops at the
+        next segment and Cancelled is raised. options are decoding options.
+        """
+        if self.idle is None:
+            self.idle = asyncio.Queue()
+            for worker in self.workers:
+                self.idle.put_nowait(worker)
+        self.active += 1
+        try:
+            return await self._decode_on_idle(source, on_segment, cancel, options)
+        finally:
+            self.active -= 1
+            if self.retiring and not self.active:
+                asyncio.get_running_loop().run_in_executor(None, self.close)
+
+    async def _decode_on_idle(self, source, on_segment, cancel, options):
+        worker = await self.idle.get()
+        loop = asyncio.get_running_loop()
+        worker.cancel.clear()
+        watch = None
+        if cancel is not None:
+            watch = asyncio.ensure_future(cancel.wait())
+            watch.add_done_callback(lambda t: t.cancelled() or worker.cancel.set())
+        job = loop.run_in_executor(None, worker.decode, source, on_segment, options)
+        try:
+            return await asyncio.shield(job)
+        except asyncio.CancelledError:
+            # The worker is still decoding: stop it, and wait until it has, so
+            # that the next job doesn't share its pipe with this one
+            worker.cancel.set()
+            await _finished(job)
+            raise
+        except Cancelled:
+            raise Cancelled(cancel.reason if cancel else "cancelled") from None
+        finally:
+            if watch is not None:
+                watch.cancel()
+            self._requeue(worker)
+
+    def _requeue(self, worker):
+        """Put worker back on the idle queue, or a replacement if it died."""
+        if worker.proc.is_alive() and not worker.broken:
+            self.idle.put_nowait(worker)
+            return
+        replacing = asyncio.get_running_loop().run_in_executor(None, self._replace, worker)
+        replacing.add_done_callback(self._replaced)
+
+    def _replaced(self, future):
+        try:
+            self.idle.put_nowait(future.result())
+        except Exception as e:
+            log.error("could not restart a worker; the pool has one fewer: %s", e)
+
+    def _replace(self, dead):
+        """Start and load a new worker on the dead one's cores."""
+        log.error("worker %d exited (code %s); restarting", dead.index, dead.proc.exitcode)
+        dead.stop(timeout=0)
+        worker = _Worker(self.ctx, dead.index, dead.cores, self.factory)
+        worker.wait_ready()
+        with self.lock:
+            self.workers[dead.index] = worker
+        return worker
+
+    def retire(self):
+        """Close the pool once decodes already in progress have finished.
+
+        Called on the event loop; the workers are stopped on an executor
+        thread, since that blocks for up to a second per worker.
+        """
+        self.retiring = True
+        if not self.active:
+            asyncio.get_running_loop().run_in_executor(None, self.close)
+
+    def close(self):
+        with self.lock:
+            workers = list(self.workers)
+        for worker in workers:
+            worker.stop()
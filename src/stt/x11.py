@@ -0,0 +1,288 @@
+"""In-process X11 output over one persistent connection.
+
+Replaces the per-dictation xdotool / bspc / xclip subprocesses in long-lived
+processes: keys are injected with XTEST, windows activated with EWMH
+_NET_ACTIVE_WINDOW, the CLIPBOARD selection is owned and served by a
+background thread, and bspwm is spoken to over its own socket.
+
+Needs python-xlib (the "x11" extra) and an X server with XTEST.
+"""
+
+import os
+import socket
+import threading
+import time
+
+import Xlib.threaded  # noqa: F401  (must precede Display creation)
+from Xlib import XK, X, Xatom
+from Xlib import display as xdisplay
+from Xlib.ext import xtest
+from Xlib.protocol import event
+
+MODIFIERS = {
+    "ctrl": "Control_L",
+    "shift": "Shift_L",
+    "alt": "Alt_L",
+    "super": "Super_L",
+}
+SPECIAL_CHARS = {"\n": "Return", "\t": "Tab", " ": "space"}
+MAX_CLIPBOARD_BYTES = 64 * 1024
+BSPWM_FAILURE = b"\x07"
+
+
+class TypingError(RuntimeError):
+    """X11.type stopped partway; the first `sent` characters were typed."""
+
+    def __init__(self, sent, cause):
+        super().__init__(f"stopped after {sent} characters: {cause}")
+        self.sent = sent
+
+
+def bspwm_socket_path(display_name=None) -> str:
+    """Socket path bspwm listens on, as bspc computes it."""
+    if os.environ.get("BSPWM_SOCKET"):
+        return os.environ["BSPWM_SOCKET"]
+    name = display_name or os.environ.get("DISPLAY", ":0")
+    host, _, rest = name.rpartition(":")
+    dn, _, sn = rest.partition(".")
+    return f"/tmp/bspwm{host}_{int(dn or 0)}_{int(sn or 0)}-socket"
+
+
+def bspc(*args, path=None):
+    """Send a bspc command over bspwm's socket.
+
+    Returns the reply text, or None when bspwm rejected the command or is not
+    running.
+    """
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+            s.settimeout(1.0)
+            s.connect(path or bspwm_socket_path())
+            s.sendall(b"".join(a.encode() + b"\0" for a in args))
+            reply = b""
+            while chunk := s.recv(4096):
+                reply += chunk
+    except OSError:
+        return None
+    if reply.startswith(BSPWM_FAILURE):
+        return None
+    return reply.decode()
+
+
+def char_keysym(ch) -> int:
+    if ch in SPECIAL_CHARS:
+        return XK.string_to_keysym(SPECIAL_CHARS[ch])
+    code = ord(ch)
+    if 0x20 <= code <= 0x7E or 0xA0 <= code <= 0xFF:
+        return code
+    return 0x01000000 | code
+
+
+class _ClipboardOwner(threading.Thread):
+    """Owns CLIPBOARD on its own connection and answers paste requests."""
+
+    def __init__(self, name=None):
+        super().__init__(name="stt-clipboard", daemon=True)
+        self.display = xdisplay.Display(name)
+        self.window = self.display.screen().root.create_window(
+            0, 0, 1, 1, 0, X.CopyFromParent
+        )
+        atom = self.display.intern_atom
+        self.CLIPBOARD = atom("CLIPBOARD")
+        self.TARGETS = atom("TARGETS")
+        self.UTF8_STRING = atom("UTF8_STRING")
+        self.TEXT = atom("TEXT")
+        self.lock = threading.Lock()
+        self.text = None
+
+    def set(self, text):
+        with self.lock:
+            self.text = text
+        self.window.set_selection_owner(self.CLIPBOARD, X.CurrentTime)
+        self.display.sync()
+        if self.display.get_selection_owner(self.CLIPBOARD).id != self.window.id:
+            raise RuntimeError("could not take CLIPBOARD ownership")
+
+    def run(self):
+        while True:
+            e = self.display.next_event()
+            if e.type == X.SelectionRequest:
+                self._reply(e)
+            elif e.type == X.SelectionClear:
+                with self.lock:
+                    self.text = None
+
+    def _reply(self, e):
+        with self.lock:
+            text = self.text
+        prop = e.property or e.target
+        if text is None:
+            prop = X.NONE
+        elif e.target == self.TARGETS:
+            targets = [self.TARGETS, self.UTF8_STRING, self.TEXT, Xatom.STRING]
+            e.requestor.change_property(prop, Xatom.ATOM, 32, targets)
+        elif e.target in (self.UTF8_STRING, self.TEXT):
+            e.requestor.change_property(prop, self.UTF8_STRING, 8, text.encode("utf-8"))
+        elif e.target == Xatom.STRING:
+            e.requestor.change_property(
+                prop, Xatom.STRING, 8, text.encode("latin-1", "replace")
+            )
+        else:
+            prop = X.NONE
+        e.requestor.send_event(event.SelectionNotify(
+            time=e.time, requestor=e.requestor, selection=e.selection,
+            target=e.target, property=prop,
+        ))
+        self.display.flush()
+
+
+class X11:
+    """Persistent XTEST/EWMH connection for typing, pasting and focus."""
+
+    def __init__(self, name=None):
+        self.display = xdisplay.Display(name)
+        if not self.display.has_extension("XTEST"):
+            raise RuntimeError("X server has no XTEST extension")
+        self.name = name
+        self.root = self.display.screen().root
+        self.NET_ACTIVE_WINDOW = self.display.intern_atom("_NET_ACTIVE_WINDOW")
+        self.lock = threading.Lock()
+        self._clipboard = None
+
+    def close(self):
+        self.display.close()
+
+    # Windows
+
+    def active_window(self):
+        prop = self.root.get_full_property(self.NET_ACTIVE_WINDOW, X.AnyPropertyType)
+        return int(prop.value[0]) if prop and len(prop.value) else None
+
+    def activate(self, window_id, timeout=0.5) -> bool:
+        """Ask the WM to focus window_id and wait until it has (xdotool --sync)."""
+        win = self.display.create_resource_object("window", window_id)
+        self.root.send_event(
+            event.ClientMessage(
+                window=win, client_type=self.NET_ACTIVE_WINDOW,
+                data=(32, [2, X.CurrentTime, 0, 0, 0]),
+            ),
+            event_mask=X.SubstructureRedirectMask | X.SubstructureNotifyMask,
+        )
+        self.display.flush()
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.active_window() == window_id:
+                return True
+            time.sleep(0.005)
+        return False
+
+    # Keyboard
+
+    def _keycode(self, name) -> int:
+        keysym = XK.string_to_keysym(MODIFIERS.get(name, name))
+        keycode = self.display.keysym_to_keycode(keysym)
+        if not keycode:
+            raise ValueError(f"no keycode for {name!r}")
+        return keycode
+
+    def _fake(self, kind, keycode):
+        xtest.fake_input(self.display, kind, keycode)
+
+    def _held_modifiers(self) -> list:
+        """Modifier keycodes currently down (xdotool --clearmodifiers)."""
+        keymap = self.display.query_keymap()
+        return [
+            kc
+            for codes in self.display.get_modifier_mapping()
+            for kc in codes
+            if kc and keymap[kc // 8] & (1 << (kc % 8))
+        ]
+
+    def _around_modifiers(self, fn):
+        held = self._held_modifiers()
+        for kc in held:
+            self._fake(X.KeyRelease, kc)
+        try:
+            fn()
+        finally:
+            for kc in held:
+                self._fake(X.KeyPress, kc)
+            self.display.sync()
+
+    def key(self, combo):
+        """Press and release a combo like "ctrl+shift+v"."""
+        codes = [self._keycode(name) for name in combo.split("+")]
+
+        def press():
+            for kc in codes:
+                self._fake(X.KeyPress, kc)
+            for kc in reversed(codes):
+                self._fake(X.KeyRelease, kc)
+
+        with self.lock:
+            self._around_modifiers(press)
+
+    def type(self, text, delay=0.012):
+        """Type text; characters missing from the keymap use a scratch keycode.
+
+        Raises TypingError, with the count of characters already typed, if
+        the connection fails partway.
+        """
+        shift = self._keycode("shift")
+        sent = 0
+
+        def press():
+            nonlocal sent
+            scratch = None
+            try:
+                for ch in text:
+                    keysym = char_keysym(ch)
+                    keycode, index = next(
+                        ((kc, i) for kc, i in self.display.keysym_to_keycodes(keysym) if i < 2),
+                        (None, 0),
+                    )
+                    if keycode is None:
+                        scratch = scratch or self._scratch_keycode()
+                        self.display.change_keyboard_mapping(scratch, [(keysym, keysym)])
+                        self.display.sync()
+                        keycode, index = scratch, 0
+                    if index:
+                        self._fake(X.KeyPress, shift)
+                    self._fake(X.KeyPress, keycode)
+                    self._fake(X.KeyRelease, keycode)
+                    if index:
+                        self._fake(X.KeyRelease, shift)
+                    self.display.sync()
+                    sent += 1
+                    if delay:
+                        time.sleep(delay)
+            finally:
+                if scratch:
+                    self.display.change_keyboard_mapping(scratch, [(X.NoSymbol, X.NoSymbol)])
+
+        with self.lock:
+            try:
+                self._around_modifiers(press)
+            except Exception as e:
+                raise TypingError(sent, e) from e
+
+    def _scratch_keycode(self) -> int:
+        """An unmapped keycode to temporarily bind unusual characters to."""
+        first = self.display.display.info.min_keycode
+        count = self.display.display.info.max_keycode - first + 1
+        mapping = self.display.get_keyboard_mapping(first, count)
+        for offset in range(count - 1, -1, -1):
+            if not any(mapping[offset]):
+                return first + offset
+        raise RuntimeError("no free keycode to map")
+
+    # Clipboard
+
+    def set_clipboard(self, text):
+        """Own CLIPBOARD with text for as long as this process lives."""
+        if len(text.encode("utf-8")) > MAX_CLIPBOARD_BYTES:
+            raise ValueError("text too large to serve without INCR")
+        if self._clipboard is None:
+            self._clipboard = _ClipboardOwner(self.name)
+            self._clipboard.start()
+        self._clipboard.set(text)
@@ -0,0 +1,55 @@
+"""Test the asyncio client against mock servers."""
+
+import asyncio
+
+import pytest
+
+from stt.aio import Client, DaemonError, connect
+
+
+def serve_once(sock_path, reply, seen):
+    async def handler(reader, writer):
+        seen.append(await reader.read(4096))
+        writer.write(reply)
+        await writer.drain()
+        writer.close()
+
+    return asyncio.start_unix_server(handler, path=sock_path)
+
+
+def test_connect_fails_without_daemon(tmp_path):
+    with pytest.raises(ConnectionError):
+        asyncio.run(connect(str(tmp_path / "nonexistent.sock")))
+
+
+def test_transcribe_sends_absolute_path(tmp_path):
+    sock = str(tmp_path / "t.sock")
+    seen = []
+
+    async def main():
+        async with await serve_once(sock, b"hi there", seen):
+            return await Client(sock).transcribe("rel.wav")
+
+    assert asyncio.run(main()) == "hi there"
+    assert seen[0].startswith(b"transcribe /")
+
+
+def test_error_reply_raises(tmp_path):
+    sock = str(tmp_path / "t.sock")
+
+    async def main():
+        async with await serve_once(sock, b"ERROR: boom", []):
+            await Client(sock).transcribe("/tmp/x.wav")
+
+    with pytest.raises(DaemonError, match="boom"):
+        asyncio.run(main())
+
+
+def test_stream_yields_lines(tmp_path):
+    sock = str(tmp_path / "t.sock")
+
+    async def main():
+        async with await serve_once(sock, b"a\nb c\n", []):
+            return [s async for s in Client(sock).stream(data=b"RIFF")]
+
+    assert asyncio.run(main()) == ["a", "b c"]
@@ -0,0 +1,30 @@
+"""Smoke-test the benchmark cases with tiny workloads."""
+
+import json
+
+from stt.bench import bench_resample, bench_roundtrip, bench_segment, main, measure
+
+
+def test_measure_stats():
+    stats = measure(lambda: None, repeat=5, warmup=0)
+    assert stats["n"] == 5
+    assert stats["min"] <= stats["median"] <= stats["max"]
+
+
+def test_roundtrip_against_fake_daemon():
+    results = bench_roundtrip(repeat=3)
+    assert set(results) == {"roundtrip.ping", "roundtrip.transcribe_1s"}
+
+
+def test_resample_and_segment():
+    assert "resample.48000" in bench_resample(repeat=1, seconds=0.5)
+    stats = bench_segment(repeat=1, seconds=2.0)["segment.continuous"]
+    assert stats["audio_seconds_per_second"] > 0
+
+
+def test_main_writes_json(tmp_path, capsys):
+    out = tmp_path / "bench.json"
+    main(["segment", "-n", "1", "-o", str(out)])
+    report = json.loads(out.read_text())
+    assert "environment" in report
+    assert list(report["results"]) == ["segment.continuous"]
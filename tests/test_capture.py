@@ -0,0 +1,78 @@
+"""Tests for stt.capture with a mocked sounddevice."""
+
+import sys
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import soundfile as sf
+
+from stt.capture import Capture
+
+
+def make_capture(rate=1000, ring_seconds=0.5):
+    sd = MagicMock()
+    sd.query_devices.return_value = {"default_samplerate": float(rate)}
+    with patch.dict(sys.modules, {"sounddevice": sd}):
+        capture = Capture(ring_seconds=ring_seconds)
+    return capture, sd
+
+
+def feed(capture, start, frames):
+    """Deliver one block whose samples count up from start."""
+    block = np.arange(start, start + frames, dtype=np.float32).reshape(-1, 1)
+    capture._callback(block, frames, None, None)
+    return start + frames
+
+
+def test_stream_opened_once():
+    capture, sd = make_capture()
+    sd.InputStream.assert_called_once()
+    sd.InputStream.return_value.start.assert_called_once()
+    capture.close()
+    sd.InputStream.return_value.close.assert_called_once()
+
+
+def test_preroll_comes_from_ring():
+    capture, _ = make_capture()
+    n = 0
+    for _ in range(7):
+        n = feed(capture, n, 128)  # wraps the 500-frame ring
+    capture.start(preroll=0.3)
+    n = feed(capture, n, 100)
+    audio = capture.stop()
+    assert np.array_equal(audio, np.arange(n - 400, n, dtype=np.float32))
+
+
+def test_preroll_limited_to_audio_seen():
+    capture, _ = make_capture()
+    feed(capture, 0, 50)
+    capture.start(preroll=0.3)
+    assert np.array_equal(capture.stop(), np.arange(50, dtype=np.float32))
+
+
+def test_preroll_capped_at_ring():
+    capture, _ = make_capture(ring_seconds=0.1)
+    n = feed(capture, 0, 1000)  # block larger than the ring
+    capture.start(preroll=0.3)
+    assert np.array_equal(capture.stop(), np.arange(n - 100, n, dtype=np.float32))
+
+
+def test_stop_without_take():
+    capture, _ = make_capture()
+    assert capture.stop() is None
+    capture.start()
+    assert capture.recording
+    assert capture.stop() is None
+    assert not capture.recording
+
+
+def test_stop_to_file(tmp_path):
+    capture, _ = make_capture()
+    capture.start()
+    feed(capture, 0, 200)
+    path = str(tmp_path / "take.wav")
+    assert capture.stop_to_file(path)
+    audio, rate = sf.read(path, dtype="float32")
+    assert rate == 1000
+    assert np.array_equal(audio, np.arange(200, dtype=np.float32))
+    assert not capture.stop_to_file(path)
@@ -91,7 +91,9 @@ def test_load_model_cuda(mock_whisper):
     from stt.core import load_model
 
     load_model("medium.en", device="cuda")
-    mock_whisper.assert_called_once_with("medium.en", device="cuda", compute_type="float16")
+    mock_whisper.assert_called_once_with(
+        "medium.en", device="cuda", compute_type="float16", local_files_only=True
+    )
 
 
 @patch("stt.core.WhisperModel")
@@ -99,4 +101,183 @@ def test_load_model_cpu(mock_whisper):
     from stt.core import load_model
 
     load_model("tiny", device="cpu")
-    mock_whisper.assert_called_once_with("tiny", device="cpu", compute_type="int8")
+    mock_whisper.assert_called_once_with(
+        "tiny", device="cpu", compute_type="int8", local_files_only=True
+    )
+
+
+@patch("stt.core.tuned_settings", return_value={"compute_type": "int8_float32", "cpu_threads": 6})
+@patch("stt.core.WhisperModel")
+def test_load_model_uses_tuned_settings(mock_whisper, mock_tuned):
+    from stt.core import load_model
+
+    load_model("tiny", device="cpu")
+    mock_tuned.assert_called_once_with("tiny", "cpu")
+    mock_whisper.assert_called_once_with(
+        "tiny", device="cpu", compute_type="int8_float32", cpu_threads=6,
+        local_files_only=True,
+    )
+
+
+@patch("stt.core.tuned_settings")
+@patch("stt.core.WhisperModel")
+def test_load_model_explicit_settings_skip_tuning(mock_whisper, mock_tuned):
+    from stt.core import load_model
+
+    load_model("tiny", device="cpu", compute_type="float32", cpu_threads=2)
+    mock_tuned.assert_not_called()
+    mock_whisper.assert_called_once_with(
+        "tiny", device="cpu", compute_type="float32", cpu_threads=2, local_files_only=True
+    )
+
+
+@patch("stt.core.models.record_load")
+@patch("stt.core.models.resolve", return_value="/models/tiny")
+@patch("stt.core.WhisperModel")
+def test_load_model_from_store(mock_whisper, mock_resolve, mock_record):
+    from stt.core import load_model
+
+    load_model("tiny", device="cpu", compute_type="int8")
+    mock_resolve.assert_called_once_with("tiny", "int8")
+    mock_whisper.assert_called_once_with("/models/tiny", device="cpu", compute_type="int8")
+    assert mock_record.call_args.args[:2] == ("tiny", "cpu/int8")
+
+
+@patch("stt.core.WhisperModel", side_effect=FileNotFoundError("not cached"))
+def test_load_model_missing_suggests_pull(mock_whisper):
+    import pytest
+
+    from stt.core import load_model
+
+    with pytest.raises(FileNotFoundError, match="stt model pull tiny.en"):
+        load_model("tiny.en", device="cpu")
+
+
+def test_decode_timed_stops_at_segment_boundary():
+    import threading
+
+    import pytest
+
+    from stt.core import Cancelled, decode_timed
+
+    cancel = threading.Event()
+    consumed = []
+
+    def segments():
+        for i in range(10):
+            seg = MagicMock()
+            seg.text = f" s{i} "
+            consumed.append(i)
+            yield seg
+
+    model = MagicMock()
+    gen = segments()
+    model.transcribe.return_value = (gen, None)
+    audio = np.zeros(16000, dtype=np.float32)
+
+    def on_segment(text):
+        if text == "s2":
+            cancel.set()
+
+    with pytest.raises(Cancelled):
+        decode_timed(model, audio, on_segment, cancel)
+    assert consumed == [0, 1, 2]
+    assert gen.gi_frame is None  # generator closed
+
+
+def test_decode_timed_skips_cancelled_request():
+    import threading
+
+    import pytest
+
+    from stt.core import Cancelled, decode_timed
+
+    cancel = threading.Event()
+    cancel.set()
+    model = MagicMock()
+    with pytest.raises(Cancelled):
+        decode_timed(model, np.zeros(16000, dtype=np.float32), cancel=cancel)
+    model.transcribe.assert_not_called()
+
+
+def _speech(seconds, level=0.1, rate=16000):
+    return (np.random.default_rng(0).standard_normal(int(rate * seconds)) * level).astype(
+        np.float32
+    )
+
+
+def test_condition_trims_silence_and_click():
+    from stt.core import condition
+
+    rate = 16000
+    click = np.zeros(int(0.5 * rate), dtype=np.float32)
+    click[1000:1200] = 0.8  # 12 ms keypress transient
+    audio = np.concatenate([
+        click, _speech(1.0), np.zeros(int(1.5 * rate), dtype=np.float32)
+    ]) + np.float32(0.05)  # DC offset
+    out, report = condition(audio, pad=0.2)
+    assert not report["gated"]
+    assert report["duration"] == 3.0
+    assert 0.29 <= report["start"] <= 0.31  # pad before speech, click dropped
+    assert 1.69 <= report["end"] <= 1.71  # trailing silence cut to the pad
+    assert len(out) == round((report["end"] - report["start"]) * rate)
+    assert abs(float(out.mean())) < 0.01
+
+
+def test_condition_gates_silence():
+    from stt.core import condition
+
+    audio = (np.random.default_rng(1).standard_normal(32000) * 0.001).astype(np.float32)
+    audio[5000:5100] = 0.9  # a lone click is not speech
+    out, report = condition(audio)
+    assert out is None
+    assert report["gated"]
+
+
+def test_condition_normalizes_gain():
+    from stt.core import condition
+
+    out, report = condition(_speech(1.0, level=0.05), normalize=True)
+    assert abs(float(np.abs(out).max()) - 0.9) < 1e-3
+    assert report["gain"] > 1
+
+
+def test_transcribe_file_skips_model_for_silence(tmp_path):
+    import soundfile as sf
+
+    from stt.core import transcribe_file
+
+    wavpath = str(tmp_path / "silence.wav")
+    sf.write(wavpath, np.zeros(32000, dtype=np.float32), 16000, subtype="FLOAT")
+    model = MagicMock()
+    assert transcribe_file(model, wavpath) == ""
+    model.transcribe.assert_not_called()
+
+
+def test_decode_options_validated():
+    import pytest
+
+    from stt.core import decode_options
+
+    assert decode_options(None) == {"beam_size": 5, "vad_filter": True}
+    assert decode_options({"vad_filter": False, "language": "de"}) == {
+        "beam_size": 5, "vad_filter": False, "language": "de",
+    }
+    for bad in ({"beam": 1}, {"beam_size": True}, {"beam_size": 0}, {"task": "summarize"},
+                {"vad_filter": "no"}, ["beam_size"]):
+        with pytest.raises(ValueError):
+            decode_options(bad)
+
+
+def test_transcribe_file_passes_options(tmp_path):
+    import soundfile as sf
+
+    from stt.core import transcribe_file
+
+    wavpath = str(tmp_path / "speech.wav")
+    sf.write(wavpath, np.random.randn(16000).astype(np.float32) * 0.1, 16000)
+    model = MagicMock()
+    model.transcribe.return_value = ([], None)
+    transcribe_file(model, wavpath, {"without_timestamps": True, "beam_size": 1})
+    kwargs = model.transcribe.call_args.kwargs
+    assert kwargs == {"beam_size": 1, "vad_filter": True, "without_timestamps": True}
@@ -0,0 +1,59 @@
+"""Tests for stt.cues with a mocked sounddevice."""
+
+import sys
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import soundfile as sf
+
+from stt.cues import CuePlayer, load_cue
+
+
+def write_cue(path, seconds=0.05, rate=22050, channels=2):
+    audio = np.full((int(rate * seconds), channels), 0.5, dtype=np.float32)
+    sf.write(str(path), audio, rate)
+    return str(path)
+
+
+def make_player(cues, rate=48000):
+    sd = MagicMock()
+    sd.query_devices.return_value = {"default_samplerate": float(rate)}
+    with patch.dict(sys.modules, {"sounddevice": sd}):
+        player = CuePlayer(cues)
+    return player, sd
+
+
+def test_load_cue_resamples_to_mono(tmp_path):
+    audio = load_cue(write_cue(tmp_path / "a.wav"), 48000)
+    assert audio.dtype == np.float32
+    assert audio.ndim == 1
+    assert abs(len(audio) - 2400) <= 2
+
+
+def test_player_opens_stream_once(tmp_path):
+    player, sd = make_player({"start": write_cue(tmp_path / "a.wav"), "stop": None})
+    assert set(player.cues) == {"start"}
+    sd.OutputStream.assert_called_once()
+    sd.OutputStream.return_value.start.assert_called_once()
+
+
+def test_callback_plays_then_silence(tmp_path):
+    player, _ = make_player({"start": write_cue(tmp_path / "a.wav")})
+    out = np.ones((1024, 1), dtype=np.float32)
+    player._callback(out, 1024, None, None)
+    assert not out.any()
+
+    assert player.play("start")
+    total = len(player.cues["start"])
+    played = 0
+    while player.playing is not None:
+        player._callback(out, 1024, None, None)
+        played += int(np.count_nonzero(out))
+    assert played == total
+    player._callback(out, 1024, None, None)
+    assert not out.any()
+
+
+def test_play_unknown(tmp_path):
+    player, _ = make_player({})
+    assert player.play("start") is False
@@ -0,0 +1,654 @@
+"""Test the asyncio daemon against a fake model."""
+
+import asyncio
+import io
+import json
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from stt.aio import Client
+from stt.daemon import Daemon
+
+
+def fake_model(*texts):
+    model = MagicMock()
+    segs = []
+    for t in texts:
+        seg = MagicMock()
+        seg.text = f" {t} "
+        segs.append(seg)
+    model.transcribe.side_effect = lambda *a, **kw: (iter(segs), None)
+    return model
+
+
+def write_wav(path, seconds=1.0, rate=16000):
+    audio = np.random.randn(int(rate * seconds)).astype(np.float32) * 0.1
+    sf.write(str(path), audio, rate, subtype="FLOAT")
+    return str(path)
+
+
+def wav_bytes(seconds=1.0, rate=16000):
+    buf = io.BytesIO()
+    audio = np.random.randn(int(rate * seconds)).astype(np.float32) * 0.1
+    sf.write(buf, audio, rate, format="WAV", subtype="FLOAT")
+    return buf.getvalue()
+
+
+def run_with_daemon(tmp_path, model, body, cues=None):
+    """Start a Daemon on a temp socket, run body(client), then stop it."""
+    sock = str(tmp_path / "d.sock")
+
+    async def main():
+        daemon = Daemon(model)
+        daemon.cues = cues
+        await daemon.start(sock)
+        serving = asyncio.create_task(daemon.serve_until_stopped())
+        try:
+            return await body(Client(sock, timeout=5))
+        finally:
+            daemon.stop()
+            await serving
+
+    return asyncio.run(main())
+
+
+def test_ping(tmp_path):
+    async def body(client):
+        return await client.ping()
+
+    assert run_with_daemon(tmp_path, fake_model(), body)
+
+
+def test_transcribe_path(tmp_path):
+    wav = write_wav(tmp_path / "a.wav")
+
+    async def body(client):
+        return await client.transcribe(wav)
+
+    assert run_with_daemon(tmp_path, fake_model("hello", "world"), body) == "hello world"
+
+
+def test_transcribe_bytes(tmp_path):
+    async def body(client):
+        return await client.transcribe_bytes(wav_bytes())
+
+    assert run_with_daemon(tmp_path, fake_model("inline"), body) == "inline"
+
+
+def test_stream_segments(tmp_path):
+    wav = write_wav(tmp_path / "a.wav")
+
+    async def body(client):
+        return [seg async for seg in client.stream(wav)]
+
+    assert run_with_daemon(tmp_path, fake_model("one", "two"), body) == ["one", "two"]
+
+
+def test_empty_transcript_is_marked(tmp_path):
+    from stt.protocol import encode_request
+
+    async def body(client):
+        raw = await client.request(encode_request("transcribe", data=wav_bytes()))
+        text = await client.transcribe_bytes(wav_bytes())
+        return raw, text, [seg async for seg in client.stream(data=wav_bytes())]
+
+    assert run_with_daemon(tmp_path, fake_model(), body) == ("\n", "", [])
+
+
+def test_unknown_command(tmp_path):
+    async def body(client):
+        return await client.request(b"frobnicate")
+
+    assert run_with_daemon(tmp_path, fake_model(), body) == "ERROR: unknown command"
+
+
+def test_missing_file_returns_error(tmp_path):
+    async def body(client):
+        return await client.request(b"transcribe /nonexistent.wav")
+
+    assert run_with_daemon(tmp_path, fake_model(), body).startswith("ERROR:")
+
+
+def test_many_idle_connections(tmp_path):
+    """Idle connections don't block other requests."""
+    sock = str(tmp_path / "d.sock")
+
+    async def body(client):
+        idle = [await asyncio.open_unix_connection(sock) for _ in range(50)]
+        try:
+            return await client.ping()
+        finally:
+            for _, w in idle:
+                w.close()
+
+    assert run_with_daemon(tmp_path, fake_model(), body)
+
+
+def test_shutdown_stops_server(tmp_path):
+    sock = str(tmp_path / "d.sock")
+
+    async def main():
+        daemon = Daemon(fake_model())
+        await daemon.start(sock)
+        serving = asyncio.create_task(daemon.serve_until_stopped())
+        await Client(sock).shutdown()
+        await asyncio.wait_for(serving, 2)
+
+    asyncio.run(main())
+
+
+def test_stats_records_stages(tmp_path):
+    wav = write_wav(tmp_path / "a.wav", seconds=2.0)
+
+    async def body(client):
+        await client.transcribe(wav)
+        return json.loads(await client.request(b"stats"))
+
+    stats = run_with_daemon(tmp_path, fake_model("hi"), body)
+    assert stats["requests"] == {"transcribe": 1}
+    assert stats["in_flight"] == 0
+    assert stats["audio_seconds"] == 2.0
+    for stage in ("queue_wait", "preprocess", "inference", "total"):
+        assert stats["latency"][stage]["count"] == 1
+
+
+def test_trace_id_records_daemon_spans(tmp_path):
+    from unittest.mock import patch
+
+    from stt.protocol import encode_request
+    from stt.trace import load
+
+    wav = write_wav(tmp_path / "a.wav")
+    trace_path = str(tmp_path / "trace.jsonl")
+
+    async def body(client):
+        return await client.request(encode_request("transcribe", path=wav, trace="t1"))
+
+    with patch("stt.trace.TRACE_PATH", trace_path):
+        assert run_with_daemon(tmp_path, fake_model("hi"), body) == "hi"
+        names = {s["name"] for s in load("t1", trace_path)}
+    assert names == {"daemon.queue_wait", "daemon.preprocess", "daemon.inference", "daemon.total"}
+
+
+def test_cue(tmp_path):
+    cues = MagicMock()
+    cues.play.side_effect = lambda name: name == "start"
+
+    async def body(client):
+        return [await client.request(f"cue {name}".encode()) for name in ("start", "bogus")]
+
+    assert run_with_daemon(tmp_path, fake_model(), body, cues) == [
+        "ok", "ERROR: cue unavailable",
+    ]
+    assert [c.args[0] for c in cues.play.call_args_list] == ["start", "bogus"]
+
+
+def test_cue_without_player(tmp_path):
+    async def body(client):
+        return await client.request(b"cue start")
+
+    assert run_with_daemon(tmp_path, fake_model(), body) == "ERROR: cue unavailable"
+
+
+def run_loading(tmp_path, body):
+    """Like run_with_daemon, but the daemon has no model yet: body(client, daemon)."""
+    sock = str(tmp_path / "d.sock")
+
+    async def main():
+        daemon = Daemon()
+        await daemon.start(sock)
+        serving = asyncio.create_task(daemon.serve_until_stopped())
+        try:
+            return await body(Client(sock, timeout=5), daemon)
+        finally:
+            daemon.stop()
+            await serving
+
+    return asyncio.run(main())
+
+
+def test_requests_queue_until_model_loaded(tmp_path):
+    wav = write_wav(tmp_path / "a.wav")
+
+    async def body(client, daemon):
+        assert await client.ping()
+        pending = asyncio.create_task(client.transcribe(wav))
+        await asyncio.sleep(0.1)
+        assert not pending.done()
+        daemon.set_model(fake_model("queued"))
+        return await pending
+
+    assert run_loading(tmp_path, body) == "queued"
+
+
+def test_wait_ready(tmp_path):
+    async def body(client, daemon):
+        before = await client.wait_ready(0.05)
+        stats = json.loads(await client.request(b"stats"))
+        waiter = asyncio.create_task(client.wait_ready(5))
+        await asyncio.sleep(0.05)
+        daemon.set_model(fake_model())
+        return before, stats["model_ready"], await waiter
+
+    assert run_loading(tmp_path, body) == (False, False, True)
+
+
+def test_load_failure_reaches_waiting_clients(tmp_path):
+    wav = write_wav(tmp_path / "a.wav")
+
+    async def body(client, daemon):
+        pending = asyncio.create_task(client.request(f"transcribe {wav}".encode()))
+        await asyncio.sleep(0.05)
+        daemon.fail_load(RuntimeError("out of memory"))
+        ready = await client.request(b"wait-ready")
+        return await pending, ready
+
+    reply, ready = run_loading(tmp_path, body)
+    assert reply == "ERROR: model failed to load: out of memory"
+    assert ready == "ERROR: model failed to load: out of memory"
+
+
+def test_wait_ready_bad_timeout(tmp_path):
+    async def body(client):
+        return await client.request(b"wait-ready soon")
+
+    assert run_with_daemon(tmp_path, fake_model(), body).startswith("ERROR:")
+
+
+def test_record_from_capture(tmp_path):
+    capture = MagicMock()
+    capture.stop_to_file.side_effect = [True, False]
+
+    async def body(client):
+        return [await client.request(r) for r in (
+            b"record-start", b"record-start 0.5", b"record-stop /tmp/a.wav",
+            b"record-stop /tmp/b.wav", b"record-stop",
+        )]
+
+    async def main():
+        daemon = Daemon(fake_model())
+        daemon.capture = capture
+        daemon.preroll = 0.25
+        await daemon.start(str(tmp_path / "d.sock"))
+        serving = asyncio.create_task(daemon.serve_until_stopped())
+        try:
+            return await body(Client(str(tmp_path / "d.sock"), timeout=5))
+        finally:
+            daemon.stop()
+            await serving
+
+    assert asyncio.run(main()) == [
+        "ok", "ok", "ok", "ERROR: no audio recorded", "ERROR: record-stop needs a path",
+    ]
+    assert [c.args for c in capture.start.call_args_list] == [(0.25,), (0.5,)]
+    assert capture.stop_to_file.call_args.args == ("/tmp/b.wav",)
+
+
+def test_record_without_capture(tmp_path):
+    async def body(client):
+        return await client.request(b"record-start")
+
+    assert run_with_daemon(tmp_path, fake_model(), body) == "ERROR: capture unavailable"
+
+
+def test_bulk_is_chunked_and_yields_to_interactive(tmp_path):
+    from unittest.mock import patch
+
+    from stt.fake import FakeModel
+
+    long_wav = write_wav(tmp_path / "long.wav", seconds=3.0)
+    short_wav = write_wav(tmp_path / "short.wav", seconds=0.5)
+    done = []
+
+    async def body(client):
+        async def bulk():
+            segments = [s async for s in client.stream(long_wav, priority="bulk")]
+            done.append("bulk")
+            return segments
+
+        async def interactive():
+            await asyncio.sleep(0.1)
+            text = await client.transcribe(short_wav)
+            done.append("interactive")
+            return text
+
+        segments, text = await asyncio.gather(bulk(), interactive())
+        return segments, text, json.loads(await client.request(b"stats"))
+
+    with patch("stt.daemon.BULK_CHUNK_SECONDS", 1.0):
+        segments, text, stats = run_with_daemon(tmp_path, FakeModel("hi", rtf=0.2), body)
+    assert len(segments) >= 3 and set(segments) == {"hi"}  # cuts fall before the limit
+    assert text == "hi"
+    assert done == ["interactive", "bulk"]
+    assert stats["queue_wait"]["bulk"]["count"] == len(segments)  # one wait per chunk
+    assert stats["queue_wait"]["interactive"]["count"] == 1
+    assert stats["audio_seconds"] == 3.5
+
+
+def test_bulk_segment_times_are_offset(tmp_path):
+    from unittest.mock import patch
+
+    from stt.fake import FakeModel
+
+    daemon = Daemon(FakeModel("hi"))
+    wav = write_wav(tmp_path / "long.wav", seconds=2.5)
+
+    async def main():
+        return await daemon.decode(wav, "test", priority="bulk")
+
+    with patch("stt.daemon.BULK_CHUNK_SECONDS", 1.0):
+        segments, info = asyncio.run(main())
+    assert len(segments) >= 3
+    assert segments[0].start == 0.0
+    assert all(a.end == pytest.approx(b.start) for a, b in zip(segments, segments[1:]))
+    assert segments[-1].end == pytest.approx(2.5)
+    assert info.duration == 2.5
+
+
+def test_unknown_priority(tmp_path):
+    from stt.protocol import encode_request
+
+    wav = write_wav(tmp_path / "a.wav")
+
+    async def body(client):
+        return await client.request(encode_request("transcribe", path=wav, priority="asap"))
+
+    assert run_with_daemon(tmp_path, fake_model("hi"), body).startswith(
+        "ERROR: unknown priority"
+    )
+
+
+class SlowModel:
+    """Yields many segments slowly, counting how many were decoded."""
+
+    def __init__(self, count=50, delay=0.02):
+        self.count = count
+        self.delay = delay
+        self.calls = 0
+        self.decoded = 0
+
+    def transcribe(self, audio, **kwargs):
+        import time
+
+        from stt.fake import FakeInfo, FakeSegment
+
+        self.calls += 1
+
+        def segments():
+            for i in range(self.count):
+                time.sleep(self.delay)
+                self.decoded += 1
+                yield FakeSegment(" word", i, i + 1)
+
+        return segments(), FakeInfo(len(audio) / 16000)
+
+
+def test_cancel_by_id_stops_decoding(tmp_path):
+    from stt.aio import DaemonError
+
+    model = SlowModel()
+    wav = write_wav(tmp_path / "a.wav")
+
+    async def body(client):
+        seen = []
+        with pytest.raises(DaemonError, match="cancelled"):
+            async for segment in client.stream(wav, request_id="job1"):
+                seen.append(segment)
+                if len(seen) == 1:
+                    assert await client.cancel("job1")
+        unknown = await client.cancel("job1")
+        return seen, unknown, json.loads(await client.request(b"stats"))
+
+    _, unknown, stats = run_with_daemon(tmp_path, model, body)
+    assert model.decoded < model.count
+    assert not unknown  # finished requests are forgotten
+    assert stats["cancelled"] == {"stream": 1}
+    assert stats["errors"] == {}
+
+
+def test_deadline_stops_decoding(tmp_path):
+    from stt.aio import DaemonError
+
+    model = SlowModel()
+    wav = write_wav(tmp_path / "a.wav")
+
+    async def body(client):
+        with pytest.raises(DaemonError, match="deadline passed"):
+            await client.transcribe(wav, deadline=0.1)
+
+    run_with_daemon(tmp_path, model, body)
+    assert model.decoded < model.count
+
+
+def test_expired_request_dropped_from_queue(tmp_path):
+    from stt.aio import DaemonError
+
+    model = SlowModel(count=10)
+    wav = write_wav(tmp_path / "a.wav")
+
+    async def body(client):
+        first = asyncio.create_task(client.transcribe(wav))
+        await asyncio.sleep(0.05)
+        with pytest.raises(DaemonError, match="deadline passed"):
+            await client.transcribe(wav, deadline=0.05)
+        return await first
+
+    assert run_with_daemon(tmp_path, model, body) == " ".join(["word"] * 10)
+    assert model.calls == 1
+
+
+def test_client_disconnect_cancels(tmp_path):
+    from stt.protocol import encode_request
+
+    model = SlowModel()
+    wav = write_wav(tmp_path / "a.wav")
+    sock = str(tmp_path / "d.sock")
+
+    async def body(client):
+        _, writer = await asyncio.open_unix_connection(sock)
+        writer.write(encode_request("transcribe", path=wav))
+        await writer.drain()
+        await asyncio.sleep(0.1)
+        writer.close()
+        for _ in range(100):
+            stats = json.loads(await client.request(b"stats"))
+            if stats["in_flight"] == 0:
+                return stats
+            await asyncio.sleep(0.02)
+
+    stats = run_with_daemon(tmp_path, model, body)
+    assert stats["cancelled"] == {"transcribe": 1}
+    assert model.decoded < model.count
+
+
+def test_cancel_unknown_request(tmp_path):
+    async def body(client):
+        return await client.request(b"cancel nope")
+
+    assert run_with_daemon(tmp_path, fake_model(), body) == "ERROR: no such request"
+
+
+def test_audio_prepared_while_model_busy(tmp_path):
+    import threading
+    import time
+    from unittest.mock import patch
+
+    from stt.core import load_audio
+    from stt.fake import FakeModel
+
+    threads = set()
+
+    def slow_load(source):
+        if not isinstance(source, np.ndarray):  # reading the file, not a no-op
+            threads.add(threading.current_thread().name.rpartition("_")[0])
+            time.sleep(0.3)
+        return load_audio(source)
+
+    wavs = [write_wav(tmp_path / f"{i}.wav", seconds=1.0) for i in range(2)]
+
+    async def body(client):
+        t0 = time.monotonic()
+        texts = await asyncio.gather(*(client.transcribe(w) for w in wavs))
+        return texts, time.monotonic() - t0
+
+    with patch("stt.core.load_audio", slow_load):
+        texts, elapsed = run_with_daemon(tmp_path, FakeModel("hi", rtf=0.3), body)
+    assert texts == ["hi", "hi"]
+    assert threads == {"stt-prep"}
+    assert elapsed < 1.05  # serial read + decode would take 1.2s
+
+
+def test_silence_gated_and_timestamps_untrimmed(tmp_path):
+    from stt.fake import FakeModel
+
+    rate = 16000
+    silent = str(tmp_path / "silent.wav")
+    sf.write(silent, np.zeros(rate, dtype=np.float32), rate, subtype="FLOAT")
+    audio = np.zeros(3 * rate, dtype=np.float32)
+    audio[rate:2 * rate] = np.random.randn(rate) * 0.1
+    padded = str(tmp_path / "padded.wav")
+    sf.write(padded, audio, rate, subtype="FLOAT")
+    model = FakeModel("hi")
+    daemon = Daemon(model)
+
+    async def main():
+        return await daemon.decode(silent, "test"), await daemon.decode(padded, "test")
+
+    (gated, gated_info), (segments, info) = asyncio.run(main())
+    assert gated == [] and gated_info is None
+    assert segments[0].start == pytest.approx(0.8)  # the 0.2 s pad before speech
+    assert segments[0].end == pytest.approx(2.2)
+    assert info.duration == 3.0
+    stats = daemon.metrics.snapshot()
+    assert stats["gated"] == 1
+    assert stats["trimmed_seconds"] == pytest.approx(1.6)
+    assert stats["audio_seconds"] == pytest.approx(1.4)
+
+
+def test_decoding_options_reach_model(tmp_path):
+    from stt.protocol import encode_request
+
+    model = fake_model("hi")
+    wav = write_wav(tmp_path / "a.wav")
+    options = {"vad_filter": False, "beam_size": 1, "initial_prompt": "Kubernetes"}
+
+    async def body(client):
+        good = await client.transcribe(wav, decode=options)
+        bad = await client.request(
+            encode_request("transcribe", path=wav, decode={"beam": 2})
+        )
+        return good, bad
+
+    good, bad = run_with_daemon(tmp_path, model, body)
+    assert good == "hi"
+    assert bad == "ERROR: unknown decoding option 'beam'"
+    assert model.transcribe.call_count == 1
+    assert model.transcribe.call_args.kwargs == options
+
+
+def test_clip_timestamps_skip_trimming(tmp_path):
+    from stt.fake import FakeModel
+
+    rate = 16000
+    audio = np.zeros(3 * rate, dtype=np.float32)
+    audio[rate:2 * rate] = np.random.randn(rate) * 0.1
+    wav = str(tmp_path / "padded.wav")
+    sf.write(wav, audio, rate, subtype="FLOAT")
+    daemon = Daemon(FakeModel("hi"))
+
+    async def main():
+        return await daemon.decode(
+            wav, "test", priority="bulk", options={"clip_timestamps": [1.0, 2.0]}
+        )
+
+    segments, _ = asyncio.run(main())
+    assert [(s.start, s.end) for s in segments] == [(0.0, 3.0)]  # whole file, one piece
+
+
+def run_reloadable(tmp_path, model, loader, body):
+    """Like run_with_daemon, with daemon.loader set; body gets (client, daemon)."""
+    sock = str(tmp_path / "d.sock")
+
+    async def main():
+        daemon = Daemon(model)
+        daemon.model_name = "old"
+        daemon.loader = loader
+        await daemon.start(sock)
+        serving = asyncio.create_task(daemon.serve_until_stopped())
+        try:
+            return await body(Client(sock, timeout=5), daemon)
+        finally:
+            daemon.stop()
+            await serving
+
+    return asyncio.run(main())
+
+
+def test_reload_switches_after_in_flight_requests(tmp_path):
+    from stt.fake import FakeModel
+    from stt.protocol import encode_request
+
+    old = SlowModel(count=10)
+    loads = []
+
+    def loader(name, compute_type):
+        loads.append((name, compute_type))
+        return FakeModel("new model"), None
+
+    async def body(client, daemon):
+        stream = client.stream(data=wav_bytes())
+        first = await stream.__anext__()  # decoding on the old model
+        reply = await client.request(
+            encode_request("reload", model="small.en", compute_type="int8")
+        )
+        rest = [segment async for segment in stream]
+        stats = json.loads(await client.request(b"stats"))
+        return first, rest, reply, await client.transcribe_bytes(wav_bytes()), stats
+
+    first, rest, reply, text, stats = run_reloadable(tmp_path, old, loader, body)
+    assert reply == "ok"
+    assert loads == [("small.en", "int8")]
+    assert [first, *rest] == ["word"] * 10  # finished on the old model
+    assert text == "new model"
+    assert stats["model"] == "small.en"
+
+
+def test_failed_reload_keeps_old_model(tmp_path):
+    from stt.fake import FakeModel
+
+    def loader(name, compute_type):
+        raise RuntimeError(f"no such model {name}")
+
+    async def body(client, daemon):
+        reply = await client.request(b"reload tiny.xx")
+        return reply, await client.transcribe_bytes(wav_bytes()), daemon.model_name
+
+    reply, text, name = run_reloadable(tmp_path, FakeModel("old model"), loader, body)
+    assert reply == "ERROR: no such model tiny.xx"
+    assert text == "old model"
+    assert name == "old"
+
+
+def test_reload_keeps_started_compute_type(monkeypatch):
+    import argparse
+
+    from stt import daemon as daemon_mod
+
+    built = []
+    monkeypatch.setattr(
+        daemon_mod, "_make_model", lambda args, warm: built.append(args.compute_type) or "model"
+    )
+    args = argparse.Namespace(model="base.en", compute_type="int8", procs=0)
+    assert daemon_mod._load_replacement(args, "small.en") == ("model", None)
+    assert daemon_mod._load_replacement(args, "small.en", "float16") == ("model", None)
+    assert built == ["int8", "float16"]
+
+
+def test_reload_unavailable_without_loader(tmp_path):
+    async def body(client):
+        return await client.request(b"reload small.en")
+
+    assert run_with_daemon(tmp_path, fake_model("hi"), body) == "ERROR: reload unavailable"
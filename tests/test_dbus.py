@@ -0,0 +1,168 @@
+"""Tests for stt.dbus — wire format and the coalescing Notifier."""
+
+import socket
+import struct
+import threading
+import time
+
+import pytest
+
+from stt.dbus import (
+    FIELD_REPLY_SERIAL,
+    FIELD_SIGNATURE,
+    METHOD_CALL,
+    METHOD_RETURN,
+    DBusError,
+    Notifier,
+    _Writer,
+    encode_notify,
+    parse_message,
+    session_bus_address,
+)
+
+
+def method_return(reply_serial, value):
+    w = _Writer()
+    w.buf += b"l"
+    w.byte(METHOD_RETURN)
+    w.byte(0)
+    w.byte(1)
+    w.uint32(4)
+    w.uint32(1000 + reply_serial)
+
+    def field(f):
+        w.align(8)
+        w.byte(f[0])
+        w.signature(f[1])
+        if f[1] == "g":
+            w.signature(f[2])
+        else:
+            w.uint32(f[2])
+
+    w.array(8, [(FIELD_REPLY_SERIAL, "u", reply_serial), (FIELD_SIGNATURE, "g", "u")], field)
+    w.align(8)
+    return bytes(w.buf) + struct.pack("<I", value)
+
+
+class FakeBus:
+    """Accepts one client, answers auth and returns `notify_id` for Notify."""
+
+    def __init__(self, path, notify_id=42):
+        self.notify_id = notify_id
+        self.messages = []
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(path)
+        self.server.listen(1)
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        conn, _ = self.server.accept()
+        data = b""
+        while b"\r\n" not in data:
+            data += conn.recv(256)
+        assert data.startswith(b"\0AUTH EXTERNAL ")
+        conn.sendall(b"OK 0123456789abcdef\r\n")
+        data = b""
+        try:
+            while chunk := conn.recv(65536):
+                data += chunk
+                if data.startswith(b"BEGIN\r\n"):
+                    data = data[7:]
+                while (msg := parse_message(data)) is not None:
+                    kind, _, _, length = msg
+                    serial = struct.unpack_from("<I", data, 8)[0]
+                    self.messages.append(data[:length])
+                    data = data[length:]
+                    if kind == METHOD_CALL and b"Notify" in self.messages[-1]:
+                        conn.sendall(method_return(serial, self.notify_id))
+        except ConnectionResetError:
+            pass  # client closed with replies unread
+        conn.close()
+        self.server.close()
+
+    def notifies(self):
+        return [m for m in self.messages if b"Notify" in m]
+
+
+@pytest.fixture
+def bus(tmp_path):
+    return FakeBus(str(tmp_path / "bus"))
+
+
+def wait_for(cond, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not cond():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_session_bus_address():
+    assert session_bus_address("unix:path=/run/user/1000/bus") == "/run/user/1000/bus"
+    assert session_bus_address("unix:abstract=/tmp/dbus-x,guid=ab") == "\0/tmp/dbus-x"
+    assert session_bus_address("tcp:host=x,port=1;unix:path=/b") == "/b"
+    with pytest.raises(DBusError):
+        session_bus_address("tcp:host=x,port=1")
+
+
+def test_notify_message_decodes():
+    low_level = pytest.importorskip("jeepney.low_level")
+    msg = encode_notify(7, "STT", 9999, "STT", "Recording...", 2000, "critical")
+    parser = low_level.Parser()
+    parser.add_data(msg)
+    decoded = parser.get_next_message()
+    assert decoded.header.serial == 7
+    assert decoded.body == (
+        "STT", 9999, "", "STT", "Recording...", [], {"urgency": ("y", 2)}, 2000,
+    )
+
+
+def test_parse_incomplete():
+    msg = encode_notify(1, "STT", 0, "t", "b", 1000, "low")
+    assert parse_message(msg[:-1]) is None
+    assert parse_message(msg)[3] == len(msg)
+
+
+def test_parse_method_return():
+    kind, reply_serial, body, _ = parse_message(method_return(3, 42))
+    assert (kind, reply_serial, body) == (METHOD_RETURN, 3, 42)
+
+
+def test_notifier_sends_and_adopts_server_id(bus, tmp_path):
+    n = Notifier(replaces_id=9999, min_interval=0, address=f"unix:path={tmp_path}/bus")
+    n.notify("STT", "Recording...")
+    wait_for(lambda: len(bus.notifies()) == 1)
+    time.sleep(0.05)
+    n.notify("STT", "Typed: hi")
+    wait_for(lambda: len(bus.notifies()) == 2)
+    n.close()
+    first, second = bus.notifies()
+    assert b"Recording..." in first and struct.pack("<I", 9999) in first
+    assert b"Typed: hi" in second and struct.pack("<I", 42) in second
+
+
+def test_notifier_coalesces_fast_updates(bus, tmp_path):
+    n = Notifier(min_interval=0.2, address=f"unix:path={tmp_path}/bus")
+    n.notify("STT", "one")
+    n.notify("STT", "two")
+    n.notify("STT", "three")
+    wait_for(lambda: len(bus.notifies()) == 2)
+    n.close()
+    bodies = bus.notifies()
+    assert b"one" in bodies[0]
+    assert b"three" in bodies[1]
+
+
+def test_flush_sends_queued_update(bus, tmp_path):
+    n = Notifier(min_interval=60, address=f"unix:path={tmp_path}/bus")
+    n.notify("STT", "one")
+    n.notify("STT", "last")
+    n.flush()
+    wait_for(lambda: len(bus.notifies()) == 2)
+    n.close()
+    assert b"last" in bus.notifies()[1]
+
+
+def test_connect_failure(tmp_path):
+    with pytest.raises(OSError):
+        Notifier(address=f"unix:path={tmp_path}/missing")
@@ -0,0 +1,182 @@
+"""Test the OpenAI-compatible HTTP endpoint against a fake model."""
+
+import asyncio
+import http.client
+import json
+from unittest.mock import MagicMock
+
+from stt.daemon import Daemon
+from stt.httpapi import HTTPServer, format_srt, parse_multipart
+from tests.test_daemon import fake_model, wav_bytes
+
+BOUNDARY = "xXxBOUNDARYxXx"
+
+
+def multipart(fields):
+    out = b""
+    for name, (filename, data) in fields.items():
+        disp = f'form-data; name="{name}"'
+        if filename:
+            disp += f'; filename="{filename}"'
+        out += f"--{BOUNDARY}\r\nContent-Disposition: {disp}\r\n\r\n".encode() + data + b"\r\n"
+    return out + f"--{BOUNDARY}--\r\n".encode()
+
+
+def seg(text, start, end):
+    s = MagicMock()
+    s.text, s.start, s.end = text, start, end
+    return s
+
+
+def test_parse_multipart_binary_safe():
+    data = b"RIFF\r\n--not-a-boundary\r\n\x00\xff"
+    body = multipart({"file": ("a.wav", data), "response_format": (None, b"srt")})
+    form = parse_multipart(body, f"multipart/form-data; boundary={BOUNDARY}")
+    assert form["file"] == ("a.wav", data)
+    assert form["response_format"] == (None, b"srt")
+
+
+def test_format_srt():
+    out = format_srt([seg(" hi", 0.0, 1.5), seg(" there", 61.25, 3725.0)])
+    assert out == (
+        "1\n00:00:00,000 --> 00:00:01,500\nhi\n\n"
+        "2\n00:01:01,250 --> 01:02:05,000\nthere\n"
+    )
+
+
+def request_all(tmp_path, model, requests):
+    """Serve HTTP with a Daemon and send requests over one keep-alive connection."""
+
+    async def main():
+        daemon = Daemon(model)
+        server = await HTTPServer(daemon).start("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+
+        def client():
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            results = []
+            for method, path, fields in requests:
+                body = multipart(fields) if fields else None
+                headers = {"Content-Type": f"multipart/form-data; boundary={BOUNDARY}"}
+                conn.request(method, path, body=body, headers=headers)
+                resp = conn.getresponse()
+                results.append((resp.status, resp.read()))
+            conn.close()
+            return results
+
+        try:
+            return await asyncio.to_thread(client)
+        finally:
+            server.close()
+
+    return asyncio.run(main())
+
+
+def test_json_and_text_keep_alive(tmp_path):
+    audio = wav_bytes()
+    path = "/v1/audio/transcriptions"
+    results = request_all(tmp_path, fake_model("hello", "world"), [
+        ("POST", path, {"file": ("a.wav", audio), "model": (None, b"whisper-1")}),
+        ("POST", path, {"file": ("a.wav", audio), "response_format": (None, b"text")}),
+    ])
+    assert results[0] == (200, json.dumps({"text": "hello world"}).encode())
+    assert results[1] == (200, b"hello world")
+
+
+def test_verbose_json(tmp_path):
+    model = MagicMock()
+    info = MagicMock(language="en", duration=1.0)
+    model.transcribe.return_value = ([seg(" hi", 0.0, 0.8)], info)
+    fields = {"file": ("a.wav", wav_bytes()), "response_format": (None, b"verbose_json")}
+    [(status, body)] = request_all(tmp_path, model, [
+        ("POST", "/v1/audio/transcriptions", fields),
+    ])
+    result = json.loads(body)
+    assert status == 200
+    assert result["task"] == "transcribe"
+    assert result["language"] == "en"
+    assert result["segments"] == [{"id": 0, "start": 0.0, "end": 0.8, "text": " hi"}]
+
+
+def test_errors(tmp_path):
+    results = request_all(tmp_path, fake_model(), [
+        ("GET", "/nope", None),
+        ("GET", "/v1/audio/transcriptions", None),
+        ("POST", "/v1/audio/transcriptions", {"model": (None, b"whisper-1")}),
+        ("POST", "/v1/audio/transcriptions",
+         {"file": ("a.wav", b"x"), "response_format": (None, b"vtt")}),
+    ])
+    assert [status for status, _ in results] == [404, 405, 400, 400]
+    assert "error" in json.loads(results[2][1])
+
+
+def test_metrics_endpoint(tmp_path):
+    fields = {"file": ("a.wav", wav_bytes())}
+    results = request_all(tmp_path, fake_model("x"), [
+        ("POST", "/v1/audio/transcriptions", fields),
+        ("GET", "/metrics", None),
+    ])
+    status, body = results[1]
+    assert status == 200
+    assert b'stt_requests_total{kind="http"} 1' in body
+
+
+def test_language_and_prompt_become_options(tmp_path):
+    model = fake_model("hallo")
+    fields = {
+        "file": ("a.wav", wav_bytes()), "language": (None, b"de"),
+        "prompt": (None, b"Glossar: Kubernetes"),
+    }
+    [(status, _)] = request_all(tmp_path, model, [
+        ("POST", "/v1/audio/transcriptions", fields),
+    ])
+    assert status == 200
+    kwargs = model.transcribe.call_args.kwargs
+    assert kwargs["language"] == "de"
+    assert kwargs["initial_prompt"] == "Glossar: Kubernetes"
+
+
+def test_translations_endpoint_sets_task(tmp_path):
+    model = MagicMock()
+    model.transcribe.return_value = ([seg(" hello", 0.0, 0.8)], MagicMock(language="de"))
+    fields = {"file": ("a.wav", wav_bytes()), "response_format": (None, b"verbose_json")}
+    [(status, body)] = request_all(tmp_path, model, [
+        ("POST", "/v1/audio/translations", fields),
+    ])
+    assert status == 200
+    assert json.loads(body)["task"] == "translate"
+    assert model.transcribe.call_args.kwargs["task"] == "translate"
+
+
+def send_raw(request):
+    """Send raw bytes to the HTTP server; return everything it replies."""
+
+    async def main():
+        server = await HTTPServer(Daemon(fake_model())).start("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(request)
+            await writer.drain()
+            reply = await asyncio.wait_for(reader.read(), 5)
+            writer.close()
+            return reply
+        finally:
+            server.close()
+
+    return asyncio.run(main())
+
+
+def test_malformed_content_length():
+    reply = send_raw(
+        b"POST /v1/audio/transcriptions HTTP/1.1\r\nContent-Length: lots\r\n\r\n"
+    )
+    assert reply.startswith(b"HTTP/1.1 400 ")
+    assert b"Content-Length" in reply
+
+
+def test_negative_content_length():
+    reply = send_raw(
+        b"POST /v1/audio/transcriptions HTTP/1.1\r\nContent-Length: -5\r\n\r\n"
+    )
+    assert reply.startswith(b"HTTP/1.1 400 ")
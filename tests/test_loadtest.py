@@ -0,0 +1,65 @@
+"""Test the load generator against an in-process fake daemon."""
+
+import asyncio
+import json
+
+import pytest
+
+from stt.bench import fake_daemon
+from stt.fake import FakeModel
+from stt.loadtest import Recorder, load_clips, main, percentile, run
+
+
+def test_percentile():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile(values, 100) == 100
+    assert percentile([], 50) is None
+
+
+def test_recorder_report():
+    rec = Recorder()
+    rec.latencies = [0.1, 0.3, 0.2]
+    rec.audio_seconds = 15.0
+    rec.errors = 1
+    report = rec.report(elapsed=3.0)
+    assert report["ok"] == 3
+    assert report["throughput"] == 1.0
+    assert report["audio_seconds_per_second"] == 5.0
+    assert report["latency"]["p50"] == 0.2
+    assert report["latency"]["max"] == 0.3
+
+
+def args(**kw):
+    base = dict(mode="closed", rate=50.0, users=3, think=0.0, duration=5.0,
+                requests=12, timeout=5.0, inline=False, seed=0)
+    base.update(kw)
+    return type("Args", (), base)
+
+
+@pytest.mark.parametrize("mode,inline", [("closed", False), ("open", True)])
+def test_run_against_fake(tmp_path, mode, inline):
+    clips = load_clips(None, 2, 0.5, str(tmp_path))
+    with fake_daemon(FakeModel()) as sock:
+        report = asyncio.run(run(args(mode=mode, inline=inline), clips, sock))
+    assert report["ok"] == 12
+    assert report["errors"] == report["timeouts"] == 0
+    assert report["audio_seconds_per_second"] > 0
+
+
+def test_timeouts_counted(tmp_path):
+    clips = load_clips(None, 1, 1.0, str(tmp_path))
+    with fake_daemon(FakeModel(rtf=1.0)) as sock:
+        report = asyncio.run(run(args(users=1, requests=1, timeout=0.2), clips, sock))
+    assert report["timeouts"] == 1
+
+
+def test_main_replays_wav_dir(tmp_path, capsys):
+    wavs = tmp_path / "wavs"
+    wavs.mkdir()
+    load_clips(None, 2, 0.5, str(wavs))
+    out = tmp_path / "report.json"
+    main(["--fake", "--wavs", str(wavs), "-n", "4", "--users", "2", "--json", str(out)])
+    assert json.loads(out.read_text())["ok"] == 4
+    assert "throughput" in capsys.readouterr().out
@@ -0,0 +1,134 @@
+"""Tests for stt.log — queued logging, rotation, levels and JSON output."""
+
+import json
+import logging
+import os
+import sys
+
+import pytest
+
+import stt.log
+from stt.log import JSONFormatter, parse_levels, setup_logging, shutdown_logging
+
+
+@pytest.fixture
+def logdir(tmp_path, monkeypatch):
+    """Point the pipeline at tmp_path; restore the default one afterwards."""
+    path = str(tmp_path / "stt.log")
+    monkeypatch.setattr(stt.log, "LOG_DIR", str(tmp_path))
+    monkeypatch.setattr(stt.log, "LOG_PATH", path)
+    monkeypatch.setattr(stt.log, "LOG_MAX_BYTES", 2000)
+    monkeypatch.setattr(stt.log, "LOG_BACKUPS", 2)
+    shutdown_logging()
+    yield tmp_path
+    shutdown_logging()
+    for name in ("stt.test", "stt.test.quiet"):
+        logging.getLogger(name).setLevel(logging.NOTSET)
+    monkeypatch.undo()
+    setup_logging("stt")
+
+
+def test_records_reach_file_after_shutdown(logdir):
+    log = setup_logging("stt.test")
+    log.debug("hello %s", "file")
+    shutdown_logging()
+    text = (logdir / "stt.log").read_text()
+    assert "stt.test DEBUG hello file" in text
+
+
+def test_handler_only_enqueues(logdir):
+    setup_logging("stt.test")
+    handlers = [h for h in logging.getLogger("stt").handlers if h.__module__ == "stt.log"]
+    assert [type(h) for h in handlers] == [stt.log._QueueHandler]
+    assert handlers[0].thread is None  # writer starts with the first record
+
+
+def test_file_created_lazily(logdir):
+    setup_logging("stt.test")
+    shutdown_logging()
+    assert not (logdir / "stt.log").exists()
+
+
+def test_rotation(logdir):
+    log = setup_logging("stt.test")
+    for i in range(100):
+        log.debug("line %d %s", i, "x" * 40)
+    shutdown_logging()
+    names = sorted(os.listdir(logdir))
+    assert names == ["stt.log", "stt.log.1", "stt.log.2"]
+    assert os.path.getsize(logdir / "stt.log") <= 2000
+
+
+def test_reopens_after_external_rotation(logdir):
+    path = str(logdir / "stt.log")
+    handler = stt.log._RotatingFileHandler(path, 0, 1)
+
+    def emit(msg):
+        handler.emit(logging.LogRecord("stt.test", logging.DEBUG, "", 0, msg, None, None))
+
+    emit("before")
+    os.replace(path, path + ".1")
+    emit("after")
+    handler.close()
+    assert (logdir / "stt.log").read_text() == "after\n"
+    assert (logdir / "stt.log.1").read_text() == "before\n"
+
+
+def test_per_module_levels(logdir, monkeypatch):
+    monkeypatch.setenv("STT_LOG_LEVELS", "stt.test.quiet=WARNING")
+    quiet = setup_logging("stt.test.quiet")
+    loud = setup_logging("stt.test")
+    quiet.info("hidden")
+    loud.info("shown")
+    shutdown_logging()
+    text = (logdir / "stt.log").read_text()
+    assert "shown" in text
+    assert "hidden" not in text
+
+
+def test_json_format_includes_timings(logdir, monkeypatch):
+    monkeypatch.setenv("STT_LOG_FORMAT", "json")
+    log = setup_logging("stt.test")
+    log.debug("decoded", extra={"timings": {"inference": 0.25}})
+    shutdown_logging()
+    entry = json.loads((logdir / "stt.log").read_text().splitlines()[0])
+    assert entry["logger"] == "stt.test"
+    assert entry["msg"] == "decoded"
+    assert entry["timings"] == {"inference": 0.25}
+
+
+def test_json_format_includes_conditioning():
+    from stt.daemon import Daemon
+
+    daemon = Daemon()
+    report = {"duration": 3.0, "start": 0.5, "end": 2.5, "gated": False, "gain": 1.0}
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    daemon_log = logging.getLogger("stt.daemon")
+    daemon_log.addHandler(handler)
+    try:
+        daemon._record_conditioning(report)
+    finally:
+        daemon_log.removeHandler(handler)
+    entry = json.loads(JSONFormatter().format(records[0]))
+    assert entry["conditioning"] == report
+    assert entry["msg"] == "kept 0.50-2.50s of 3.00s"
+
+
+def test_parse_levels():
+    assert parse_levels("stt.daemon=info, stt.core=WARNING") == {
+        "stt.daemon": logging.INFO,
+        "stt.core": logging.WARNING,
+    }
+    assert parse_levels("") == {}
+    assert parse_levels("stt.daemon=bogus,junk") == {}
+
+
+def test_json_formatter_exception():
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = logging.LogRecord("stt.x", logging.ERROR, "", 0, "failed", None, sys.exc_info())
+    entry = json.loads(JSONFormatter().format(record))
+    assert "ValueError: boom" in entry["exc"]
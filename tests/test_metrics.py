@@ -0,0 +1,75 @@
+"""Test metrics histograms and rendering."""
+
+import math
+
+from stt.metrics import Histogram, Metrics
+
+
+def test_histogram_buckets_and_quantiles():
+    h = Histogram(buckets=(1, 2, 4))
+    for v in (0.5, 1.5, 1.5, 3, 10):
+        h.observe(v)
+    assert list(h.cumulative()) == [(1, 1), (2, 3), (4, 4), (math.inf, 5)]
+    assert h.count == 5
+    assert h.sum == 16.5
+    assert h.quantile(0.5) == 1.75
+    # Overflow bucket has no upper bound: report its lower edge.
+    assert h.quantile(1.0) == 4
+
+
+def test_histogram_empty_quantile():
+    assert Histogram().quantile(0.5) is None
+
+
+def test_metrics_snapshot():
+    m = Metrics()
+    m.begin("transcribe")
+    assert m.snapshot()["in_flight"] == 1
+    m.observe("inference", 0.5)
+    m.add_audio(10.0, 0.5)
+    m.end(0.6)
+    m.begin("http")
+    m.error("http")
+    m.end(0.1)
+
+    snap = m.snapshot()
+    assert snap["in_flight"] == 0
+    assert snap["requests"] == {"transcribe": 1, "http": 1}
+    assert snap["errors"] == {"http": 1}
+    assert snap["real_time_factor"] == 0.05
+    assert snap["latency"]["total"]["count"] == 2
+
+
+def test_prometheus_text():
+    m = Metrics()
+    m.model_load_seconds = 2.5
+    m.begin("transcribe")
+    m.observe("queue_wait", 0.003)
+    m.end(0.2)
+    text = m.prometheus()
+    assert 'stt_requests_total{kind="transcribe"} 1' in text
+    assert "stt_model_load_seconds 2.5" in text
+    assert 'stt_stage_seconds_bucket{stage="queue_wait",le="0.005"} 1' in text
+    assert 'stt_stage_seconds_count{stage="total"} 1' in text
+    assert "# TYPE stt_stage_seconds histogram" in text
+
+
+def test_queue_wait_by_priority():
+    m = Metrics()
+    m.observe_wait("interactive", 0.0)
+    m.observe_wait("bulk", 2.0)
+    snap = m.snapshot()
+    assert snap["queue_wait"]["bulk"]["count"] == 1
+    assert snap["queue_wait"]["interactive"]["sum"] == 0.0
+    text = m.prometheus()
+    assert 'stt_queue_wait_seconds_count{priority="bulk"} 1' in text
+
+
+def test_conditioning_counts():
+    m = Metrics()
+    m.add_conditioning({"duration": 3.0, "start": 0.5, "end": 2.0, "gated": False})
+    m.add_conditioning({"duration": 1.0, "start": 0.0, "end": 0.0, "gated": True})
+    snap = m.snapshot()
+    assert snap["trimmed_seconds"] == 1.5
+    assert snap["gated"] == 1
+    assert "stt_gated_total 1" in m.prometheus()
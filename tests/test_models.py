@@ -0,0 +1,221 @@
+"""Tests for the `stt model` store, with a fake download."""
+
+import json
+import os
+
+import pytest
+
+from stt import models
+
+
+def fake_download(files):
+    calls = []
+
+    def download(name, path, revision=None):
+        calls.append((name, revision))
+        for filename, data in files.items():
+            with open(os.path.join(path, filename), "wb") as f:
+                f.write(data)
+
+    download.calls = calls
+    return download
+
+
+FILES = {"model.bin": b"weights" * 100, "config.json": b"{}", "tokenizer.json": b"{}"}
+
+
+def test_pull_writes_manifest(tmp_path):
+    download = fake_download(FILES)
+    manifest = models.pull("Systran/faster-whisper-tiny", root=str(tmp_path), download=download)
+    path = tmp_path / "Systran--faster-whisper-tiny"
+    assert download.calls == [("Systran/faster-whisper-tiny", None)]
+    assert sorted(manifest["files"]) == ["config.json", "model.bin", "tokenizer.json"]
+    assert models.model_size(manifest) == 704
+    assert json.loads((path / models.MANIFEST).read_text()) == manifest
+    assert models.resolve("Systran/faster-whisper-tiny", root=str(tmp_path)) == str(path)
+    assert not (tmp_path / "Systran--faster-whisper-tiny.partial").exists()
+
+
+def test_pull_from_directory(tmp_path):
+    source = tmp_path / "export"
+    source.mkdir()
+    for filename, data in FILES.items():
+        (source / filename).write_bytes(data)
+    (source / ".cache").mkdir()
+    root = str(tmp_path / "store")
+
+    def no_network(*args):
+        raise AssertionError("downloaded")
+
+    manifest = models.pull("tiny", source=str(source), root=root, download=no_network)
+    assert manifest["source"] == str(source)
+    assert not os.path.exists(os.path.join(root, "tiny", ".cache"))
+    assert [m["name"] for m in models.stored(root)] == ["tiny"]
+
+
+def test_failed_pull_leaves_store_unchanged(tmp_path):
+    root = str(tmp_path)
+    models.pull("tiny", root=root, download=fake_download(FILES))
+    with pytest.raises(FileNotFoundError, match="no model.bin"):
+        models.pull("tiny", root=root, download=fake_download({"config.json": b"{}"}))
+    assert models.verify("tiny", root) == []
+    assert sorted(os.listdir(root)) == ["tiny"]
+
+
+def test_resolve_unknown_name(tmp_path):
+    assert models.resolve("small.en", root=str(tmp_path)) is None
+    assert models.resolve(str(tmp_path)) == str(tmp_path)  # a directory is used as is
+
+
+def test_bare_name_not_shadowed_by_directory_in_cwd(tmp_path, monkeypatch):
+    root = str(tmp_path / "store")
+    models.pull("small", root=root, download=fake_download(FILES))
+    (tmp_path / "small").mkdir()
+    monkeypatch.chdir(tmp_path)
+    assert models.resolve("small", root=root) == os.path.join(root, "small")
+    assert models.resolve("./small", root=root) == "./small"
+
+
+def test_verify_finds_damage(tmp_path):
+    root = str(tmp_path)
+    models.pull("tiny", root=root, download=fake_download(FILES))
+    (tmp_path / "tiny" / "model.bin").write_bytes(b"weightz" * 100)
+    (tmp_path / "tiny" / "config.json").unlink()
+    assert models.verify("tiny", root) == [
+        "config.json is missing", "model.bin does not match its checksum",
+    ]
+    assert models.verify("base", root) == ["base is not in the store"]
+
+
+def test_record_load_and_remove(tmp_path):
+    root = str(tmp_path)
+    models.pull("tiny", root=root, download=fake_download(FILES))
+    models.record_load("tiny", "cpu/int8", 1.234, root)
+    models.record_load("other", "cpu/int8", 1.0, root)  # not stored: ignored
+    assert models.read_manifest("tiny", root)["load_seconds"] == {"cpu/int8": 1.23}
+    models.remove("tiny", root)
+    assert models.stored(root) == []
+    with pytest.raises(FileNotFoundError):
+        models.remove("tiny", root)
+
+
+def fake_convert():
+    calls = []
+
+    def run(checkpoint, output_dir, quantization):
+        calls.append(quantization)
+        os.makedirs(output_dir)
+        with open(os.path.join(output_dir, "model.bin"), "w") as f:
+            f.write(quantization)
+
+    run.calls = calls
+    return run
+
+
+def checkpoint(tmp_path, weights=b"float weights"):
+    path = tmp_path / "finetune"
+    path.mkdir(exist_ok=True)
+    (path / "model.safetensors").write_bytes(weights)
+    (path / "config.json").write_text("{}")
+    return str(path)
+
+
+def test_convert_stores_a_variant_per_quantization(tmp_path):
+    root = str(tmp_path / "store")
+    run = fake_convert()
+    manifest = models.convert("ft", checkpoint(tmp_path), ["int8", "float16"], root=root, run=run)
+    assert run.calls == ["int8", "float16"]
+    assert manifest["variants"] == ["int8", "float16"]
+    assert sorted(manifest["files"]) == ["float16/model.bin", "int8/model.bin"]
+    assert models.verify("ft", root) == []
+    path = os.path.join(root, "ft")
+    assert models.resolve("ft", "int8", root) == os.path.join(path, "int8")
+    # no int8_float16 variant: the most precise one is converted at load
+    assert models.resolve("ft", "int8_float16", root) == os.path.join(path, "float16")
+
+
+def test_convert_reuses_variants_of_same_checkpoint(tmp_path):
+    root = str(tmp_path / "store")
+    models.convert("ft", checkpoint(tmp_path), ["int8"], root=root, run=fake_convert())
+    run = fake_convert()
+    reported = []
+    manifest = models.convert(
+        "ft", checkpoint(tmp_path), ["int8", "float16"], root=root, run=run,
+        report=lambda q, converted: reported.append((q, converted)),
+    )
+    assert run.calls == ["float16"]
+    assert reported == [("int8", False), ("float16", True)]
+    assert manifest["variants"] == ["int8", "float16"]
+
+
+def test_changed_checkpoint_invalidates_variants(tmp_path):
+    root = str(tmp_path / "store")
+    models.convert("ft", checkpoint(tmp_path), ["int8", "float16"], root=root, run=fake_convert())
+    run = fake_convert()
+    manifest = models.convert(
+        "ft", checkpoint(tmp_path, b"retrained"), ["int8"], root=root, run=run
+    )
+    assert run.calls == ["int8"]
+    assert manifest["variants"] == ["int8"]
+    assert not os.path.exists(os.path.join(root, "ft", "float16"))
+
+
+def test_resolve_converts_a_changed_checkpoint_again(tmp_path):
+    root = str(tmp_path / "store")
+    ckpt = checkpoint(tmp_path)
+    models.convert("ft", ckpt, ["int8", "float16"], root=root, run=fake_convert())
+    run = fake_convert()
+    assert models.resolve("ft", "int8", root, run=run) == os.path.join(root, "ft", "int8")
+    assert run.calls == []  # unchanged: no conversion on load
+
+    checkpoint(tmp_path, b"retrained")
+    assert models.resolve("ft", "int8", root, run=run) == os.path.join(root, "ft", "int8")
+    assert run.calls == ["int8"]
+    manifest = models.read_manifest("ft", root)
+    assert manifest["variants"] == ["int8"]
+    assert manifest["checkpoint_sha256"] == models.checkpoint_sha256(ckpt)
+    assert sorted(os.listdir(os.path.join(root, "ft"))) == ["int8", models.MANIFEST]
+
+
+def test_resolve_keeps_old_conversion_if_converting_fails(tmp_path):
+    root = str(tmp_path / "store")
+    models.convert("ft", checkpoint(tmp_path), ["int8"], root=root, run=fake_convert())
+    checkpoint(tmp_path, b"retrained")
+
+    def run(checkpoint, output_dir, quantization):
+        raise ImportError("No module named 'transformers'")
+
+    assert models.resolve("ft", "int8", root, run=run) == os.path.join(root, "ft", "int8")
+    assert models.verify("ft", root) == []
+
+
+def test_touched_checkpoint_is_not_converted_again(tmp_path):
+    root = str(tmp_path / "store")
+    ckpt = checkpoint(tmp_path)
+    models.convert("ft", ckpt, ["int8"], root=root, run=fake_convert())
+    weights = os.path.join(ckpt, "model.safetensors")
+    os.utime(weights, ns=(0, 0))
+    run = fake_convert()
+    models.resolve("ft", "int8", root, run=run)
+    assert run.calls == []
+    assert not models.checkpoint_changed(models.read_manifest("ft", root))
+
+
+def test_failed_conversion_keeps_finished_variants(tmp_path):
+    root = str(tmp_path / "store")
+
+    def run(checkpoint, output_dir, quantization):
+        if quantization == "float16":
+            os.makedirs(output_dir)
+            raise RuntimeError("out of memory")
+        fake_convert()(checkpoint, output_dir, quantization)
+
+    with pytest.raises(RuntimeError):
+        models.convert("ft", checkpoint(tmp_path), ["int8", "float16"], root=root, run=run)
+    assert models.read_manifest("ft", root)["variants"] == ["int8"]
+    assert sorted(os.listdir(os.path.join(root, "ft"))) == ["int8", models.MANIFEST]
+
+
+def test_convert_rejects_unknown_quantization(tmp_path):
+    with pytest.raises(ValueError, match="int4"):
+        models.convert("ft", checkpoint(tmp_path), ["int4"], root=str(tmp_path), run=fake_convert())
@@ -0,0 +1,295 @@
+"""Tests for stt.output backend selection and stt.x11 helpers."""
+
+import os
+import socket
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import stt.output as output
+
+
+@pytest.fixture
+def x11(monkeypatch):
+    backend = MagicMock()
+    backend.active_window.return_value = 111
+    monkeypatch.setattr(output, "_x11", backend)
+    monkeypatch.setattr(output, "WINDOWS", False)
+    return backend
+
+
+@pytest.fixture
+def no_bspwm(monkeypatch):
+    monkeypatch.setenv("BSPWM_SOCKET", "/nonexistent/bspwm-socket")
+
+
+def test_type_without_window_uses_x11(x11):
+    with patch("stt.output.subprocess.run") as run:
+        output.type_text("hello")
+    x11.type.assert_called_once_with("hello")
+    run.assert_not_called()
+
+
+def test_paste_into_window_uses_x11(x11, no_bspwm):
+    pytest.importorskip("Xlib")
+    with patch("stt.output.subprocess.run") as run:
+        output.type_text("hello", window_id="222")
+    assert [c.args[0] for c in x11.activate.call_args_list] == [222, 111]
+    x11.key.assert_called_once_with("ctrl+shift+v")
+    run.assert_not_called()
+
+
+def test_x11_failure_falls_back_to_xdotool(x11):
+    x11.type.side_effect = RuntimeError("connection lost")
+    with patch("stt.output.subprocess.run") as run:
+        output.type_text("hello")
+    assert run.call_args.args[0][:2] == ["xdotool", "type"]
+
+
+def test_x11_failure_types_only_the_rest(x11):
+    pytest.importorskip("Xlib")
+    from stt.x11 import TypingError
+
+    x11.type.side_effect = TypingError(3, OSError("connection lost"))
+    with patch("stt.output.subprocess.run") as run:
+        output.type_text("hello")
+    assert run.call_args.args[0] == ["xdotool", "type", "--clearmodifiers", "--", "lo"]
+
+
+def test_x11_failure_after_last_character_types_nothing(x11):
+    pytest.importorskip("Xlib")
+    from stt.x11 import TypingError
+
+    x11.type.side_effect = TypingError(5, OSError("connection lost"))
+    with patch("stt.output.subprocess.run") as run:
+        output.type_text("hello")
+    run.assert_not_called()
+
+
+def test_x11_type_counts_sent_characters():
+    pytest.importorskip("Xlib")
+    from Xlib import X
+
+    from stt.x11 import X11, TypingError
+
+    x11 = X11.__new__(X11)
+    x11.lock = threading.Lock()
+    x11.display = MagicMock()
+    x11.display.get_modifier_mapping.return_value = []
+    x11.display.keysym_to_keycodes.return_value = [(38, 0)]
+    presses = []
+
+    def fake(kind, keycode):
+        if kind == X.KeyPress:
+            presses.append(keycode)
+            if len(presses) == 4:
+                raise ConnectionResetError("X server gone")
+
+    x11._fake = fake
+    with pytest.raises(TypingError) as exc:
+        x11.type("hello", delay=0)
+    assert exc.value.sent == 3
+
+
+def test_clipboard_stays_with_xclip_when_asked(x11, monkeypatch):
+    monkeypatch.setattr(output, "_x11_clipboard", True)
+    assert output.use_x11(clipboard=False)
+    with patch("stt.output.subprocess.run") as run:
+        output.copy_to_clipboard("hello")
+        output.type_text("hello")
+    x11.set_clipboard.assert_not_called()
+    x11.type.assert_called_once_with("hello")
+    assert run.call_args.args[0] == ["xclip", "-selection", "clipboard"]
+
+
+def test_clipboard_uses_x11(x11):
+    with patch("stt.output.subprocess.run") as run:
+        output.copy_to_clipboard("hello")
+    x11.set_clipboard.assert_called_once_with("hello")
+    run.assert_not_called()
+
+
+def test_clipboard_falls_back_to_xclip(x11):
+    x11.set_clipboard.side_effect = ValueError("too large")
+    with patch("stt.output.subprocess.run") as run:
+        output.copy_to_clipboard("hello")
+    assert run.call_args.args[0] == ["xclip", "-selection", "clipboard"]
+
+
+def test_without_x11_uses_subprocess(monkeypatch):
+    monkeypatch.setattr(output, "_x11", None)
+    monkeypatch.setattr(output, "WINDOWS", False)
+    with patch("stt.output.subprocess.run") as run:
+        output.type_text("hello")
+    assert run.call_args.args[0][:2] == ["xdotool", "type"]
+
+
+def test_use_x11_without_display(monkeypatch):
+    monkeypatch.setattr(output, "_x11", None)
+    monkeypatch.delenv("DISPLAY", raising=False)
+    assert output.use_x11() is False
+
+
+def test_use_x11_connection_failure(monkeypatch):
+    pytest.importorskip("Xlib")
+    monkeypatch.setattr(output, "_x11", None)
+    monkeypatch.setattr(output, "WINDOWS", False)
+    monkeypatch.setenv("DISPLAY", ":99")
+    with patch("stt.x11.X11", side_effect=OSError("no display")):
+        assert output.use_x11() is False
+
+
+class TestBspc:
+    @pytest.fixture(autouse=True)
+    def _xlib(self):
+        pytest.importorskip("Xlib")
+
+    def test_socket_path(self, monkeypatch):
+        from stt.x11 import bspwm_socket_path
+
+        monkeypatch.delenv("BSPWM_SOCKET", raising=False)
+        assert bspwm_socket_path(":0") == "/tmp/bspwm_0_0-socket"
+        assert bspwm_socket_path(":1.2") == "/tmp/bspwm_1_2-socket"
+        assert bspwm_socket_path("host:0") == "/tmp/bspwmhost_0_0-socket"
+        monkeypatch.setenv("BSPWM_SOCKET", "/run/bspwm.sock")
+        assert bspwm_socket_path() == "/run/bspwm.sock"
+
+    def _serve(self, tmp_path, reply):
+        path = str(tmp_path / "bspwm.sock")
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(path)
+        server.listen(1)
+        received = []
+
+        def handle():
+            conn, _ = server.accept()
+            received.append(conn.recv(4096))
+            conn.sendall(reply)
+            conn.close()
+            server.close()
+
+        threading.Thread(target=handle, daemon=True).start()
+        return path, received
+
+    def test_query(self, tmp_path):
+        from stt.x11 import bspc
+
+        path, received = self._serve(tmp_path, b"true\n")
+        assert bspc("config", "focus_follows_pointer", path=path) == "true\n"
+        assert received == [b"config\0focus_follows_pointer\0"]
+
+    def test_failure_reply(self, tmp_path):
+        from stt.x11 import bspc
+
+        path, _ = self._serve(tmp_path, b"\x07config: Unknown setting.\n")
+        assert bspc("config", "bogus", path=path) is None
+
+    def test_not_running(self, tmp_path):
+        from stt.x11 import bspc
+
+        assert bspc("config", "x", path=os.path.join(tmp_path, "missing")) is None
+
+
+def test_char_keysym():
+    pytest.importorskip("Xlib")
+    from stt.x11 import char_keysym
+
+    assert char_keysym("a") == ord("a")
+    assert char_keysym("é") == 0xE9
+    assert char_keysym("€") == 0x010020AC
+    assert char_keysym("\n") == 0xFF0D
+
+
+class TestNotify:
+    @pytest.fixture(autouse=True)
+    def linux(self, monkeypatch):
+        monkeypatch.setattr(output, "WINDOWS", False)
+        monkeypatch.setattr(output, "_notifier", None)
+
+    def test_uses_dbus(self):
+        with patch("stt.dbus.Notifier") as cls, \
+                patch("stt.output.subprocess.run") as run:
+            output.notify("STT", "Recording...")
+            output.notify("STT", "Typed: hi")
+        cls.assert_called_once()
+        assert cls.return_value.notify.call_count == 2
+        run.assert_not_called()
+
+    def test_falls_back_to_dunstify(self):
+        from stt.dbus import DBusError
+
+        with patch("stt.dbus.Notifier", side_effect=DBusError("no bus")), \
+                patch("stt.output.subprocess.run") as run:
+            output.notify("STT", "Recording...")
+        assert run.call_args.args[0][0] == "dunstify"
+
+    def test_reconnects_after_send_failure(self):
+        with patch("stt.dbus.Notifier") as cls, \
+                patch("stt.output.subprocess.run") as run:
+            cls.return_value.notify.side_effect = [BrokenPipeError(), None]
+            output.notify("STT", "one")
+            output.notify("STT", "two")
+        assert run.call_count == 1
+        assert cls.call_count == 2
+
+    def test_reconnects_after_bus_closed(self):
+        from stt.dbus import DBusError
+
+        with patch("stt.dbus.Notifier") as cls, \
+                patch("stt.output.subprocess.run") as run:
+            cls.return_value.notify.side_effect = [DBusError("bus connection closed"), None]
+            output.notify("STT", "one")
+            output.notify("STT", "two")
+        assert run.call_args.args[0][0] == "dunstify"
+        assert cls.call_count == 2
+
+
+class TestCues:
+    @pytest.fixture
+    def cues(self, monkeypatch):
+        player = MagicMock()
+        player.play.return_value = True
+        monkeypatch.setattr(output, "_cues", player)
+        monkeypatch.setattr(output, "WINDOWS", False)
+        monkeypatch.setattr(output, "CUES", {"start": "/snd/start.oga"})
+        return player
+
+    def test_known_cue_plays_from_memory(self, cues):
+        with patch("stt.output.subprocess.Popen") as popen:
+            output.play_sound("/snd/start.oga")
+        cues.play.assert_called_once_with("start")
+        popen.assert_not_called()
+
+    def test_other_sound_uses_paplay(self, cues):
+        with patch("stt.output.subprocess.Popen") as popen:
+            output.play_sound("/snd/other.oga")
+        cues.play.assert_not_called()
+        assert popen.call_args.args[0] == ["paplay", "/snd/other.oga"]
+
+
+def test_backspace_x11(x11):
+    output.backspace(3)
+    assert x11.key.call_args_list == [(("BackSpace",),)] * 3
+
+
+def test_backspace_xdotool(monkeypatch):
+    monkeypatch.setattr(output, "_x11", None)
+    monkeypatch.setattr(output, "WINDOWS", False)
+    with patch("stt.output.subprocess.run") as run:
+        output.backspace(0)
+        run.assert_not_called()
+        output.backspace(4)
+    assert run.call_args.args[0] == [
+        "xdotool", "key", "--clearmodifiers", "--repeat", "4", "BackSpace",
+    ]
+
+
+def test_backspace_falls_back_for_the_rest_only(x11, monkeypatch):
+    monkeypatch.setattr(output, "WINDOWS", False)
+    x11.key.side_effect = [None, None, ConnectionResetError("X server gone")]
+    with patch("stt.output.subprocess.run") as run:
+        output.backspace(5)
+    assert run.call_args.args[0] == [
+        "xdotool", "key", "--clearmodifiers", "--repeat", "3", "BackSpace",
+    ]
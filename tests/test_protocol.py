@@ -0,0 +1,53 @@
+"""Test request encoding and parsing."""
+
+import pytest
+
+from stt.protocol import encode_request, parse_request
+
+
+def test_plain_path_roundtrip():
+    raw = encode_request("transcribe", path="/tmp/a b.wav")
+    assert raw == b"transcribe /tmp/a b.wav"
+    assert parse_request(raw) == ("transcribe", {"path": "/tmp/a b.wav"}, b"")
+
+
+def test_bare_verb():
+    assert encode_request("ping") == b"ping"
+    assert parse_request(b"ping") == ("ping", {}, b"")
+
+
+def test_legacy_trailing_newline():
+    verb, args, rest = parse_request(b"transcribe /tmp/x.wav\n")
+    assert verb == "transcribe"
+    assert args == {"path": "/tmp/x.wav"}
+    assert rest == b""
+
+
+def test_inline_data_roundtrip():
+    raw = encode_request("stream", data=b"RIFF\nxyz")
+    verb, args, rest = parse_request(raw)
+    assert verb == "stream"
+    assert args == {"size": 8}
+    assert rest == b"RIFF\nxyz"
+
+
+def test_options_use_json():
+    raw = encode_request("transcribe", path="/tmp/a.wav", beam_size=1)
+    _, args, _ = parse_request(raw)
+    assert args == {"path": "/tmp/a.wav", "beam_size": 1}
+
+
+def test_json_must_be_object():
+    with pytest.raises(ValueError):
+        parse_request(b"transcribe {not json")
+
+
+def test_parse_address():
+    from stt.protocol import parse_address
+
+    assert parse_address("/run/stt.sock") == "/run/stt.sock"
+    assert parse_address("gpu1:7001") == ("gpu1", 7001)
+    assert parse_address("[::1]:7001") == ("::1", 7001)
+    assert parse_address(":7001") == ("127.0.0.1", 7001)
+    with pytest.raises(ValueError):
+        parse_address("gpu1")
@@ -0,0 +1,229 @@
+"""Test the router against in-process daemons listening on TCP."""
+
+import asyncio
+import json
+
+import pytest
+
+from stt.aio import Client, DaemonError
+from stt.daemon import Daemon
+from stt.fake import FakeModel
+from stt.router import Router
+from tests.test_daemon import wav_bytes, write_wav
+
+
+async def _hang_up(reader, writer):
+    """A backend that dies after reading the request, before replying."""
+    await reader.read(65536)
+    writer.close()
+
+
+def run_cluster(tmp_path, models, body, dead=0, health_interval=60, loader=None,
+                closing=0):
+    """Start one daemon per model on TCP plus a router; run body(client, router).
+
+    A model of None stands for a daemon whose model failed to load. dead and
+    closing put that many unreachable or hanging-up backends first.
+    """
+
+    async def main():
+        daemons = [Daemon(model) for model in models]
+        addresses = []
+        closers = []
+        for _ in range(closing):
+            closers.append(await asyncio.start_server(_hang_up, "127.0.0.1", 0))
+            addresses.append(closers[-1].sockets[0].getsockname()[:2])
+        for daemon in daemons:
+            daemon.loader = loader
+            if daemon.model is None:
+                daemon.fail_load("no weights")
+            await daemon.start(("127.0.0.1", 0))
+            addresses.append(daemon.servers[0].sockets[0].getsockname()[:2])
+        for _ in range(dead):
+            addresses.insert(0, ("127.0.0.1", 1))  # nothing listens here
+        router = Router(addresses, health_interval=health_interval)
+        sock = str(tmp_path / "router.sock")
+        await router.start(sock)
+        tasks = [asyncio.create_task(s.serve_until_stopped()) for s in (*daemons, router)]
+        try:
+            return await body(Client(sock, timeout=5), router)
+        finally:
+            for s in (*daemons, router):
+                s.stop()
+            await asyncio.gather(*tasks)
+            for server in closers:
+                server.close()
+
+    return asyncio.run(main())
+
+
+def test_forwards_path_as_inline_audio(tmp_path):
+    wav = write_wav(tmp_path / "a.wav")
+
+    async def body(client, router):
+        return await client.transcribe(wav), await client.transcribe_bytes(wav_bytes())
+
+    assert run_cluster(tmp_path, [FakeModel("hi")], body) == ("hi", "hi")
+
+
+def test_stream_relayed(tmp_path):
+    async def body(client, router):
+        return [s async for s in client.stream(data=wav_bytes())]
+
+    assert run_cluster(tmp_path, [FakeModel("hi there")], body) == ["hi there"]
+
+
+def test_least_outstanding_spreads_load(tmp_path):
+    async def body(client, router):
+        data = wav_bytes(seconds=1.0)
+        loop = asyncio.get_running_loop()
+        t0 = loop.time()
+        texts = await asyncio.gather(*(client.transcribe_bytes(data) for _ in range(2)))
+        return sorted(texts), loop.time() - t0, [b.requests for b in router.backends]
+
+    texts, elapsed, counts = run_cluster(
+        tmp_path, [FakeModel("a", rtf=0.4), FakeModel("b", rtf=0.4)], body
+    )
+    assert texts == ["a", "b"]
+    assert counts == [1, 1]
+    assert elapsed < 0.75
+
+
+def test_failover_to_live_backend(tmp_path):
+    async def body(client, router):
+        await asyncio.sleep(0.05)
+        router.backends[0].healthy = True  # as if it died after the last check
+        text = await client.transcribe_bytes(wav_bytes())
+        return text, [(b.healthy, b.failures) for b in router.backends]
+
+    text, backends = run_cluster(tmp_path, [FakeModel("hi")], body, dead=1)
+    assert text == "hi"
+    assert backends == [(False, 1), (True, 0)]
+
+
+def test_failover_from_backend_closing_without_reply(tmp_path):
+    async def body(client, router):
+        text = await client.transcribe_bytes(wav_bytes())
+        stats = json.loads(await client.request(b"stats"))
+        return text, stats["errors"], [(b.healthy, b.failures) for b in router.backends]
+
+    text, errors, backends = run_cluster(tmp_path, [FakeModel("hi")], body, closing=1)
+    assert text == "hi"
+    assert errors == {}
+    assert backends == [(False, 1), (True, 0)]
+
+
+def test_empty_transcript_is_not_a_failure(tmp_path):
+    async def body(client, router):
+        text = await client.transcribe_bytes(wav_bytes())
+        return text, [(b.healthy, b.failures) for b in router.backends]
+
+    assert run_cluster(tmp_path, [FakeModel("")], body) == ("", [(True, 0)])
+
+
+def test_failover_from_backend_without_model(tmp_path):
+    async def body(client, router):
+        text = await client.transcribe_bytes(wav_bytes())
+        stats = json.loads(await client.request(b"stats"))
+        return text, stats["errors"], [(b.requests, b.failures) for b in router.backends]
+
+    text, errors, backends = run_cluster(tmp_path, [None, FakeModel("hi")], body)
+    assert text == "hi"
+    assert errors == {}
+    assert backends == [(1, 1), (1, 0)]
+
+
+def test_last_backend_error_relayed(tmp_path):
+    async def body(client, router):
+        return await client.transcribe_bytes(wav_bytes())
+
+    with pytest.raises(DaemonError, match="model failed to load: no weights"):
+        run_cluster(tmp_path, [None], body)
+
+
+def test_request_error_counted_without_failover(tmp_path):
+    from stt.protocol import encode_request
+
+    async def body(client, router):
+        reply = await client.request(
+            encode_request("transcribe", data=wav_bytes(), decode={"beam": 2})
+        )
+        stats = json.loads(await client.request(b"stats"))
+        return reply, stats["errors"], [(b.requests, b.failures) for b in router.backends]
+
+    reply, errors, backends = run_cluster(tmp_path, [FakeModel(), FakeModel()], body)
+    assert reply == "ERROR: unknown decoding option 'beam'"
+    assert errors == {"transcribe": 1}
+    assert backends == [(1, 0), (0, 0)]
+
+
+def test_no_backend_available(tmp_path):
+    async def body(client, router):
+        return await client.request(b"transcribe {\"size\": 4}\nRIFF")
+
+    assert run_cluster(tmp_path, [], body, dead=1) == "ERROR: no backend available"
+
+
+def test_health_check_marks_backends(tmp_path):
+    async def body(client, router):
+        await asyncio.sleep(0.2)
+        stats = json.loads(await client.request(b"stats"))
+        return stats["model_ready"], [b["healthy"] for b in stats["backends"]]
+
+    ready, healthy = run_cluster(
+        tmp_path, [FakeModel()], body, dead=1, health_interval=0.05
+    )
+    assert ready
+    assert healthy == [False, True]
+
+
+def test_wait_ready_and_ping(tmp_path):
+    async def body(client, router):
+        return await client.ping(), await client.wait_ready(1)
+
+    assert run_cluster(tmp_path, [FakeModel()], body) == (True, True)
+
+
+def test_cancel_reaches_backend(tmp_path):
+    from tests.test_daemon import SlowModel
+
+    async def body(client, router):
+        stream = client.stream(data=wav_bytes(), request_id="job")
+        first = await stream.__anext__()
+        cancelled = await client.cancel("job")
+        rest = []
+        with pytest.raises(DaemonError, match="cancelled"):
+            async for segment in stream:
+                rest.append(segment)
+        return first, cancelled, rest, await client.cancel("other")
+
+    first, cancelled, rest, other = run_cluster(tmp_path, [SlowModel()], body)
+    assert first == "word" and cancelled and not other
+    assert len(rest) < 49
+
+
+
+def test_reload_reaches_every_backend(tmp_path):
+    loads = []
+
+    def loader(name, compute_type):
+        loads.append(name)
+        return FakeModel("new"), None
+
+    async def body(client, router):
+        return await client.request(b"reload small.en"), await client.transcribe_bytes(wav_bytes())
+
+    reply, text = run_cluster(tmp_path, [FakeModel(), FakeModel()], body, loader=loader)
+    assert reply == "ok" and text == "new"
+    assert loads == ["small.en", "small.en"]
+
+
+def test_reload_stops_at_failing_backend(tmp_path):
+    def loader(name, compute_type):
+        raise RuntimeError("out of memory")
+
+    async def body(client, router):
+        return await client.request(b"reload small.en")
+
+    reply = run_cluster(tmp_path, [FakeModel()], body, loader=loader)
+    assert reply.startswith("ERROR: backend 127.0.0.1:") and reply.endswith("out of memory")
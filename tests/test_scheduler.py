@@ -0,0 +1,147 @@
+"""Tests for stt.scheduler — slot ordering, aging and bulk chunking."""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from stt.core import Cancelled
+from stt.scheduler import (
+    BULK,
+    INTERACTIVE,
+    CancelToken,
+    Scheduler,
+    check_priority,
+    chunk_bounds,
+)
+
+
+def test_check_priority():
+    assert check_priority(None) == INTERACTIVE
+    assert check_priority("bulk") == BULK
+    with pytest.raises(ValueError):
+        check_priority("urgent")
+
+
+async def order_of_grants(scheduler, requests, delay=0.0):
+    """Hold the only slot, queue requests, then release; return grant order."""
+    await scheduler.acquire(INTERACTIVE)
+    granted = []
+
+    async def waiter(name, priority):
+        await scheduler.acquire(priority)
+        granted.append(name)
+        scheduler.release()
+
+    tasks = []
+    for name, priority in requests:
+        tasks.append(asyncio.create_task(waiter(name, priority)))
+        await asyncio.sleep(delay)
+    await asyncio.sleep(0)
+    scheduler.release()
+    await asyncio.gather(*tasks)
+    return granted
+
+
+def test_free_slots_granted_immediately():
+    async def main():
+        scheduler = Scheduler(slots=2)
+        assert await scheduler.acquire(BULK) == 0.0
+        assert await scheduler.acquire(INTERACTIVE) == 0.0
+        return scheduler.free
+
+    assert asyncio.run(main()) == 0
+
+
+def test_interactive_served_before_bulk():
+    requests = [("b1", BULK), ("b2", BULK), ("i1", INTERACTIVE), ("i2", INTERACTIVE)]
+    granted = asyncio.run(order_of_grants(Scheduler(), requests))
+    assert granted == ["i1", "i2", "b1", "b2"]
+
+
+def test_aged_bulk_overtakes_new_interactive():
+    requests = [("b1", BULK), ("i1", INTERACTIVE)]
+    granted = asyncio.run(order_of_grants(Scheduler(aging=0.05), requests, delay=0.1))
+    assert granted == ["b1", "i1"]
+
+
+def test_cancelled_waiter_leaves_queue():
+    async def main():
+        scheduler = Scheduler()
+        await scheduler.acquire(INTERACTIVE)
+        task = asyncio.create_task(scheduler.acquire(BULK))
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        scheduler.release()
+        return scheduler.free, scheduler.waiting
+
+    assert asyncio.run(main()) == (1, [])
+
+
+def test_cancel_token_deadline():
+    async def main():
+        token = CancelToken(deadline=0.05)
+        assert not token.is_set()
+        await token.wait()
+        return token.is_set(), token.reason
+
+    assert asyncio.run(main()) == (True, "deadline passed")
+
+
+def test_cancelled_request_dropped_from_queue():
+    async def main():
+        scheduler = Scheduler()
+        await scheduler.acquire(INTERACTIVE)
+        token = CancelToken()
+
+        async def queued():
+            async with scheduler.slot(BULK, cancel=token):
+                pass
+
+        task = asyncio.create_task(queued())
+        await asyncio.sleep(0.01)
+        assert len(scheduler.waiting) == 1
+        token.cancel("gave up")
+        with pytest.raises(Cancelled, match="gave up"):
+            await task
+        return scheduler.waiting
+
+    assert asyncio.run(main()) == []
+
+
+def test_expired_request_never_gets_a_slot():
+    async def main():
+        scheduler = Scheduler()
+        await scheduler.acquire(INTERACTIVE)
+        with pytest.raises(Cancelled, match="deadline passed"):
+            async with scheduler.slot(INTERACTIVE, cancel=CancelToken(deadline=0.05)):
+                pass
+        scheduler.release()
+        return scheduler.free, scheduler.waiting
+
+    assert asyncio.run(main()) == (1, [])
+
+
+def test_chunk_bounds_cut_in_quiet_window():
+    rate = 1000
+    audio = np.ones(25 * rate, dtype=np.float32)
+    audio[8200:8300] = 0.0  # a pause just before the 10 s limit
+    bounds = chunk_bounds(audio, 10, search_seconds=5, rate=rate)
+    assert bounds[0] == (0, 8250)
+    assert all(a[1] == b[0] for a, b in zip(bounds, bounds[1:]))
+    assert bounds[-1][1] == len(audio)
+    assert all(end - start <= 10 * rate for start, end in bounds)
+
+
+def test_chunk_bounds_short_audio():
+    assert chunk_bounds(np.zeros(100, dtype=np.float32), 10) == [(0, 100)]
+
+
+def test_chunk_bounds_last_chunk_not_tiny():
+    rate = 1000
+    audio = np.ones(int(20.5 * rate), dtype=np.float32)
+    bounds = chunk_bounds(audio, 10, rate=rate)
+    assert min(end - start for start, end in bounds) >= 5 * rate
+    assert bounds[-1][1] == len(audio)
@@ -0,0 +1,82 @@
+"""Tests for stt.stabilize — committing words across partial decodes."""
+
+from stt.stabilize import Stabilizer
+
+
+def replay(stab, partials, final):
+    """Apply each edit to a simulated text field; return its contents."""
+    field = ""
+    for edit in [stab.update(p) for p in partials] + [stab.finish(final)]:
+        erase, text = edit
+        field = field[:len(field) - erase] + text
+    return field
+
+
+def test_nothing_typed_until_two_partials_agree():
+    stab = Stabilizer()
+    assert stab.update("hello") == (0, "")
+    assert stab.update("hello world") == (0, "hello")
+    assert stab.update("hello world how") == (0, " world")
+
+
+def test_unstable_tail_held_back():
+    stab = Stabilizer()
+    stab.update("the cat")
+    assert stab.update("the hat sat") == (0, "the")
+    assert stab.update("the hat sat on") == (0, " hat sat")
+
+
+def test_punctuation_and_case_do_not_count_as_changes():
+    stab = Stabilizer()
+    stab.update("Hello world")
+    assert stab.update("hello, world.") == (0, "hello, world.")
+
+
+def test_agreement_of_three():
+    stab = Stabilizer(agreement=3)
+    assert stab.update("a b") == (0, "")
+    assert stab.update("a b c") == (0, "")
+    assert stab.update("a b c d") == (0, "a b")
+
+
+def test_finish_types_rest_and_separator():
+    stab = Stabilizer()
+    assert replay(stab, ["one", "one two", "one two three"], "one two three four") == (
+        "one two three four "
+    )
+    assert stab.committed == []
+
+
+def test_disagreement_without_corrections_keeps_typed_words():
+    stab = Stabilizer()
+    field = replay(stab, ["I scream", "I scream for"], "Ice cream for all")
+    assert field == "I scream for all "
+
+
+def test_corrections_backspace_divergent_words():
+    stab = Stabilizer(corrections=True)
+    field = replay(stab, ["I scream", "I scream for"], "Ice cream for all")
+    assert field == "Ice cream for all "
+
+
+def test_corrections_only_erase_after_common_prefix():
+    stab = Stabilizer(corrections=True)
+    stab.update("please send the male")
+    assert stab.update("please send the male now") == (0, "please send the male")
+    assert stab.finish("please send the mail now") == (5, " mail now ")
+
+
+def test_partial_disagreeing_with_typed_waits():
+    stab = Stabilizer()
+    stab.update("a b c")
+    stab.update("a b c")
+    assert stab.update("a x c") == (0, "")
+    assert stab.update("a x c") == (0, "")
+
+
+def test_empty_final_after_partials():
+    stab = Stabilizer(corrections=True)
+    field = replay(stab, ["uh", "uh"], "")
+    assert field == ""
+    stab = Stabilizer()
+    assert replay(stab, ["uh", "uh"], "") == "uh "
@@ -0,0 +1,50 @@
+"""Import-time regression tests for the hotkey entry points.
+
+stt-toggle and stt-transcribe run on every dictation, so their import graph
+must stay free of heavy dependencies and within a startup budget. Override the
+budget with STT_STARTUP_BUDGET_MS on slow machines.
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+HEAVY = ("numpy", "soundfile", "sounddevice", "soxr", "faster_whisper", "ctranslate2")
+BUDGET_MS = float(os.environ.get("STT_STARTUP_BUDGET_MS", "50"))
+
+
+def _python(code):
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    return result.stdout.strip()
+
+
+def _loaded_heavy(module):
+    code = (
+        f"import sys, {module}; "
+        f"print(','.join(m for m in {HEAVY!r} if m in sys.modules))"
+    )
+    return _python(code)
+
+
+@pytest.mark.parametrize("module", ["stt.toggle", "stt.transcribe", "stt.cli", "stt.client"])
+def test_no_heavy_imports(module):
+    assert _loaded_heavy(module) == ""
+
+
+def test_record_defers_numpy():
+    pytest.importorskip("sounddevice", exc_type=OSError)
+    assert _loaded_heavy("stt.audio") in ("sounddevice", "numpy,sounddevice")
+
+
+@pytest.mark.parametrize("module", ["stt.toggle", "stt.transcribe"])
+def test_import_within_budget(module):
+    code = (
+        "import time; t = time.perf_counter(); "
+        f"import {module}; print(time.perf_counter() - t)"
+    )
+    best = min(float(_python(code)) for _ in range(5)) * 1000
+    assert best < BUDGET_MS, f"{module} import took {best:.1f}ms (budget {BUDGET_MS}ms)"
@@ -1,6 +1,7 @@
 """Test toggle lock file state machine."""
 
 import os
+from unittest.mock import patch
 
 import stt.config as cfg
 from stt.toggle import _read_file, _remove
@@ -70,3 +71,87 @@ def test_double_stop_idempotent(tmp_path):
     _remove(lock)
     _remove(lock)
     assert not os.path.exists(lock)
+
+
+def test_cue_via_daemon():
+    from stt.toggle import _cue
+
+    with patch("stt.client.daemon_send", return_value="ok") as send, \
+            patch("stt.toggle.play_sound") as play:
+        _cue("start", "/snd/start.oga")
+    assert send.call_args.args[0] == "cue start"
+    play.assert_not_called()
+
+
+def test_cue_falls_back_to_paplay():
+    from stt.toggle import _cue
+
+    with patch("stt.client.daemon_send", side_effect=FileNotFoundError), \
+            patch("stt.toggle.play_sound") as play:
+        _cue("stop", "/snd/stop.oga")
+    play.assert_called_once_with("/snd/stop.oga")
+
+
+def toggle_paths(tmp_path):
+    names = ("TOGGLE_LOCK", "TOGGLE_PIDFILE", "TOGGLE_WAVPATH", "TOGGLE_WINDOWID",
+             "TOGGLE_TRACEID")
+    return {n: str(tmp_path / n.lower()) for n in names}
+
+
+def test_start_records_in_daemon(tmp_path):
+    from stt import toggle
+
+    paths = toggle_paths(tmp_path)
+    with patch.multiple(toggle, **paths), \
+            patch("stt.toggle._daemon_ok", return_value=True) as ok, \
+            patch("stt.toggle.subprocess") as sp, \
+            patch("stt.toggle.notify"), \
+            patch("stt.client.daemon_running", return_value=True):
+        sp.run.side_effect = FileNotFoundError
+        sp.CalledProcessError = OSError
+        toggle._start_recording("t1")
+    assert [c.args[0] for c in ok.call_args_list] == ["record-start", "cue start"]
+    sp.Popen.assert_not_called()
+    assert not os.path.exists(paths["TOGGLE_PIDFILE"])
+
+
+def test_start_falls_back_to_recorder(tmp_path):
+    from stt import toggle
+
+    paths = toggle_paths(tmp_path)
+    with patch.multiple(toggle, **paths), \
+            patch("stt.toggle._daemon_ok", return_value=False), \
+            patch("stt.toggle.subprocess") as sp, \
+            patch("stt.toggle.notify"), \
+            patch("stt.toggle.play_sound"), \
+            patch("stt.client.daemon_running", return_value=True):
+        sp.run.side_effect = FileNotFoundError
+        sp.CalledProcessError = OSError
+        sp.Popen.return_value.pid = 4321
+        toggle._start_recording("t1")
+    assert sp.Popen.call_args.args[0][0] == "stt-record"
+    assert _read_file(paths["TOGGLE_PIDFILE"]) == "4321"
+
+
+def test_stop_saves_daemon_recording_before_beep(tmp_path):
+    from stt import toggle
+
+    paths = toggle_paths(tmp_path)
+    wav = tmp_path / "rec.wav"
+    with open(paths["TOGGLE_WAVPATH"], "w") as f:
+        f.write(str(wav))
+    sent = []
+
+    def daemon_ok(request, timeout=0.5):
+        sent.append(request)
+        if request.startswith("record-stop"):
+            wav.write_bytes(b"RIFF")
+        return True
+
+    with patch.multiple(toggle, **paths), \
+            patch("stt.toggle._daemon_ok", side_effect=daemon_ok), \
+            patch("stt.toggle.subprocess") as sp, \
+            patch("stt.toggle.notify"):
+        toggle._stop_recording("t1")
+    assert sent == [f"record-stop {wav}", "cue stop"]
+    assert sp.Popen.call_args.args[0][:2] == ["stt-transcribe", str(wav)]
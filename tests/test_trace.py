@@ -0,0 +1,77 @@
+"""Test span recording, loading and rendering."""
+
+import json
+from unittest.mock import patch
+
+from stt import trace
+
+
+def test_span_noop_without_trace(tmp_path):
+    path = str(tmp_path / "trace.jsonl")
+    trace.set_current(None)
+    with patch("stt.trace.TRACE_PATH", path), trace.span("nothing"):
+        pass
+    assert not (tmp_path / "trace.jsonl").exists()
+
+
+def test_spans_roundtrip(tmp_path):
+    path = str(tmp_path / "trace.jsonl")
+    with patch("stt.trace.TRACE_PATH", path):
+        trace.record("old", "a", 100.0, 0.5)
+        trace.set_current("abc")
+        try:
+            with trace.span("outer"), trace.span("inner", step=1):
+                pass
+        finally:
+            trace.set_current(None)
+        trace.record("abc", "daemon.inference", 1e10, 0.25)
+        spans = trace.load()
+
+    assert [s["name"] for s in spans] == ["outer", "inner", "daemon.inference"]
+    assert spans[1]["attrs"] == {"step": 1}
+    assert all(s["trace"] == "abc" for s in spans)
+
+
+def test_load_specific_trace(tmp_path):
+    path = str(tmp_path / "trace.jsonl")
+    with patch("stt.trace.TRACE_PATH", path):
+        trace.record("one", "a", 1.0, 0.1)
+        trace.record("two", "b", 2.0, 0.1)
+        assert [s["name"] for s in trace.load("one")] == ["a"]
+
+
+def test_rotation(tmp_path):
+    path = str(tmp_path / "trace.jsonl")
+    with patch("stt.trace.TRACE_PATH", path), patch("stt.trace.MAX_TRACE_BYTES", 10):
+        trace.record("t", "a", 1.0, 0.1)
+        trace.record("t", "b", 2.0, 0.1)
+        assert (tmp_path / "trace.jsonl.1").exists()
+        assert [s["name"] for s in trace.load("t")] == ["a", "b"]
+
+
+def spans():
+    return [
+        {"trace": "t", "name": "toggle.stop", "proc": "stt-toggle", "pid": 1,
+         "start": 10.0, "dur": 0.2},
+        {"trace": "t", "name": "daemon.inference", "proc": "stt-daemon", "pid": 2,
+         "start": 10.5, "dur": 0.5, "attrs": {"kind": "transcribe"}},
+    ]
+
+
+def test_waterfall():
+    out = trace.waterfall(spans(), width=10)
+    lines = out.splitlines()
+    assert lines[0] == "trace t  1000ms"
+    assert "toggle.stop" in lines[1] and lines[1].endswith("|##")
+    assert lines[2].endswith("|     #####")
+
+
+def test_chrome_trace():
+    out = trace.chrome_trace(spans())
+    json.dumps(out)
+    complete = [e for e in out["traceEvents"] if e["ph"] == "X"]
+    assert complete[1]["ts"] == 10.5e6
+    assert complete[1]["dur"] == 0.5e6
+    assert complete[1]["args"] == {"kind": "transcribe"}
+    names = {e["args"]["name"] for e in out["traceEvents"] if e["ph"] == "M"}
+    assert names == {"stt-toggle", "stt-daemon"}
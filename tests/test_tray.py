@@ -16,13 +16,16 @@ def test_read_config_defaults_when_missing(tmp_path):
     assert config["model"] == "large-v3"
     assert config["device"] == "cuda"
     assert config["hotkey"] == "<ctrl>+<shift>+s"
+    assert config["capture"] == "false"
     assert os.path.exists(config_path)
+    with open(config_path) as f:
+        assert 'capture = "false"' in f.read()
 
 
 def test_read_config_parses_values(tmp_path):
     config_path = str(tmp_path / "config.toml")
     with open(config_path, "w") as f:
-        f.write('model = "base"\ndevice = "cpu"\nhotkey = "<alt>+r"\n')
+        f.write('model = "base"\ndevice = "cpu"\nhotkey = "<alt>+r"\ncapture = "true"\n')
     with patch("stt.tray.CONFIG_PATH", config_path), \
          patch("stt.hotkey_dialog.validate_hotkey", return_value=True):
         from stt.tray import _read_config
@@ -30,6 +33,7 @@ def test_read_config_parses_values(tmp_path):
     assert config["model"] == "base"
     assert config["device"] == "cpu"
     assert config["hotkey"] == "<alt>+r"
+    assert config["capture"] == "true"
 
 
 def test_read_config_invalid_hotkey_falls_back(tmp_path):
@@ -0,0 +1,86 @@
+"""Tests for stt tune's search and persistence, with a fake benchmark runner."""
+
+import json
+
+import pytest
+
+from stt.core import tuned_settings
+from stt.tune import save_settings, search, thread_counts, word_error_rate
+
+
+def test_word_error_rate():
+    assert word_error_rate("Hello, world.", "hello world") == 0.0
+    assert word_error_rate("the cat sat", "the hat sat") == pytest.approx(1 / 3)
+    assert word_error_rate("a b c d", "a c d") == 0.25
+    assert word_error_rate("", "") == 0.0
+
+
+def test_thread_counts():
+    assert thread_counts(8) == [1, 2, 4, 8]
+    assert thread_counts(6) == [1, 2, 4, 6]
+    assert thread_counts(1) == [1]
+
+
+def fake_run(table):
+    """table: {(compute_type, threads): (seconds, text)}."""
+    calls = []
+
+    def run(model_name, device, audio, compute_type, threads, repeat):
+        calls.append((compute_type, threads))
+        return table[(compute_type, threads)]
+
+    run.calls = calls
+    return run
+
+
+def test_search_picks_fastest_within_tolerance():
+    ref = "one two three four five six seven eight nine ten"
+    run = fake_run({
+        ("float32", 4): (3.0, ref),
+        ("int8", 4): (1.0, "one two three four five six seven eight nine tan"),
+        ("int8_float32", 4): (1.5, ref),
+        ("int8_float32", 1): (4.0, ref),
+        ("int8_float32", 2): (1.2, ref),
+    })
+    results, best = search(
+        "m", "cpu", None, ["int8", "int8_float32", "float32"], [1, 2, 4],
+        tolerance=0.05, run=run,
+    )
+    # float32 runs first to provide the reference transcript
+    assert run.calls[0] == ("float32", 4)
+    assert (best["compute_type"], best["cpu_threads"]) == ("int8_float32", 2)
+    assert not next(r for r in results if r["compute_type"] == "int8")["ok"]
+
+
+def test_search_with_given_reference_and_loose_tolerance():
+    run = fake_run({("float32", None): (2.0, "hello"), ("float16", None): (1.0, "hallo")})
+    _, best = search(
+        "m", "cuda", None, ["float16", "float32"], [None],
+        tolerance=1.0, reference="hello", run=run,
+    )
+    assert best["compute_type"] == "float16"
+    assert len(run.calls) == 2
+
+
+def test_search_nothing_qualifies():
+    run = fake_run({("int8", 2): (1.0, "wrong")})
+    _, best = search("m", "cpu", None, ["int8"], [2], reference="right", run=run)
+    assert best is None
+
+
+def test_save_and_load_settings(tmp_path):
+    path = str(tmp_path / "sub" / "tune.json")
+    save_settings("tiny", "cpu", {"compute_type": "int8", "cpu_threads": 4}, path)
+    save_settings("tiny", "cuda", {"compute_type": "float16"}, path)
+    assert tuned_settings("tiny", "cpu", path) == {"compute_type": "int8", "cpu_threads": 4}
+    assert tuned_settings("tiny", "cuda", path) == {"compute_type": "float16"}
+    assert tuned_settings("base", "cpu", path) == {}
+    with open(path) as f:
+        assert set(json.load(f)) == {"tiny@cpu", "tiny@cuda"}
+
+
+def test_tuned_settings_missing_or_corrupt(tmp_path):
+    assert tuned_settings("tiny", "cpu", str(tmp_path / "none.json")) == {}
+    bad = tmp_path / "bad.json"
+    bad.write_text("{not json")
+    assert tuned_settings("tiny", "cpu", str(bad)) == {}
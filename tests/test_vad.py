@@ -0,0 +1,58 @@
+"""Test continuous-mode segmentation."""
+
+import numpy as np
+
+from stt.vad import Segmenter
+
+RATE = 1000
+LOUD = np.full((100, 1), 0.5, dtype=np.float32)
+QUIET = np.zeros((100, 1), dtype=np.float32)
+
+
+def make():
+    return Segmenter(RATE, chunk_duration=0.1, threshold=0.01,
+                     silence_duration=0.3, min_duration=0.3)
+
+
+def test_leading_silence_ignored():
+    seg = make()
+    for _ in range(10):
+        assert seg.feed(QUIET) is None
+    assert seg.flush() is None
+
+
+def test_segment_after_silence():
+    seg = make()
+    for _ in range(3):
+        assert seg.feed(LOUD) is None
+    assert seg.feed(QUIET) is None
+    assert seg.feed(QUIET) is None
+    out = seg.feed(QUIET)
+    assert out is not None
+    assert out.shape == (600,)
+    assert not seg.has_speech
+
+
+def test_short_segment_dropped():
+    seg = make()
+    seg.feed(LOUD)
+    assert seg.flush() is None
+    assert seg.buffer == []
+
+
+def test_flush_returns_pending_speech():
+    seg = make()
+    for _ in range(4):
+        seg.feed(LOUD)
+    assert seg.flush().shape == (400,)
+
+
+def test_pending_utterance():
+    seg = make()
+    assert seg.pending() is None
+    seg.feed(QUIET)
+    assert seg.pending() is None
+    seg.feed(LOUD)
+    seg.feed(LOUD)
+    assert seg.pending().shape == (200,)
+    assert len(seg.buffer) == 2
@@ -0,0 +1,230 @@
+"""Tests for stt.workers — core slicing and a real pool of fake-model workers."""
+
+import argparse
+import asyncio
+import functools
+import os
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from stt.daemon import Daemon, _make_model
+from stt.workers import WorkerError, WorkerPool, core_slices
+
+
+def test_core_slices_even():
+    assert core_slices(2, range(8)) == [[0, 1, 2, 3], [4, 5, 6, 7]]
+
+
+def test_core_slices_remainder():
+    assert core_slices(3, [0, 1, 2, 3, 4, 5, 6]) == [[0, 1, 2], [3, 4], [5, 6]]
+
+
+def test_core_slices_more_procs_than_cpus():
+    assert core_slices(3, [4, 5]) == [[4], [5], [4]]
+
+
+def fake_factory(rtf=0.0):
+    return functools.partial(_make_model, argparse.Namespace(fake_rtf=rtf))
+
+
+def failing_factory(cpu_threads=None):
+    raise RuntimeError("no weights")
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = WorkerPool(2, fake_factory())
+    pool.wait_ready()
+    yield pool
+    pool.close()
+
+
+def write_wav(path, seconds=1.0, rate=16000):
+    audio = np.random.randn(int(rate * seconds)).astype(np.float32) * 0.1
+    sf.write(str(path), audio, rate)
+    return str(path)
+
+
+def test_workers_pinned_to_separate_cores(pool):
+    if not hasattr(os, "sched_getaffinity"):
+        pytest.skip("no CPU affinity on this platform")
+    affinities = [os.sched_getaffinity(w.proc.pid) for w in pool.workers]
+    assert affinities == [set(w.cores) for w in pool.workers]
+
+
+def test_pool_decodes_and_streams(pool, tmp_path):
+    wav = write_wav(tmp_path / "a.wav", seconds=2.0)
+    seen = []
+
+    async def main():
+        return await pool.decode(wav, seen.append)
+
+    segments, info, stamps = asyncio.run(main())
+    assert [s.text for s in segments] == [" hello world"]
+    assert seen == ["hello world"]
+    assert info.duration == 2.0
+    assert stamps[3] == 2.0
+
+
+def test_pool_runs_requests_in_parallel(tmp_path):
+    pool = WorkerPool(2, fake_factory(rtf=0.5))
+    pool.wait_ready()
+    wav = write_wav(tmp_path / "a.wav", seconds=1.0)
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        t0 = loop.time()
+        await asyncio.gather(pool.decode(wav), pool.decode(wav))
+        return loop.time() - t0
+
+    try:
+        assert asyncio.run(main()) < 0.9
+    finally:
+        pool.close()
+
+
+def test_pool_reports_decode_errors(pool, tmp_path):
+    async def main():
+        return await pool.decode(str(tmp_path / "missing.wav"))
+
+    with pytest.raises(WorkerError, match="Error"):
+        asyncio.run(main())
+
+
+def test_load_failure():
+    pool = WorkerPool(1, failing_factory)
+    with pytest.raises(WorkerError, match="no weights"):
+        pool.wait_ready()
+
+
+def test_daemon_serves_from_pool(tmp_path):
+    from stt.aio import Client
+
+    wav = write_wav(tmp_path / "a.wav")
+    sock = str(tmp_path / "d.sock")
+    pool = WorkerPool(1, fake_factory())
+    pool.wait_ready()
+
+    async def main():
+        daemon = Daemon()
+        daemon.set_pool(pool)
+        await daemon.start(sock)
+        serving = asyncio.create_task(daemon.serve_until_stopped())
+        try:
+            client = Client(sock, timeout=5)
+            return await client.transcribe(wav), daemon.metrics.snapshot()
+        finally:
+            daemon.stop()
+            await serving
+
+    text, stats = asyncio.run(main())
+    assert not pool.workers[0].proc.is_alive()  # closed with the daemon
+    assert text == "hello world"
+    assert stats["latency"]["inference"]["count"] == 1
+
+
+def test_dead_worker_is_replaced(tmp_path):
+    pool = WorkerPool(1, fake_factory())
+    pool.wait_ready()
+    wav = write_wav(tmp_path / "a.wav")
+    pool.workers[0].proc.kill()
+    pool.workers[0].proc.join()
+
+    async def main():
+        with pytest.raises(WorkerError, match="died"):
+            await pool.decode(wav)
+        return await pool.decode(wav)
+
+    try:
+        segments, _, _ = asyncio.run(main())
+        assert [s.text for s in segments] == [" hello world"]
+    finally:
+        pool.close()
+
+
+def test_pool_cancel_frees_worker(tmp_path):
+    from stt.core import Cancelled
+    from stt.scheduler import CancelToken
+
+    pool = WorkerPool(1, fake_factory(rtf=0.5))
+    pool.wait_ready()
+    wav = write_wav(tmp_path / "a.wav", seconds=1.0)
+
+    async def main():
+        with pytest.raises(Cancelled, match="deadline passed"):
+            await pool.decode(wav, cancel=CancelToken(deadline=0.1))
+        segments, _, _ = await pool.decode(wav)  # the stale cancel must not leak
+        return [s.text for s in segments]
+
+    try:
+        assert asyncio.run(main()) == [" hello world"]
+    finally:
+        pool.close()
+
+
+def test_retired_pool_finishes_in_flight_decode(tmp_path):
+    pool = WorkerPool(1, fake_factory(rtf=0.3))
+    pool.wait_ready()
+    wav = write_wav(tmp_path / "a.wav", seconds=1.0)
+
+    async def main():
+        decoding = asyncio.ensure_future(pool.decode(wav))
+        await asyncio.sleep(0.1)
+        pool.retire()
+        assert pool.workers[0].proc.is_alive()  # still busy
+        segments, _, _ = await decoding
+        await asyncio.sleep(0.5)  # close() runs on an executor thread
+        return [s.text for s in segments]
+
+    try:
+        assert asyncio.run(main()) == [" hello world"]
+        assert not pool.workers[0].proc.is_alive()
+    finally:
+        pool.close()
+
+
+def test_abandoned_decode_stops_before_worker_is_reused(tmp_path):
+    pool = WorkerPool(1, fake_factory(rtf=0.5))
+    pool.wait_ready()
+    wav = write_wav(tmp_path / "a.wav", seconds=1.0)
+
+    async def main():
+        decoding = asyncio.ensure_future(pool.decode(wav))
+        await asyncio.sleep(0.1)
+        decoding.cancel()  # the client went away mid-decode
+        with pytest.raises(asyncio.CancelledError):
+            await decoding
+        assert pool.workers[0].cancel.is_set()  # told to stop, and has
+        segments, _, _ = await pool.decode(wav)
+        assert not pool.workers[0].conn.poll(0.6)  # no reply left over in the pipe
+        return [s.text for s in segments]
+
+    try:
+        assert asyncio.run(main()) == [" hello world"]
+    finally:
+        pool.close()
+
+
+def test_retiring_idle_pool_does_not_block_the_loop():
+    import time
+
+    pool = WorkerPool(2, fake_factory())
+    pool.wait_ready()
+
+    async def main():
+        t0 = time.monotonic()
+        pool.retire()
+        returned = time.monotonic() - t0
+        for _ in range(50):
+            if not any(w.proc.is_alive() for w in pool.workers):
+                break
+            await asyncio.sleep(0.05)
+        return returned
+
+    try:
+        assert asyncio.run(main()) < 0.05
+        assert not any(w.proc.is_alive() for w in pool.workers)
+    finally:
+        pool.close()